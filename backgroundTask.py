@@ -0,0 +1,215 @@
+"""
+Loads and renders that run in the background while the menu stays responsive.
+
+A task runs on its own thread and reports its progress through a Progress object, in bytes and
+rows, from which the menu shows the rate and the time left. Cancelling a task sets a flag that
+the task checks every time it reports progress, so it stops at the next chunk by raising
+Cancelled. Renders are run in a forked process instead, since pyplot keeps global state that
+cannot be shared between threads, and cancelling one terminates the process. A process is only
+forked while no other thread runs work of its own, since a lock held by such a thread, e.g. in the
+parser or the allocator, stays locked forever in the child.
+"""
+
+import threading
+import time
+
+
+class Cancelled(Exception):
+    """
+    Raised inside a task that was cancelled, the next time it reports progress.
+    """
+
+
+class Progress():
+    """
+    Progress of a background task, updated by the task and read by the menu.
+
+    Parameters:
+    -----------
+    total_bytes : int, optional
+        Size of the input, if known, to estimate the time left.
+    """
+
+    def __init__(self, total_bytes=None):
+        self.total_bytes = total_bytes
+        self.bytes = 0
+        self.rows = 0
+        self.start = time.perf_counter()
+        self.cancelled = threading.Event()
+
+    def update(self, bytes_done=None, rows=0):
+        """
+        Records that the task has consumed bytes_done bytes of its input in total and rows more rows.
+
+        Raises:
+        -------
+        Cancelled:
+            If the task was cancelled.
+        """
+        if bytes_done is not None:
+            self.bytes = bytes_done
+        self.rows += rows
+        self.check()
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise Cancelled()
+
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    def eta(self):
+        """
+        Returns:
+        --------
+        float or None:
+            Estimated seconds left at the average rate so far, or None if it cannot be estimated yet.
+        """
+        elapsed = self.elapsed()
+        if not self.total_bytes or not self.bytes or elapsed <= 0:
+            return None
+        return max(0.0, (self.total_bytes - self.bytes) / (self.bytes / elapsed))
+
+    def describe(self):
+        """
+        Returns a one line summary, e.g. '35.2 of 120.4 MB, 1,200,000 rows (40.1 MB/s, 2 s left)'.
+        """
+        elapsed = max(self.elapsed(), 1e-9)
+        if not self.bytes and not self.rows:
+            return f"running for {elapsed:.0f} s"
+        parts = []
+        rates = []
+        if self.bytes:
+            total = f" of {self.total_bytes / 2**20:.1f}" if self.total_bytes else ""
+            parts.append(f"{self.bytes / 2**20:.1f}{total} MB")
+            rates.append(f"{self.bytes / 2**20 / elapsed:.1f} MB/s")
+        if self.rows:
+            parts.append(f"{self.rows:,} rows")
+            rates.append(f"{self.rows / elapsed:,.0f} rows/s")
+        eta = self.eta()
+        if eta is not None:
+            rates.append(f"{eta:.0f} s left")
+        return f"{', '.join(parts)} ({', '.join(rates)})"
+
+
+class BackgroundTask():
+    """
+    Runs function(*args, progress=..., **kwargs) on a background thread.
+
+    Parameters:
+    -----------
+    name : str
+        Description of the task shown in the menu, e.g. 'Loading data.csv'.
+    function : callable
+        The work, which reports to the Progress passed as its progress keyword argument.
+
+    Example:
+    --------
+    >>> task = BackgroundTask('Loading data.csv', reader.load_csv_files, ['data.csv'])
+    >>> task.progress.describe()
+    '35.2 of 120.4 MB, 300,000 rows (40.1 MB/s, 2 s left)'
+    >>> df = task.result()
+    """
+
+    def __init__(self, name, function, *args, **kwargs):
+        self.name = name
+        self.progress = Progress()
+        # the forked process a render task waits for, see fork_process
+        self.process = None
+        # the render started once this task has finished, see csvReader.start_render
+        self.then = None
+        self._result = None
+        self._error = None
+        self.thread = threading.Thread(target=self._run, args=(function, args, kwargs), name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self, function, args, kwargs):
+        from profiler import span
+        try:
+            # an open span tells the profiler not to trust the memory peaks of spans on other threads
+            with span(self.name):
+                self._result = function(*args, progress=self.progress, **kwargs)
+        except BaseException as error:
+            self._error = error
+
+    def done(self):
+        return not self.thread.is_alive()
+
+    def cancel(self):
+        self.progress.cancelled.set()
+
+    def result(self, timeout=None):
+        """
+        Waits for the task to finish and returns what the function returned.
+
+        Raises:
+        -------
+        Cancelled:
+            If the task was cancelled.
+        Exception:
+            Whatever the function raised.
+        """
+        self.thread.join(timeout)
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def can_fork():
+    import multiprocessing
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _run_headless(function, args):
+    import matplotlib.pyplot as plt
+    # the forked process never shows a window, and must not touch the windows of its parent
+    plt.switch_backend('Agg')
+    function(*args)
+
+
+def fork_process(function, *args):
+    """
+    Starts function(*args) in a forked process with the Agg backend and returns the process.
+
+    The forked process starts with a copy of the memory of this one, so loaded datasets and caches are
+    not pickled. Only fork while no other thread of this process is running, e.g. a background load,
+    or the process can deadlock on a lock that thread held.
+
+    Parameters:
+    -----------
+    function : callable
+        The work, e.g. csvReader.save_plot_column. Its messages are printed by the forked process.
+
+    Returns:
+    --------
+    multiprocessing.Process:
+        The started process.
+    """
+    import multiprocessing
+    process = multiprocessing.get_context('fork').Process(target=_run_headless, args=(function, args), daemon=True)
+    process.start()
+    return process
+
+
+def wait_for_process(process, progress=None):
+    """
+    Waits for a process started by fork_process, terminating it if progress is cancelled.
+
+    Raises:
+    -------
+    Cancelled:
+        If progress was cancelled, after the process has been terminated.
+    RuntimeError:
+        If the process failed.
+    """
+    try:
+        while process.is_alive():
+            if progress is not None:
+                progress.check()
+            process.join(0.1)
+    except Cancelled:
+        process.terminate()
+        process.join()
+        raise
+    if process.exitcode != 0:
+        raise RuntimeError(f"the render process exited with code {process.exitcode}")
@@ -0,0 +1,245 @@
+"""
+Headless batch rendering of plots described in a job spec file.
+
+The job spec is a JSON (or YAML, if PyYAML is installed) list of jobs. Every job names its
+source file and takes the same arguments as csvReader.save_plot_column or, when it has
+x_column and y_column, csvReader.save_plot_versus. Columns can be given by index or name.
+
+    [
+        {"file": "bestSynths.csv", "columns": ["Delay"], "plot_type": "hist",
+         "plot_title": "Delay", "doc_type": "png", "doc_title": "delay.png"},
+        {"file": "bestSynths.csv", "x_column": "Width", "y_column": "Area", "plot_type": "line",
+         "doc_type": "svg", "doc_title": "area.svg"},
+        {"file": "bestSynths.csv", "columns": ["Area"], "plot_type": "bar", "aggregation": "mean",
+         "key_column": "Width", "top": 10, "doc_type": "png", "doc_title": "area_by_width.png"}
+    ]
+
+Bar plots take the aggregation, key_column and top arguments of save_plot_column, with the key
+column given by index or name, and box plots take quantile_error. A job without doc_title is saved
+as job_<position>_<plot_type>.<doc_type>, e.g. job_3_hist.pdf, so jobs never overwrite each other.
+
+Usage:
+
+    python3 batchRender.py jobs.json --workers 8
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+
+from coloredPrinter import ColoredPrinter as p
+from csvReader import csvReader
+
+# path -> (size and modification time, dataset) loaded by this worker process, least recently used first
+_datasets = OrderedDict()
+MAX_DATASETS_PER_WORKER = 2
+
+COLUMN_PLOT_TYPES = ('', 'hist', 'line', 'bar', 'box')
+VERSUS_PLOT_TYPES = ('', 'scatter', 'line', 'density')
+
+
+def load_job_spec(path):
+    """
+    Reads a list of jobs from a JSON or YAML file.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the job spec. Files ending in '.yaml' or '.yml' are read as YAML.
+
+    Returns:
+    --------
+    list of dict:
+        The jobs.
+    """
+    with open(path) as spec_file:
+        if path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to read YAML job specs, install it or use JSON.")
+            return yaml.safe_load(spec_file)
+        return json.load(spec_file)
+
+
+def _load_dataset(path, cache_dir):
+    stat = os.stat(path)
+    identity = (stat.st_size, stat.st_mtime_ns)
+    if path in _datasets and _datasets[path][0] == identity:
+        _datasets.move_to_end(path)
+        return _datasets[path][1]
+
+    reader = csvReader(cache_dir=cache_dir)
+    df = reader.cache.read_csv(path) if reader.cache is not None else reader.options.read_csv(path)
+    # a file that changed since it was loaded is loaded again, for long running workers like plotServer
+    _datasets[path] = (identity, df)
+    _datasets.move_to_end(path)
+    while len(_datasets) > MAX_DATASETS_PER_WORKER:
+        _datasets.popitem(last=False)
+    return df
+
+
+def retain_datasets(paths):
+    """
+    Drops the datasets loaded by this worker process except the ones at paths.
+    """
+    for path in [path for path in _datasets if path not in paths]:
+        del _datasets[path]
+
+
+def _column_index(df, column):
+    return column if isinstance(column, int) else df.columns.get_loc(column)
+
+
+def _warm_cache(path, cache_dir):
+    # failures are reported by the jobs that use the file
+    try:
+        csvReader(cache_dir=cache_dir).cache.read_csv(path)
+    except Exception:
+        pass
+
+
+def render_job(job, cache_dir='.csvReader_cache'):
+    """
+    Renders and saves the plot described by a single job.
+
+    Parameters:
+    -----------
+    job : dict
+        The job, see the module docstring for its keys.
+    cache_dir : str or None, optional
+        Directory of the binary column cache. Default is '.csvReader_cache'.
+
+    Returns:
+    --------
+    tuple:
+        (doc_title, error) where error is None if the plot was saved. A plot that could not be drawn
+        fails with the last message printed while drawing it.
+    """
+    doc_title = job.get('doc_title', '')
+    try:
+        df = _load_dataset(job['file'], cache_dir)
+        reader = csvReader(cache_dir=cache_dir)
+        plt.figure()
+        plot_types = VERSUS_PLOT_TYPES if 'x_column' in job else COLUMN_PLOT_TYPES
+        if job.get('plot_type', '') not in plot_types:
+            raise ValueError(f"unsupported plot type {job['plot_type']!r}, supported types: {plot_types[1:]}")
+        messages = io.StringIO()
+        try:
+            with redirect_stdout(messages):
+                saved = _save_plot(reader, df, job, doc_title)
+        finally:
+            print(messages.getvalue(), end='')
+        if not saved:
+            reasons = messages.getvalue().strip().splitlines()
+            raise ValueError(reasons[-1] if reasons else "nothing was drawn")
+        return doc_title, None
+    except Exception as error:
+        return doc_title, f"{type(error).__name__}: {error}"
+    finally:
+        plt.close('all')
+
+
+def _save_plot(reader, df, job, doc_title):
+    if 'x_column' in job:
+        return reader.save_plot_versus(df, _column_index(df, job['x_column']), _column_index(df, job['y_column']),
+                                       job.get('plot_type', 'scatter'), job.get('plot_title', ''),
+                                       job.get('doc_type', ''), doc_title)
+    column_indexs = [_column_index(df, column) for column in job['columns']]
+    key_index = _column_index(df, job['key_column']) if job.get('key_column') is not None else None
+    return reader.save_plot_column(df, column_indexs, job.get('plot_type', 'hist'), job.get('plot_title', ''),
+                                   job.get('doc_type', ''), doc_title, job.get('aggregation', 'count'), key_index,
+                                   int(job.get('top', 20)), bool(job.get('quantile_error', False)))
+
+
+def default_doc_title(position, job):
+    """
+    Returns the file name of a job without doc_title, from its position in the spec and its plot type.
+    """
+    plot_type = job.get('plot_type') or ('scatter' if 'x_column' in job else 'hist')
+    return f"job_{position}_{plot_type}.{job.get('doc_type') or 'pdf'}"
+
+
+def _render_batch(jobs, cache_dir):
+    return [render_job(job, cache_dir) for job in jobs]
+
+
+def render_jobs(jobs, workers=None, cache_dir='.csvReader_cache'):
+    """
+    Renders all jobs in parallel on a process pool.
+
+    Jobs are grouped by source file and every group is split into at most one batch per worker,
+    so a worker loads each dataset once and reuses it for all jobs of the batch. With the column
+    cache enabled every file is parsed once up front and the workers memory-map the cached columns.
+
+    Parameters:
+    -----------
+    jobs : list of dict
+        The jobs, see the module docstring for their keys.
+    workers : int, optional
+        Number of worker processes. Default is the number of CPU cores.
+    cache_dir : str or None, optional
+        Directory of the binary column cache. Set to None to parse the files in every worker.
+
+    Returns:
+    --------
+    list of tuple:
+        (doc_title, error) for every job, in the order of the jobs.
+    """
+    workers = workers or os.cpu_count() or 1
+    jobs = [job if job.get('doc_title') else dict(job, doc_title=default_doc_title(position, job))
+            for position, job in enumerate(jobs)]
+    groups = OrderedDict()
+    for position, job in enumerate(jobs):
+        groups.setdefault(job['file'], []).append(position)
+
+    batches = []
+    for positions in groups.values():
+        size = -(-len(positions) // workers)
+        batches += [positions[start:start + size] for start in range(0, len(positions), size)]
+
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if cache_dir is not None:
+            list(pool.map(_warm_cache, list(groups), [cache_dir] * len(groups)))
+        futures = [(batch, pool.submit(_render_batch, [jobs[position] for position in batch], cache_dir))
+                   for batch in batches]
+        for batch, future in futures:
+            for position, result in zip(batch, future.result()):
+                results[position] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the plots of a job spec without the interactive menu.")
+    parser.add_argument('spec', help="JSON or YAML file with the list of jobs")
+    parser.add_argument('--workers', type=int, default=None, help="number of worker processes (default: all cores)")
+    parser.add_argument('--no-cache', action='store_true', help="do not use the binary column cache")
+    args = parser.parse_args()
+
+    printer = p()
+    jobs = load_job_spec(args.spec)
+    results = render_jobs(jobs, args.workers, None if args.no_cache else '.csvReader_cache')
+    failures = 0
+    for doc_title, error in results:
+        if error is None:
+            printer.print(f"saved {doc_title}", color="green")
+        else:
+            failures += 1
+            printer.print(f"failed {doc_title}: {error}", color="red", options=["bold"])
+    printer.print(f"{len(results) - failures} of {len(results)} plots rendered", options=["bold"])
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
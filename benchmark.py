@@ -0,0 +1,458 @@
+"""
+Benchmarks of loading, plotting and saving on synthetic CSV files.
+
+Synthetic files are generated at several scales, narrow and wide, numeric and mixed (text
+columns next to the numeric ones). For each file the harness times and memory-profiles
+loading, and showing and saving every plot type of plot_column and plot_versus in every
+format, on the headless Agg backend. The plots are drawn from a DataFrame, a LazyCSV and a
+ChunkedCSV of the file, where large files are only read lazily or streamed. It also measures
+the startup time of 'import csvReader' against a fixed budget. Results are written as JSON and
+compared against a stored baseline:
+
+    python3 benchmark.py --scales 1e3 1e5 1e6 --baseline benchmark_baseline.json
+
+Each case is run --repeat times and the fastest run is reported, so background noise only
+makes a case look slower, never faster. Peak memory is measured with tracemalloc in one extra
+run, because tracing slows the code it measures. Run with --save-baseline on a quiet machine to
+store a new baseline, and compare only against baselines from the same machine.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from chunkedReader import ChunkedCSV
+from coloredPrinter import ColoredPrinter as p
+from csvReader import csvReader
+from lazyReader import LazyCSV
+
+SCALES = {'1e3': 10 ** 3, '1e4': 10 ** 4, '1e5': 10 ** 5, '1e6': 10 ** 6, '1e7': 10 ** 7, '1e8': 10 ** 8}
+SHAPES = {'narrow': 4, 'wide': 64}
+KINDS = ('numeric', 'mixed')
+COLUMN_PLOT_TYPES = ('hist', 'line', 'bar', 'box')
+VERSUS_PLOT_TYPES = ('scatter', 'line', 'density')
+SAVE_FORMATS = ('png', 'pdf', 'svg')
+# 'import csvReader' must not pull in pandas, numpy or matplotlib
+STARTUP_BUDGET_S = 0.1
+GENERATE_CHUNK_ROWS = 10 ** 6
+# larger files are only plotted through the datasets that do not hold every column in memory
+IN_MEMORY_ROWS = 10 ** 6
+LAZY_ROWS = 10 ** 7
+# changes below these are noise at any tolerance
+MIN_DELTA_S = 0.005
+MIN_DELTA_MB = 1.0
+
+
+def generate_csv(path, rows, n_columns, kind='numeric', seed=0):
+    """
+    Writes a synthetic CSV file, chunk by chunk so files larger than memory can be generated.
+
+    Column 0 is a float random walk and column 1 a correlated integer, so line, scatter and
+    regression plots have structure. In 'mixed' files every third column is text with 20 distinct
+    labels, the others alternate between floats and integers.
+
+    Parameters:
+    -----------
+    path : str
+        Path of the file to write.
+    rows : int
+        Number of data rows.
+    n_columns : int
+        Number of columns, at least 2.
+    kind : str, optional
+        'numeric' or 'mixed'. Default is 'numeric'.
+    seed : int, optional
+        Seed of the random generator, so the same arguments always write the same file. Default is 0.
+    """
+    rng = np.random.default_rng(seed)
+    labels = np.array([f'label_{index}' for index in range(20)])
+    walk_start = 0.0
+    staging = f'{path}.tmp-{os.getpid()}'
+    for start in range(0, rows, GENERATE_CHUNK_ROWS):
+        size = min(GENERATE_CHUNK_ROWS, rows - start)
+        walk = walk_start + np.cumsum(rng.normal(size=size))
+        walk_start = walk[-1]
+        columns = {'c0': walk, 'c1': (walk * 10 + rng.normal(scale=50, size=size)).astype(np.int64)}
+        for index in range(2, n_columns):
+            if kind == 'mixed' and index % 3 == 2:
+                columns[f'c{index}'] = labels[rng.integers(0, len(labels), size)]
+            elif index % 2:
+                columns[f'c{index}'] = rng.integers(-1000, 1000, size)
+            else:
+                columns[f'c{index}'] = rng.random(size)
+        pd.DataFrame(columns).to_csv(staging, mode='w' if start == 0 else 'a', header=start == 0,
+                                     index=False, float_format='%.6g')
+    os.replace(staging, path)
+
+
+def dataset_name(scale, shape, kind):
+    return f'{kind}-{shape}-{scale}'
+
+
+def measure(func, repeat=3, memory=True):
+    """
+    Times func and measures its peak memory.
+
+    Parameters:
+    -----------
+    func : callable
+        Runs the case once. Called repeat times, plus once more if memory is True.
+    repeat : int, optional
+        Number of timed runs. A case slower than 10 seconds is only timed once. Default is 3.
+    memory : bool, optional
+        Measure the peak memory allocated during one run. Default is True.
+
+    Returns:
+    --------
+    dict:
+        'seconds' (fastest run), 'median_seconds', 'runs' and 'peak_mb' (None without memory).
+    """
+    times = []
+    while len(times) < repeat:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+        if times[0] > 10:
+            break
+
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        peak_mb = peak / 1024 ** 2
+    return {'seconds': min(times), 'median_seconds': statistics.median(times), 'runs': len(times),
+            'peak_mb': peak_mb}
+
+
+def benchmark_startup(repeat=5):
+    """
+    Measures the time of 'import csvReader' in fresh interpreters.
+
+    Returns:
+    --------
+    dict:
+        The measurement, with 'budget_seconds' and 'heavy_modules', the heavy modules that were imported.
+    """
+    code = ("import sys, time; start = time.perf_counter(); import csvReader; "
+            "print(time.perf_counter() - start); "
+            "print(','.join(m for m in ('pandas', 'numpy', 'matplotlib', 'prettytable') if m in sys.modules))")
+    directory = os.path.dirname(os.path.abspath(__file__))
+    times = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], cwd=directory, capture_output=True, text=True,
+                                check=True).stdout.splitlines()
+        times.append(float(output[0]))
+    heavy_modules = [module for module in output[1].split(',') if module]
+    return {'dataset': '-', 'case': 'import', 'seconds': min(times), 'median_seconds': statistics.median(times),
+            'runs': len(times), 'peak_mb': None, 'budget_seconds': STARTUP_BUDGET_S, 'heavy_modules': heavy_modules}
+
+
+def _render(func):
+    # plt.show() does nothing on Agg, drawing the canvas is what an interactive window would do
+    with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        plt.figure()
+        try:
+            func()
+            plt.gcf().canvas.draw()
+        finally:
+            plt.close('all')
+
+
+def _save(func):
+    # the save functions draw onto a figure of their own and close it once the file is written
+    with contextlib.redirect_stdout(io.StringIO()) as messages, warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            saved = func()
+        finally:
+            plt.close('all')
+    message = messages.getvalue().strip()
+    if not saved:
+        raise RuntimeError(message.splitlines()[-1] if message else "the plot was not saved")
+
+
+def benchmark_dataset(name, path, rows, repeat=3, memory=True, work_dir='.'):
+    """
+    Runs every case on one synthetic file.
+
+    Every plot type of plot_column and plot_versus is shown, and saved in every format, from each kind of
+    dataset the file fits: a DataFrame up to IN_MEMORY_ROWS rows, a LazyCSV with the plotted columns loaded
+    up to LAZY_ROWS rows, and a ChunkedCSV at any size. The cases of a kind of dataset that is too large
+    are reported as skipped.
+
+    Parameters:
+    -----------
+    name : str
+        Name of the dataset in the results.
+    path : str
+        Path to the CSV file.
+    rows : int
+        Number of data rows of the file.
+    repeat : int, optional
+        Number of timed runs per case. Default is 3.
+    memory : bool, optional
+        Measure the peak memory of every case. Default is True.
+    work_dir : str, optional
+        Directory for the column cache and saved plots. Default is the current directory.
+
+    Returns:
+    --------
+    list of dict:
+        One result per case.
+    """
+    results = []
+
+    def add(case, func, **extra):
+        try:
+            result = measure(func, repeat, memory)
+        except Exception as error:
+            result = {'seconds': None, 'error': f'{type(error).__name__}: {error}'}
+        results.append({'dataset': name, 'case': case, 'rows': rows, **result, **extra})
+
+    def skip(case, limit):
+        results.append({'dataset': name, 'case': case, 'rows': rows, 'seconds': None,
+                        'skipped': f'more than {limit} rows'})
+
+    cache_dir = os.path.join(work_dir, 'cache')
+
+    def load(cache_dir, column_names=None):
+        lazy = LazyCSV(path, csvReader(cache_dir=cache_dir).cache, max_columns=max(SHAPES.values()))
+        lazy.load_columns(column_names or list(lazy.columns))
+        return lazy
+
+    add('open', lambda: LazyCSV(path))
+    if rows <= IN_MEMORY_ROWS:
+        add('load', lambda: load(None))
+        load(cache_dir)
+        add('load_cached', lambda: load(cache_dir))
+    else:
+        skip('load', IN_MEMORY_ROWS)
+        skip('load_cached', IN_MEMORY_ROWS)
+    if rows <= LAZY_ROWS:
+        add('load_plotted', lambda: load(None, ['c0', 'c1']))
+    else:
+        skip('load_plotted', LAZY_ROWS)
+
+    def stream():
+        for _ in ChunkedCSV(path, memory_limit_mb=64).iter_chunks(usecols=['c0', 'c1']):
+            pass
+
+    add('stream', stream)
+
+    datasets = {}
+    if rows <= IN_MEMORY_ROWS:
+        datasets['frame'] = pd.read_csv(path)
+    else:
+        skip('frame', IN_MEMORY_ROWS)
+    if rows <= LAZY_ROWS:
+        # the columns are loaded before the plots are timed, load_plotted times loading them
+        datasets['lazy'] = load(None, ['c0', 'c1'])
+    else:
+        skip('lazy', LAZY_ROWS)
+    datasets['stream'] = ChunkedCSV(path, memory_limit_mb=64)
+
+    for source, df in datasets.items():
+        for plot_type in COLUMN_PLOT_TYPES:
+            add(f'{source}:plot_column:{plot_type}',
+                lambda: _render(lambda: csvReader(cache_dir=None).plot_column(df, [0], plot_type)))
+            for doc_type in SAVE_FORMATS:
+                doc_title = os.path.join(work_dir, f'plot.{doc_type}')
+                add(f'{source}:save_plot_column:{plot_type}:{doc_type}',
+                    lambda: _save(lambda: csvReader(cache_dir=None).save_plot_column(df, [0], plot_type, '',
+                                                                                      doc_type, doc_title)))
+        for plot_type in VERSUS_PLOT_TYPES:
+            add(f'{source}:plot_versus:{plot_type}',
+                lambda: _render(lambda: csvReader(cache_dir=None).plot_versus(df, 0, 1, plot_type)))
+            for doc_type in SAVE_FORMATS:
+                doc_title = os.path.join(work_dir, f'plot.{doc_type}')
+                add(f'{source}:save_plot_versus:{plot_type}:{doc_type}',
+                    lambda: _save(lambda: csvReader(cache_dir=None).save_plot_versus(df, 0, 1, plot_type, '',
+                                                                                      doc_type, doc_title)))
+    return results
+
+
+def run_benchmarks(scales=('1e3', '1e4', '1e5'), shapes=tuple(SHAPES), kinds=KINDS, repeat=3, memory=True,
+                   data_dir=None):
+    """
+    Generates the synthetic files that are missing and benchmarks every one of them.
+
+    Parameters:
+    -----------
+    scales : list of str, optional
+        Row counts, keys of SCALES. Default is 1e3, 1e4 and 1e5.
+    shapes : list of str, optional
+        Keys of SHAPES. Default is both.
+    kinds : list of str, optional
+        'numeric', 'mixed' or both. Default is both.
+    repeat : int, optional
+        Number of timed runs per case. Default is 3.
+    memory : bool, optional
+        Measure the peak memory of every case. Default is True.
+    data_dir : str, optional
+        Directory the synthetic files are kept in, so later runs reuse them. Default is a temporary directory.
+
+    Returns:
+    --------
+    dict:
+        'meta' with the versions and machine the results were measured with, and the list of 'results'.
+    """
+    temporary = data_dir is None
+    data_dir = tempfile.mkdtemp(prefix='csvReader-bench-') if temporary else data_dir
+    os.makedirs(data_dir, exist_ok=True)
+    results = [benchmark_startup()]
+    try:
+        for scale in scales:
+            for shape in shapes:
+                for kind in kinds:
+                    name = dataset_name(scale, shape, kind)
+                    path = os.path.join(data_dir, f'{name}.csv')
+                    if not os.path.exists(path):
+                        p().print(f"Generating {name}", 'cyan')
+                        generate_csv(path, SCALES[scale], SHAPES[shape], kind)
+                    p().print(f"Benchmarking {name}", 'cyan')
+                    work_dir = tempfile.mkdtemp(prefix='work-', dir=data_dir)
+                    try:
+                        results += benchmark_dataset(name, path, SCALES[scale], repeat, memory, work_dir)
+                    finally:
+                        shutil.rmtree(work_dir, ignore_errors=True)
+    finally:
+        if temporary:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    meta = {'python': platform.python_version(), 'pandas': pd.__version__, 'numpy': np.__version__,
+            'matplotlib': matplotlib.__version__, 'machine': platform.machine(), 'system': platform.system(),
+            'cpus': os.cpu_count(), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+    return {'meta': meta, 'results': results}
+
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compares results against a baseline run.
+
+    A case regresses when it is more than tolerance slower, or uses more than tolerance more peak
+    memory, than in the baseline, and the difference is above the noise floor. The import case also
+    fails when it exceeds its budget or imports a heavy module, with or without a baseline.
+
+    Parameters:
+    -----------
+    results : dict
+        Output of run_benchmarks.
+    baseline : dict or None
+        Output of an earlier run_benchmarks.
+    tolerance : float, optional
+        Allowed relative slowdown, 0.25 is 25 percent. Default is 0.25.
+
+    Returns:
+    --------
+    list of dict:
+        One row per case, with the baseline values and a 'status' of 'ok', 'regression', 'improvement', 'new',
+        'skipped', 'error' or 'over budget'.
+    """
+    previous = {(result['dataset'], result['case']): result for result in (baseline or {}).get('results', [])}
+    rows = []
+    for result in results['results']:
+        base = previous.get((result['dataset'], result['case']), {})
+        row = {'dataset': result['dataset'], 'case': result['case'], 'seconds': result['seconds'],
+               'baseline_seconds': base.get('seconds'), 'peak_mb': result.get('peak_mb'),
+               'baseline_peak_mb': base.get('peak_mb')}
+        seconds, base_seconds = result['seconds'], base.get('seconds')
+        peak, base_peak = result.get('peak_mb'), base.get('peak_mb')
+        if 'error' in result:
+            row['status'] = 'error'
+        elif 'skipped' in result:
+            row['status'] = 'skipped'
+        elif 'budget_seconds' in result and (seconds > result['budget_seconds'] or result['heavy_modules']):
+            row['status'] = 'over budget'
+        elif base_seconds is None:
+            row['status'] = 'new'
+        elif (seconds > base_seconds * (1 + tolerance) and seconds - base_seconds > MIN_DELTA_S) or \
+                (peak is not None and base_peak is not None and
+                 peak > base_peak * (1 + tolerance) and peak - base_peak > MIN_DELTA_MB):
+            row['status'] = 'regression'
+        elif seconds < base_seconds / (1 + tolerance) and base_seconds - seconds > MIN_DELTA_S:
+            row['status'] = 'improvement'
+        else:
+            row['status'] = 'ok'
+        rows.append(row)
+    return rows
+
+
+def print_comparison(rows):
+    from prettytable import PrettyTable
+
+    def format_value(value, digits):
+        return '' if value is None else f'{value:.{digits}f}'
+
+    table = PrettyTable()
+    table.field_names = ['Dataset', 'Case', 'Seconds', 'Baseline', 'Peak MB', 'Baseline MB', 'Status']
+    for row in rows:
+        table.add_row([row['dataset'], row['case'], format_value(row['seconds'], 4),
+                       format_value(row['baseline_seconds'], 4), format_value(row['peak_mb'], 1),
+                       format_value(row['baseline_peak_mb'], 1), row['status']])
+    table.align['Case'] = 'l'
+    print(table)
+
+    colors = {'regression': 'red', 'over budget': 'red', 'error': 'red', 'improvement': 'green'}
+    for row in rows:
+        if row['status'] in colors:
+            p().print(f"{row['status']}: {row['dataset']} {row['case']}", colors[row['status']])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading, plotting and saving on synthetic CSV files.")
+    parser.add_argument('--scales', nargs='+', default=['1e3', '1e4', '1e5'], choices=list(SCALES),
+                        help="row counts to benchmark (default: 1e3 1e4 1e5)")
+    parser.add_argument('--shapes', nargs='+', default=list(SHAPES), choices=list(SHAPES))
+    parser.add_argument('--kinds', nargs='+', default=list(KINDS), choices=list(KINDS))
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case (default: 3)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the peak memory measurements")
+    parser.add_argument('--data-dir', help="keep the generated files here and reuse them in later runs")
+    parser.add_argument('--output', default='benchmark_results.json', help="where to write the results")
+    parser.add_argument('--baseline', default='benchmark_baseline.json', help="results to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed relative slowdown (default: 0.25)")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.scales, args.shapes, args.kinds, args.repeat, not args.no_memory, args.data_dir)
+    with open(args.output, 'w') as output_file:
+        json.dump(results, output_file, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    rows = compare(results, baseline, args.tolerance)
+    print_comparison(rows)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    failed = [row for row in rows if row['status'] in ('regression', 'over budget', 'error')]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+from csvFormat import ParseOptions
+
+
+class ChunkedCSV():
+    """
+    Streams a CSV file as a sequence of fixed size pandas DataFrame chunks.
+
+    Only the header and a small sample of rows are read when the object is created, so
+    files far larger than the available memory can be handed to the plotting functions
+    of csvReader, which consume the chunks through incremental aggregations.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the plain or compressed CSV file. Compressed files are decompressed as they are streamed.
+    chunk_size : int, optional
+        Number of rows per chunk. If not provided it is derived from memory_limit_mb.
+    memory_limit_mb : float, optional
+        Memory ceiling for a single chunk in megabytes. Default is 256.
+    options : ParseOptions, optional
+        Parser options. Chunks are always parsed by the C or python engine. Default is the C engine without date parsing.
+    row_filter : str or RowFilter, optional
+        Keep only the rows that meet this pandas query expression, e.g. "Delay > 3.5". The filter is applied
+        to every chunk as it is read, so rejected rows are never kept. Default is all rows.
+
+    Example:
+    --------
+    >>> chunks = ChunkedCSV('bestSynths.csv', memory_limit_mb=64)
+    >>> for chunk in chunks:
+    ...     print(len(chunk))
+    """
+
+    SAMPLE_ROWS = 1000
+    # parsing a chunk briefly holds the raw text, the parsed columns and the final frame
+    PARSE_OVERHEAD = 4
+
+    def __init__(self, path, chunk_size=None, memory_limit_mb=256, options=None, row_filter=None):
+        self.path = path
+        self.options = options or ParseOptions()
+        sample = self.options.read_csv(path, nrows=self.SAMPLE_ROWS)
+        self.columns = sample.columns
+        # inferred from the sample, later chunks can still parse to wider dtypes, e.g. int -> float
+        self.dtypes = sample.dtypes
+        if isinstance(row_filter, str):
+            from rowFilter import RowFilter
+            row_filter = RowFilter(row_filter)
+        if row_filter is not None and not row_filter.columns_in(self.columns):
+            raise ValueError(f"The filter {row_filter.expression!r} uses none of the columns of {path}.")
+        self.row_filter = row_filter
+        if chunk_size:
+            self.chunk_size = int(chunk_size)
+        else:
+            self.chunk_size = self.estimate_chunk_size(memory_limit_mb, sample)
+
+    def estimate_chunk_size(self, memory_limit_mb, sample=None):
+        """
+        Estimates how many rows fit into memory_limit_mb by measuring a sample of the file.
+
+        Parameters:
+        -----------
+        memory_limit_mb : float
+            Memory ceiling for a single chunk in megabytes.
+        sample : pandas.DataFrame, optional
+            The first rows of the file, if they have been read already.
+
+        Returns:
+        --------
+        int:
+            Number of rows per chunk, at least 1.
+        """
+        if sample is None:
+            sample = self.options.read_csv(self.path, nrows=self.SAMPLE_ROWS)
+        if len(sample) == 0:
+            return self.SAMPLE_ROWS
+        bytes_per_row = sample.memory_usage(index=True, deep=True).sum() / len(sample)
+        limit_bytes = memory_limit_mb * 1024 * 1024
+        return max(1, int(limit_bytes / (bytes_per_row * self.PARSE_OVERHEAD)))
+
+    def iter_chunks(self, usecols=None):
+        """
+        Yields the file as DataFrames of at most chunk_size rows, keeping only the rows that meet the row filter.
+
+        Parameters:
+        -----------
+        usecols : list, optional
+            Column names to parse. Other columns are skipped by the parser.
+        """
+        if self.row_filter is not None:
+            read_columns = self.row_filter.read_columns(self.columns, usecols)
+            with self.options.read_csv(self.path, usecols=read_columns, chunksize=self.chunk_size) as reader:
+                yield from self.row_filter.filter_chunks(reader, usecols)
+            return
+        with self.options.read_csv(self.path, usecols=usecols, chunksize=self.chunk_size) as reader:
+            for chunk in reader:
+                yield chunk
+
+    def __iter__(self):
+        return self.iter_chunks()
@@ -0,0 +1,343 @@
+import hashlib
+import json
+import os
+import shutil
+
+from csvFormat import ParseOptions
+from profiler import span
+
+
+class ColumnCache():
+    """
+    On-disk binary cache of parsed CSV files, stored as one .npy file per column.
+
+    Each CSV file gets its own entry directory, keyed on a hash of its absolute path. The entry
+    records the size and modification time of the file it was built from, and is rebuilt
+    automatically as soon as either changes. Numeric, boolean and datetime columns are
+    memory-mapped when loaded, so a second load of an unchanged file only opens the files
+    instead of parsing the text again. Text columns are stored as pickled object arrays and
+    read into memory.
+
+    Parameters:
+    -----------
+    cache_dir : str, optional
+        Directory the cache entries are written to. Default is '.csvReader_cache'.
+    options : ParseOptions, optional
+        Parser options used to parse files on a miss. Entries parsed with other date options are
+        treated as missing. Default is the C engine without date parsing.
+
+    Example:
+    --------
+    >>> cache = ColumnCache()
+    >>> df = cache.read_csv('bestSynths.csv')   # parses and stores
+    >>> df = cache.read_csv('bestSynths.csv')   # memory-mapped from the cache
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, cache_dir='.csvReader_cache', options=None):
+        self.cache_dir = cache_dir
+        self.options = options or ParseOptions()
+
+    def file_identity(self, path):
+        """
+        Returns:
+        --------
+        dict:
+            Absolute path, size and modification time of the file at path.
+        """
+        stat = os.stat(path)
+        return {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def entry_dir(self, path):
+        key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def read_manifest(self, path):
+        """
+        Returns:
+        --------
+        dict or None:
+            The manifest of the entry for path, or None if there is no entry or the file has changed since it was stored.
+        """
+        try:
+            with open(os.path.join(self.entry_dir(path), self.MANIFEST)) as manifest_file:
+                manifest = json.load(manifest_file)
+        except (OSError, ValueError):
+            return None
+        if manifest['source'] != self.file_identity(path):
+            return None
+        # entries written before parse options existed were parsed with the defaults
+        if manifest.get('parse', ParseOptions().signature()) != self.options.signature():
+            return None
+        # entries written before partial entries existed always hold every column
+        manifest.setdefault('header', [column['name'] for column in manifest['columns']])
+        return manifest
+
+    def _load_column(self, entry, column):
+        import numpy as np
+        column_path = os.path.join(entry, column['file'])
+        if column['pickled']:
+            return np.load(column_path, allow_pickle=True)
+        return np.load(column_path, mmap_mode='r')
+
+    def load(self, path):
+        """
+        Loads the cached DataFrame for path.
+
+        Returns:
+        --------
+        pandas.DataFrame or None:
+            The cached data, or None if there is no entry, the entry only holds some of the columns
+            or the file has changed since it was stored.
+        """
+        import pandas as pd
+        manifest = self.read_manifest(path)
+        if manifest is None or len(manifest['columns']) < len(manifest['header']):
+            return None
+
+        entry = self.entry_dir(path)
+        columns = {column['name']: self._load_column(entry, column) for column in manifest['columns']}
+        # copy=False keeps the memory-mapped arrays instead of consolidating them into new blocks
+        return pd.DataFrame(columns, columns=manifest['header'], copy=False)
+
+    def describe(self, path):
+        """
+        Returns the number of rows and the column names of the cached file, without loading its columns.
+
+        Returns:
+        --------
+        tuple or None:
+            (rows, column names), or None if there is no complete entry for the current file.
+        """
+        import numpy as np
+        manifest = self.read_manifest(path)
+        if manifest is None or len(manifest['columns']) < len(manifest['header']):
+            return None
+        rows = manifest.get('rows')
+        if rows is None:
+            # entries written before the row count was recorded, the header of a memory-mapped column has it
+            entry = self.entry_dir(path)
+            mapped = [column for column in manifest['columns'] if not column['pickled']]
+            if not mapped:
+                return None
+            rows = len(np.load(os.path.join(entry, mapped[0]['file']), mmap_mode='r'))
+        return rows, manifest['header']
+
+    def load_columns(self, path, column_names):
+        """
+        Loads the cached columns of path that are among column_names.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file.
+        column_names : list of str
+            The columns wanted.
+
+        Returns:
+        --------
+        dict:
+            Column name -> array for every wanted column in the cache. Empty if the file has changed.
+        """
+        manifest = self.read_manifest(path)
+        if manifest is None:
+            return {}
+        entry = self.entry_dir(path)
+        return {column['name']: self._load_column(entry, column) for column in manifest['columns']
+                if column['name'] in column_names}
+
+    def _save_columns(self, entry, df, header):
+        import numpy as np
+        columns = []
+        for column_name in df.columns:
+            values = df[column_name].to_numpy()
+            pickled = values.dtype.hasobject
+            file_name = f'col_{header.index(column_name)}.npy'
+            np.save(os.path.join(entry, file_name), values, allow_pickle=pickled)
+            columns.append({'name': column_name, 'file': file_name, 'pickled': pickled})
+        return columns
+
+    def store(self, path, df, header=None):
+        """
+        Writes the columns of df to a new cache entry for path, replacing any previous entry.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file.
+        df : pandas.DataFrame
+            All columns of the file, or only some of them if header is given.
+        header : list of str, optional
+            All column names of the file. Default is the columns of df.
+        """
+        header = list(df.columns) if header is None else list(header)
+        entry = self.entry_dir(path)
+        staging = f'{entry}.tmp-{os.getpid()}'
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        identity = self.file_identity(path)
+        columns = self._save_columns(staging, df, header)
+
+        # the manifest is written last so a half written entry is never loaded
+        with open(os.path.join(staging, self.MANIFEST), 'w') as manifest_file:
+            json.dump({'source': identity, 'parse': self.options.signature(), 'header': header,
+                       'rows': len(df), 'columns': columns}, manifest_file)
+
+        shutil.rmtree(entry, ignore_errors=True)
+        os.rename(staging, entry)
+
+    def store_columns(self, path, df, header):
+        """
+        Adds the columns of df to the cache entry for path, so they can be loaded without parsing next time.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file.
+        df : pandas.DataFrame
+            Some of the columns of the file.
+        header : list of str
+            All column names of the file.
+        """
+        manifest = self.read_manifest(path)
+        if manifest is None:
+            self.store(path, df, header)
+            return
+
+        entry = self.entry_dir(path)
+        cached = {column['name'] for column in manifest['columns']}
+        new_columns = [column_name for column_name in df.columns if column_name not in cached]
+        manifest['columns'] += self._save_columns(entry, df[new_columns], manifest['header'])
+        staging = os.path.join(entry, f'{self.MANIFEST}.tmp-{os.getpid()}')
+        with open(staging, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(staging, os.path.join(entry, self.MANIFEST))
+
+    def load_index(self, path, column_name):
+        """
+        Loads the range index of a cached column.
+
+        Returns:
+        --------
+        ZoneMap or None:
+            The index, or None if the column has no index or the file has changed since it was built.
+        """
+        import numpy as np
+        from rowFilter import ZoneMap
+        manifest = self.read_manifest(path)
+        if manifest is None or column_name not in manifest.get('indexes', {}):
+            return None
+        index = manifest['indexes'][column_name]
+        try:
+            with np.load(os.path.join(self.entry_dir(path), index['file'])) as arrays:
+                return ZoneMap.from_dict(index, arrays['mins'], arrays['maxs'])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def store_index(self, path, column_name, zone_map):
+        """
+        Adds the range index of a column to the cache entry for path. Rebuilding the entry drops its indexes.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file, which must have a cache entry.
+        column_name : str
+            The indexed column.
+        zone_map : ZoneMap
+            The index.
+        """
+        import numpy as np
+        manifest = self.read_manifest(path)
+        if manifest is None:
+            return
+        entry = self.entry_dir(path)
+        file_name = f'index_{manifest["header"].index(column_name)}.npz'
+        with open(os.path.join(entry, file_name), 'wb') as index_file:
+            np.savez(index_file, mins=zone_map.mins, maxs=zone_map.maxs)
+        manifest.setdefault('indexes', {})[column_name] = dict(zone_map.to_dict(), file=file_name)
+        staging = os.path.join(entry, f'{self.MANIFEST}.tmp-{os.getpid()}')
+        with open(staging, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        os.replace(staging, os.path.join(entry, self.MANIFEST))
+
+    def stats_path(self, path):
+        return f'{self.entry_dir(path)}.stats.json'
+
+    def load_stats(self, path, identity=None):
+        """
+        Loads the column statistics sidecar for path.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file.
+        identity : dict, optional
+            The file identity the statistics must have been computed from. Default is the current identity of the file.
+
+        Returns:
+        --------
+        dict or None:
+            Column name -> ColumnStats, or None if there is no sidecar or the file has changed since it was written.
+        """
+        from columnStats import ColumnStats
+        try:
+            with open(self.stats_path(path)) as stats_file:
+                sidecar = json.load(stats_file)
+        except (OSError, ValueError):
+            return None
+        if sidecar['source'] != (identity or self.file_identity(path)):
+            return None
+        if sidecar.get('parse', ParseOptions().signature()) != self.options.signature():
+            return None
+        return {column['name']: ColumnStats.from_dict(column['stats']) for column in sidecar['columns']}
+
+    def store_stats(self, path, stats, identity=None):
+        """
+        Writes the column statistics sidecar for path.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file the statistics were computed from.
+        stats : dict
+            Column name -> ColumnStats.
+        identity : dict, optional
+            The file identity the statistics were computed from. Default is the current identity of the file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = f'{self.stats_path(path)}.tmp-{os.getpid()}'
+        with open(staging, 'w') as stats_file:
+            json.dump({'source': identity or self.file_identity(path), 'parse': self.options.signature(),
+                       'columns': [{'name': name, 'stats': column.to_dict()} for name, column in stats.items()]},
+                      stats_file)
+        os.replace(staging, self.stats_path(path))
+
+    def read_csv(self, path):
+        """
+        Returns the DataFrame for path from the cache, parsing and caching the file on a miss.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the CSV file.
+
+        Returns:
+        --------
+        pandas.DataFrame:
+            The data contained in the CSV file.
+        """
+        with span('cache load'):
+            df = self.load(path)
+        if df is not None:
+            return df
+
+        with span('parse columns'):
+            df = self.options.read_csv(path)
+        try:
+            with span('cache store'):
+                self.store(path, df)
+        except OSError as error:
+            print(f"Could not write the cache for {path}: {error}")
+        return df
@@ -0,0 +1,142 @@
+"""
+Per-column summary statistics with a fixed-bin histogram sketch.
+
+The statistics are computed in two passes over the data, one for the count, nulls, range and
+sum, and one for the histogram counts over the now known range. Both passes work chunk by
+chunk, so they can be built for streamed files as well as for DataFrames. A quantile sketch
+of the column is added on demand, the first time a box plot of a streamed file needs it, and
+kept with the statistics from then on.
+"""
+
+import numpy as np
+
+# matches the default number of bins of pandas histograms
+HIST_BINS = 10
+
+
+def _kind(dtype_name):
+    # pandas extension dtypes such as 'category' are not numpy dtypes
+    try:
+        return np.dtype(dtype_name).kind
+    except TypeError:
+        return 'O'
+
+
+class ColumnStats():
+    """
+    Summary of a single column: dtype, count, null count, min, max, mean, histogram and quantile sketch.
+
+    Parameters:
+    -----------
+    dtype : str
+        The dtype of the column as reported by pandas.
+    """
+
+    def __init__(self, dtype):
+        self.dtype = dtype
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.total = 0.0
+        self.edges = None
+        self.counts = None
+        # streamStats.QuantileSketch of the values, None until a box plot needs it
+        self.sketch = None
+
+    @property
+    def numeric(self):
+        return _kind(self.dtype) in 'iufb'
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.numeric and self.count else None
+
+    def update_summary(self, series):
+        """
+        First pass: counts, nulls, range and sum of a chunk of the column.
+        """
+        # a column can parse as int in one chunk and as float or text in another
+        if series.dtype.name != self.dtype:
+            kinds = {_kind(self.dtype), _kind(series.dtype.name)}
+            self.dtype = 'float64' if kinds <= set('iuf') else 'object'
+        nulls = int(series.isna().sum())
+        self.nulls += nulls
+        self.count += len(series) - nulls
+        if not self.numeric:
+            return
+
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.min = float(values.min()) if self.min is None else min(self.min, float(values.min()))
+            self.max = float(values.max()) if self.max is None else max(self.max, float(values.max()))
+            self.total += float(values.sum())
+
+    def update_histogram(self, series):
+        """
+        Second pass: histogram counts of a chunk of the column over the range found by the first pass.
+        """
+        if not self.numeric or self.min is None:
+            return
+        if self.edges is None:
+            low, high = self.min, self.max
+            if low == high:
+                low, high = low - 0.5, high + 0.5
+            self.edges = np.linspace(low, high, HIST_BINS + 1)
+            self.counts = np.zeros(HIST_BINS, dtype=np.int64)
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        counts, _ = np.histogram(values[~np.isnan(values)], bins=self.edges)
+        self.counts += counts
+
+    def to_dict(self):
+        return {'dtype': self.dtype, 'count': self.count, 'nulls': self.nulls, 'min': self.min,
+                'max': self.max, 'total': self.total,
+                'edges': None if self.edges is None else self.edges.tolist(),
+                'counts': None if self.counts is None else self.counts.tolist(),
+                'sketch': None if self.sketch is None else self.sketch.to_dict()}
+
+    @classmethod
+    def from_dict(cls, values):
+        stats = cls(values['dtype'])
+        stats.count = values['count']
+        stats.nulls = values['nulls']
+        stats.min = values['min']
+        stats.max = values['max']
+        stats.total = values['total']
+        if values['edges'] is not None:
+            stats.edges = np.array(values['edges'])
+            stats.counts = np.array(values['counts'], dtype=np.int64)
+        # sidecars written before sketches existed have none
+        if values.get('sketch') is not None:
+            from streamStats import QuantileSketch
+            stats.sketch = QuantileSketch.from_dict(values['sketch'])
+        return stats
+
+
+def build_stats(chunks, column_names):
+    """
+    Computes the statistics of column_names over a sequence of DataFrame chunks.
+
+    Parameters:
+    -----------
+    chunks : callable
+        Returns a new iterable of DataFrame chunks on every call. Called twice, once per pass.
+    column_names : list of str
+        The columns to summarize.
+
+    Returns:
+    --------
+    dict:
+        Column name -> ColumnStats.
+    """
+    stats = {}
+    for chunk in chunks():
+        for column_name in column_names:
+            if column_name not in stats:
+                stats[column_name] = ColumnStats(chunk[column_name].dtype.name)
+            stats[column_name].update_summary(chunk[column_name])
+    for chunk in chunks():
+        for column_name in column_names:
+            stats[column_name].update_histogram(chunk[column_name])
+    return stats
@@ -0,0 +1,61 @@
+"""
+Memory compaction of parsed columns.
+
+pandas parses every integer column as int64, every float column as float64 and every text column
+as an object array of Python strings. compact_series downcasts each to the smallest dtype that still
+holds every value exactly.
+"""
+
+import numpy as np
+import pandas as pd
+
+# text columns with at most this share of distinct values become categoricals
+CATEGORY_RATIO = 0.5
+
+
+def compact_series(series, category_ratio=CATEGORY_RATIO):
+    """
+    Returns series with the smallest dtype that represents every value exactly.
+
+    Integers are downcast to the smallest signed or unsigned width that fits their range. Floats
+    become float32 only if every value survives the round trip unchanged. Text columns with few
+    distinct values become categoricals.
+
+    Parameters:
+    -----------
+    series : pandas.Series
+        The column to compact.
+    category_ratio : float, optional
+        Largest ratio of distinct values to rows for a text column to become a categorical. Default is 0.5.
+
+    Returns:
+    --------
+    pandas.Series:
+        The compacted column, or series itself if it cannot be made smaller.
+    """
+    kind = series.dtype.kind
+    if len(series) == 0:
+        return series
+
+    if kind in 'iu':
+        downcast = 'unsigned' if series.min() >= 0 else 'integer'
+        return pd.to_numeric(series, downcast=downcast)
+
+    if kind == 'f' and series.dtype.itemsize > 4:
+        values = series.to_numpy()
+        narrow = values.astype(np.float32)
+        with np.errstate(over='ignore'):
+            exact = np.array_equal(narrow.astype(values.dtype), values, equal_nan=True)
+        return series.astype(np.float32) if exact else series
+
+    if kind == 'O' and series.nunique(dropna=False) <= len(series) * category_ratio:
+        return series.astype('category')
+
+    return series
+
+
+def memory_bytes(series):
+    """
+    Returns the memory used by the values of series, including the Python objects of text columns.
+    """
+    return int(series.memory_usage(index=False, deep=True))
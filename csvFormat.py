@@ -0,0 +1,172 @@
+"""
+File formats and parser options for reading CSV files.
+
+Compressed CSV files are decompressed by pandas while they are parsed, in whole or chunk by
+chunk, so archives never have to be unpacked to disk first. Plain files are memory-mapped by
+the C parser instead of being read through a file buffer.
+"""
+
+import os
+
+COMPRESSED_EXTENSIONS = ('.gz', '.bz2', '.xz', '.zst', '.zip')
+# pandas compression method of every extension, for reading from an open file
+COMPRESSION_METHODS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz', '.zst': 'zstd', '.zip': 'zip'}
+CSV_EXTENSIONS = ('.csv',) + tuple('.csv' + extension for extension in COMPRESSED_EXTENSIONS)
+ENGINES = ('c', 'pyarrow', 'python')
+# rows per chunk of a read that reports its progress
+PROGRESS_CHUNK_ROWS = 100000
+
+
+def is_csv_file(path):
+    """
+    Returns True if path names a plain or compressed CSV file, judged by its extension.
+    """
+    return path.lower().endswith(CSV_EXTENSIONS)
+
+
+def is_compressed(path):
+    return path.lower().endswith(COMPRESSED_EXTENSIONS)
+
+
+class ParseOptions():
+    """
+    Parser backend and date parsing used for every read of a CSV file.
+
+    The pyarrow engine parses with one thread per core, but it cannot read a file in chunks or
+    read only its first rows, so chunked and sample reads fall back to the C engine. Giving
+    date_format parses the date columns with one fixed format instead of inferring the format
+    of every value.
+
+    Parameters:
+    -----------
+    engine : str, optional
+        The pandas parser engine ('c', 'pyarrow' or 'python'). Default is 'c'.
+    date_columns : list of str, optional
+        Columns to parse as dates. Files without some of these columns are read without them.
+    date_format : str, optional
+        strftime format of the date columns, e.g. '%Y-%m-%d %H:%M:%S'. Default is to infer it.
+
+    Example:
+    --------
+    >>> options = ParseOptions('pyarrow', date_columns=['Time'], date_format='%Y-%m-%d %H:%M:%S')
+    >>> df = options.read_csv('log.csv.gz')
+    """
+
+    def __init__(self, engine='c', date_columns=None, date_format=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown parser engine {engine}, choose one of {', '.join(ENGINES)}.")
+        if engine == 'pyarrow':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("pyarrow is required for the pyarrow parser engine, install it or use the c engine.")
+        self.engine = engine
+        self.date_columns = list(date_columns or [])
+        self.date_format = date_format
+
+    def signature(self):
+        """
+        Returns:
+        --------
+        dict:
+            The options that change the parsed values, to tell apart data cached with other options. The
+            engines infer dtypes differently, so the engine is part of it.
+        """
+        return {'engine': self.engine, 'date_columns': self.date_columns, 'date_format': self.date_format}
+
+    def read_csv(self, path, usecols=None, chunksize=None, nrows=None, progress=None):
+        """
+        Reads path with pandas.read_csv using these options.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the plain or compressed CSV file. The compression is inferred from the extension.
+        usecols : list, optional
+            Column names to parse. Other columns are skipped by the parser.
+        chunksize : int, optional
+            Return a reader that yields DataFrames of this many rows instead of one DataFrame.
+        nrows : int, optional
+            Number of rows to read from the start of the file.
+        progress : backgroundTask.Progress, optional
+            Report the bytes and rows read so far, see read_with_progress. With chunksize, a generator of
+            the chunks is returned instead of a reader.
+
+        Returns:
+        --------
+        pandas.DataFrame, pandas.io.parsers.TextFileReader or generator:
+            The data, or the chunks if chunksize is given.
+        """
+        import pandas as pd
+        engine = self.engine
+        if engine == 'pyarrow' and (chunksize is not None or nrows is not None):
+            engine = 'c'
+        kwargs = {'usecols': usecols, 'chunksize': chunksize, 'nrows': nrows, 'engine': engine}
+        if engine == 'c' and not is_compressed(path) and os.path.isfile(path):
+            kwargs['memory_map'] = True
+
+        if self.date_columns and nrows != 0:
+            columns = usecols if usecols is not None else pd.read_csv(path, nrows=0).columns
+            date_columns = [column_name for column_name in self.date_columns if column_name in columns]
+            if date_columns:
+                kwargs['parse_dates'] = date_columns
+                if self.date_format:
+                    kwargs['date_format'] = self.date_format
+        if progress is not None and nrows is None:
+            if chunksize is not None:
+                return self.chunks_with_progress(path, kwargs, progress)
+            return self.read_with_progress(path, kwargs, progress)
+        return pd.read_csv(path, **kwargs)
+
+    def read_with_progress(self, path, kwargs, progress):
+        """
+        Reads the whole file in chunks, reporting the position in the file after every chunk.
+
+        The file is opened here and decompressed by pandas, so the position is the number of compressed
+        bytes consumed and the time left is estimated from the size of the file on disk. Reporting raises
+        Cancelled once the read is cancelled, so a cancelled read stops within one chunk. The pyarrow engine
+        cannot read in chunks, so it reads the whole file at once and reports it when done, and a cancelled
+        read stops once the file has been read.
+
+        Parameters:
+        -----------
+        path : str
+            Path to the plain or compressed CSV file.
+        kwargs : dict
+            Keyword arguments for pandas.read_csv.
+        progress : backgroundTask.Progress
+            Where the progress is reported.
+
+        Returns:
+        --------
+        pandas.DataFrame:
+            The data.
+        """
+        import pandas as pd
+        if kwargs['engine'] == 'pyarrow':
+            progress.total_bytes = os.path.getsize(path)
+            progress.check()
+            df = pd.read_csv(path, **kwargs)
+            progress.update(progress.total_bytes, len(df))
+            return df
+        chunks = list(self.chunks_with_progress(path, dict(kwargs, chunksize=PROGRESS_CHUNK_ROWS), progress))
+        if not chunks:
+            return pd.read_csv(path, **dict(kwargs, chunksize=None))
+        return pd.concat(chunks, ignore_index=True)
+
+    def chunks_with_progress(self, path, kwargs, progress):
+        """
+        Yields the file in chunks of kwargs['chunksize'] rows, reporting the position in the file after every chunk.
+
+        Like other chunked reads, the chunks are parsed with the c engine if the engine is pyarrow.
+        """
+        import pandas as pd
+        kwargs = dict(kwargs, engine='c' if kwargs['engine'] == 'pyarrow' else kwargs['engine'])
+        kwargs.pop('memory_map', None)
+        progress.total_bytes = os.path.getsize(path)
+        compression = COMPRESSION_METHODS.get(os.path.splitext(path)[1].lower())
+        with open(path, 'rb') as raw:
+            with pd.read_csv(raw, compression=compression, **kwargs) as reader:
+                for chunk in reader:
+                    progress.update(raw.tell(), len(chunk))
+                    yield chunk
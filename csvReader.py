@@ -12,39 +12,115 @@ Goals of this program
 
 """
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+# pandas, numpy, matplotlib and prettytable take most of a second to import, so they are
+# imported inside the methods that need them and the menu comes up without waiting for them
 from coloredPrinter import ColoredPrinter as p
-from scipy.stats import linregress
-from prettytable import PrettyTable
+from chunkedReader import ChunkedCSV
+from columnCache import ColumnCache
+from csvFormat import ParseOptions, is_compressed, is_csv_file
+from lazyReader import LazyCSV
+from profiler import default_profiler, profiled, span
 from itertools import cycle
+import glob
 import os
+import weakref
+
+# formats written by vector backends, which draw every point of an artist as a separate object
+VECTOR_FORMATS = ('pdf', 'svg', 'svgz', 'eps', 'ps')
+
 
 class csvReader():
 
-    def read_csv_file(self):
+    def __init__(self, chunk_size=None, memory_limit_mb=256, cache_dir='.csvReader_cache', decimation='minmax', density_bins=256,
+                 max_columns=16, engine='c', date_columns=None, date_format=None, profile=False,
+                 profile_memory=True, render_cache_mb=256, rasterize_points=20000, raster_dpi=200):
+        """
+        Parameters:
+        -----------
+        chunk_size : int, optional
+            Number of rows per chunk when a file is streamed. If not provided it is derived from memory_limit_mb.
+        memory_limit_mb : float, optional
+            Memory ceiling for a single chunk in megabytes when a file is streamed. Default is 256.
+        cache_dir : str or None, optional
+            Directory of the binary column cache used to skip parsing files that were loaded before.
+            Set to None to always parse the CSV text. Default is '.csvReader_cache'.
+        decimation : str or None, optional
+            How long line series are reduced to the pixel width of the axes before drawing ('minmax', 'lttb').
+            Large scatter plots are thinned to one point per pixel unless this is None. Set to None for exact
+            rendering of every row. Default is 'minmax'.
+        density_bins : int, optional
+            Number of bins along each axis of the 'density' plot type of plot_versus. Default is 256.
+        max_columns : int, optional
+            Number of columns of a file opened by read_csv_file that are kept in memory. Default is 16.
+        engine : str, optional
+            The pandas parser engine ('c', 'pyarrow' or 'python'). The pyarrow engine parses with every core
+            but needs pyarrow installed. Streamed files are always parsed by the C engine. Default is 'c'.
+        date_columns : list of str, optional
+            Columns to parse as dates.
+        date_format : str, optional
+            strftime format of the date columns, e.g. '%Y-%m-%d'. Parsing with a fixed format is much faster
+            than inferring the format of every value. Default is to infer it.
+        profile : bool, optional
+            Record the time and peak memory of every stage of loading, plotting and saving, see profiler.py.
+            Default is False.
+        profile_memory : bool, optional
+            Record the peak memory of every stage too when profiling. Memory tracking slows rendering down
+            several times, turn it off for accurate times. Default is True.
+        render_cache_mb : float, optional
+            Size of the cache of saved plot files, kept in the 'renders' directory of cache_dir. Saving a plot
+            that was saved before with the same data, columns, plot type, title and format copies the stored file
+            instead of rendering it again. Set to 0 to always render. Default is 256.
+        rasterize_points : int or None, optional
+            Number of points above which an artist is rasterized when a plot is saved as a vector document
+            (pdf, svg, eps, ps), so a dense scatter or line becomes one embedded image instead of a vector object
+            per point. Axes, labels and titles stay vector. Set to None to keep every artist vector. Default is 20000.
+        raster_dpi : float, optional
+            Resolution of the rasterized artists in vector documents. Default is 200.
         """
-        Reads a CSV file chosen by the user from the current directory and returns a pandas DataFrame.
+        if profile:
+            default_profiler.enable(profile_memory)
+        self.chunk_size = chunk_size
+        self.memory_limit_mb = memory_limit_mb
+        self.options = ParseOptions(engine, date_columns, date_format)
+        self.cache = ColumnCache(cache_dir, self.options) if cache_dir else None
+        self.renders = None
+        if cache_dir and render_cache_mb:
+            from renderCache import RenderCache
+            self.renders = RenderCache(os.path.join(cache_dir, 'renders'), int(render_cache_mb * 2**20))
+        self.decimation = decimation
+        self.density_bins = density_bins
+        self.max_columns = max_columns
+        self.rasterize_points = rasterize_points
+        self.raster_dpi = raster_dpi
+        # (lazy dataset or streamed file, x column, y column) -> (dataset identity, RegressionStats)
+        self.regressions = {}
+        # dataset -> (dataset identity, {column name -> ColumnStats})
+        self.stats = {}
+        # (dataset, column names) -> (dataset identity, MultiHistogram)
+        self.histograms = {}
+        # DataFrame dataset -> (CSV file it was read from, identity of the file when it was read)
+        self.sources = {}
+        self.tracked_frames = set()
 
-        Returns:
-        --------
-        pandas.DataFrame or None:
-            If a valid CSV file is selected, the function returns a DataFrame containing the data.
-            If no CSV files are found or the user input is invalid, it returns None.
+    def select_csv_file(self, multiple=False):
+        """
+        Lists the CSV files in the current directory, plain or compressed, and asks the user to choose one.
 
-        Raises:
-        -------
-        ValueError:
-            Raised if the user input for the file index is not a valid integer.
+        Parameters:
+        -----------
+        multiple : bool, optional
+            Let the user choose several files, as comma separated indexes or a glob pattern such as 'data_*.csv'.
+            Default is False.
 
-        Example:
+        Returns:
         --------
-        >>> data_reader = csvReader()
-        >>> df = data_reader.read_csv_file()
+        str, list of str or None:
+            The name of the selected file, or the names of the selected files if multiple is True.
+            None if no CSV files are found or the user input is invalid.
         """
+        from prettytable import PrettyTable
         # Get a list of all CSV files in the current directory
-        csv_files = [file for file in os.listdir() if file.endswith('.csv')]
+        csv_files = [file for file in os.listdir() if is_csv_file(file)]
 
         if not csv_files:
             print("No CSV files found in the current directory.")
@@ -60,15 +136,23 @@ class csvReader():
         print(table)
 
         # Ask the user to choose a file
-        selected_index = input("Enter the index of the CSV file you want to import: ")
+        if not multiple:
+            selected_index = input("Enter the index of the CSV file you want to import: ")
+        else:
+            selected_index = input("Enter the index of the CSV file you want to import "
+                                   "(several indexes separated by commas, or a glob pattern like data_*.csv): ")
+            if any(char in selected_index for char in '*?['):
+                selected_files = sorted(file for file in glob.glob(selected_index.strip()) if os.path.isfile(file))
+                if not selected_files:
+                    print(f"No files match {selected_index.strip()}.")
+                    return None
+                return selected_files
 
         try:
-            selected_index = int(selected_index)
-            if 0 <= selected_index < len(csv_files):
-                selected_file = csv_files[selected_index]
-                df = pd.read_csv(selected_file)
-                print(f"Successfully imported CSV file: {selected_file}")
-                return df
+            selected_indexes = [int(index) for index in selected_index.split(',')] if multiple else [int(selected_index)]
+            if all(0 <= index < len(csv_files) for index in selected_indexes):
+                selected_files = [csv_files[index] for index in selected_indexes]
+                return selected_files if multiple else selected_files[0]
             else:
                 print("Invalid index. Please enter a valid index.")
         except ValueError:
@@ -76,13 +160,281 @@ class csvReader():
 
         return None
 
+    def read_csv_file(self, background=False):
+        """
+        Opens a CSV file chosen by the user from the current directory and returns a lazy dataset handle.
+
+        Only the header and the inferred dtypes are read up front. Each column is loaded the first time a
+        plot function asks for it and kept in a bounded cache, so load time and memory scale with the columns
+        that are actually plotted. Parsed columns are kept in a binary column cache, so using them again in a
+        later session memory-maps the cached column instead of parsing the text. The user can choose to stream
+        the file instead, in which case a ChunkedCSV is returned that reads the file in chunks of bounded memory.
+        Compressed files (.csv.gz, .csv.bz2, .csv.xz, .csv.zst, .csv.zip) are decompressed while they are parsed.
+        Selecting several files, by index or with a glob pattern, loads them in parallel on a worker pool and
+        concatenates them into one DataFrame, with the union of their columns and dtypes widened to fit every file.
+        All plot functions accept either object, as well as a pandas DataFrame.
+
+        Parameters:
+        -----------
+        background : bool, optional
+            Load the files on a background thread after the prompts and return the running task, see
+            load_csv_files. Default is False.
+
+        Returns:
+        --------
+        LazyCSV, ChunkedCSV, pandas.DataFrame, BackgroundTask or None:
+            If a valid CSV file is selected, the function returns a LazyCSV for the file, or a ChunkedCSV
+            if streaming was chosen. If several files are selected, it returns their concatenated DataFrame.
+            In the background, it returns the task that results in one of these. If no CSV files are found
+            or the user input is invalid, it returns None.
+
+        Example:
+        --------
+        >>> data_reader = csvReader()
+        >>> df = data_reader.read_csv_file()
+        """
+        selected_files = self.select_csv_file(multiple=True)
+        if selected_files is None:
+            return None
+        stream = compact = False
+        if len(selected_files) == 1:
+            stream = input("Stream the file in chunks for large files? (y/n, default n): ").lower() == 'y'
+            if not stream:
+                compact = input("Compact column dtypes to save memory? (y/n, default n): ").lower() == 'y'
+        if background:
+            from backgroundTask import BackgroundTask
+            names = ', '.join(os.path.basename(path) for path in selected_files)
+            return BackgroundTask(f"Loading {names}", self.load_csv_files, selected_files, stream, compact)
+        return self.load_csv_files(selected_files, stream, compact)
+
+    def load_csv_files(self, paths, stream=False, compact=False, progress=None):
+        """
+        Opens the chosen CSV files, the part of read_csv_file after the prompts.
+
+        Of a single file only the header and a sample of the rows are read, also when loading in the
+        background. Its columns are still loaded on demand, in the background when a plot is saved from
+        the menu, see start_render. Several files are parsed in full,
+        reporting the bytes read. The load stops at the next chunk when the progress is cancelled.
+
+        Parameters:
+        -----------
+        paths : list of str
+            The CSV files. Several files are loaded in parallel and concatenated.
+        stream : bool, optional
+            Stream a single file in chunks instead of loading its columns. Default is False.
+        compact : bool, optional
+            Compact the column dtypes of a single file to save memory. Default is False.
+        progress : backgroundTask.Progress, optional
+            Where the progress is reported when loading in the background.
+
+        Returns:
+        --------
+        LazyCSV, ChunkedCSV, pandas.DataFrame or None:
+            The dataset, see read_csv_file, or None if the files could not be read.
+        """
+        if len(paths) > 1:
+            return self.read_csv_shards(paths, progress=progress)
+        selected_file = paths[0]
+
+        if stream:
+            with span('open file'):
+                df = ChunkedCSV(selected_file, self.chunk_size, self.memory_limit_mb, self.options)
+            print(f"Streaming CSV file: {selected_file} ({df.chunk_size} rows per chunk)")
+            return df
+        with span('open file'):
+            df = LazyCSV(selected_file, self.cache, self.max_columns, compact, self.options)
+        if self.cache is not None:
+            # the column statistics sidecar of the file also describes this dataset
+            key, _ = self.dataset_key(df)
+            self.sources[key] = (selected_file, self.cache.file_identity(selected_file))
+        if progress is not None:
+            progress.check()
+        print(f"Successfully imported CSV file: {selected_file} ({len(df.columns)} columns, loaded on demand)")
+        return df
+
+    def read_csv_shards(self, paths, workers=None, progress=None):
+        """
+        Loads several CSV files in parallel and concatenates them into one DataFrame.
+
+        Each file is parsed by its own worker process. Columns missing from some of the files are filled
+        with NaN, and a column that parses to different dtypes in different files is widened to a dtype
+        that holds all of them, e.g. int and float become float and anything else becomes object.
+
+        Parameters:
+        -----------
+        paths : list of str
+            The CSV files, in the order their rows should appear.
+        workers : int, optional
+            Number of worker processes. Default is the number of CPU cores.
+        progress : backgroundTask.Progress, optional
+            Where the progress is reported when loading in the background.
+
+        Returns:
+        --------
+        pandas.DataFrame or None:
+            The rows of all files, or None if a file could not be read.
+        """
+        from backgroundTask import Cancelled
+        from shardLoader import load_shards
+        cache_dir = self.cache.cache_dir if self.cache is not None else None
+        try:
+            with span('load shards'):
+                df = load_shards(paths, workers, cache_dir, self.options, progress)
+        except Cancelled:
+            raise
+        except Exception as error:
+            print(f"Could not load the CSV files: {error}")
+            return None
+        print(f"Successfully imported {len(paths)} CSV files: {', '.join(paths)} "
+              f"({len(df)} rows, {len(df.columns)} columns)")
+        return df
+
+    def filter_dataset(self, df, expression):
+        """
+        Returns the rows of a dataset that meet a filter expression, as a dataset of the same kind.
+
+        The filter is pushed down into reading the file. A streamed file drops the rejected rows of every chunk
+        as it is read, and a lazy dataset evaluates the filter once and then loads only the matching rows of each
+        column. For files in the column cache, comparisons of a column with constants, like a time window, are
+        answered from a range index of the column that is built on first use and kept in the cache, so only the
+        blocks of rows that can match are read. Filtering a filtered file keeps the rows that meet both filters.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset.
+        expression : str
+            A pandas query expression, e.g. "Delay > 3.5" or "Time >= '2024-03-01' and Time < '2024-03-02'".
+            Column names with spaces are quoted with backticks.
+
+        Returns:
+        --------
+        pandas.DataFrame, LazyCSV, ChunkedCSV or None:
+            The filtered dataset, or None if the filter is invalid.
+        """
+        from rowFilter import RowFilter
+        try:
+            if isinstance(df, (ChunkedCSV, LazyCSV)) and df.row_filter is not None:
+                expression = f"({df.row_filter.expression}) and ({expression})"
+            row_filter = RowFilter(expression)
+            if isinstance(df, ChunkedCSV):
+                return ChunkedCSV(df.path, df.chunk_size, options=df.options, row_filter=row_filter)
+            if isinstance(df, LazyCSV):
+                filtered = LazyCSV(df.path, df.cache, df.max_columns, df.compact, df.options, row_filter)
+                # evaluated now, so that an invalid filter is reported here rather than by the plot
+                rows = len(filtered.filtered_rows())
+            else:
+                with span('filter rows'):
+                    filtered = df[row_filter.mask(df)]
+                rows = len(filtered)
+        except Exception as error:
+            # pandas reports unknown columns and invalid comparisons with a range of exception types
+            print(f"Could not apply the filter {expression!r}: {error}")
+            return None
+        print(f"{rows} rows meet the filter {expression!r}.")
+        return filtered
+
+    def follow_csv_file(self, interval=1.0):
+        """
+        Follows a CSV file chosen by the user that is still being appended to, updating a live plot in place.
+
+        Only the rows appended since the previous refresh are parsed and added to the plot, so a refresh
+        costs time proportional to the new data rather than to the size of the file. Following stops when
+        the plot window is closed or on Ctrl+C.
+
+        Parameters:
+        -----------
+        interval : float, optional
+            Seconds between refreshes. Default is 1.
+
+        Returns:
+        --------
+        pandas.DataFrame or None:
+            All rows read while following the file, or None if no file or plot was selected.
+
+        Example:
+        --------
+        >>> data_reader = csvReader()
+        >>> df = data_reader.follow_csv_file(interval=5)
+        """
+        import matplotlib.pyplot as plt
+        from followReader import FollowedCSV
+        from livePlot import LiveColumnPlot, LiveVersusPlot
+        selected_file = self.select_csv_file()
+        if selected_file is None:
+            return None
+        if is_compressed(selected_file):
+            print("Compressed files cannot be followed, select a plain CSV file.")
+            return None
+
+        followed = FollowedCSV(selected_file)
+        new_rows, reloaded = followed.refresh()
+        if len(followed.columns) == 0:
+            import time
+            print(f"Waiting for the header of {selected_file}, press Ctrl+C to stop.")
+            try:
+                while len(followed.columns) == 0:
+                    time.sleep(interval)
+                    new_rows, reloaded = followed.refresh()
+            except KeyboardInterrupt:
+                return None
+        df = followed.frame()
+        self.display_plot_options(df)
+        try:
+            choice = input("Plot a column (1) or two columns against eachother (2): ")
+            if choice == '1':
+                column_indexs = [int(index) for index in input("Enter the indexes of the columns to plot, separated by spaces: ").split()]
+                plot_type = input("Supported types are 'line', 'hist' (default is line): ") or 'line'
+                plot_title = input("Enter in a plot title (or hit enter for default): ")
+                if plot_type not in LiveColumnPlot.PLOT_TYPES:
+                    print(f"Invalid plot type. Supported types: 'line', 'hist'")
+                    return df
+                live_plot = LiveColumnPlot([df.columns[index] for index in column_indexs], plot_type,
+                                           plot_title or f'Live {plot_type} plot of {selected_file}')
+            elif choice == '2':
+                x_column = int(input("Enter the index of the x-axis column: "))
+                y_column = int(input("Enter the index of the y-axis column: "))
+                plot_type = input("Enter in any options like line, scatter or density plot: ") or 'scatter'
+                plot_title = input("Enter in a plot title (or hit enter for default): ")
+                if plot_type not in LiveVersusPlot.PLOT_TYPES:
+                    print(f"Invalid plot type. Supported types: 'scatter', 'line', 'density'")
+                    return df
+                live_plot = LiveVersusPlot(df.columns[x_column], df.columns[y_column], plot_type, plot_title,
+                                           self.density_bins)
+            else:
+                print("Invalid choice.")
+                return df
+        except (ValueError, IndexError):
+            print("Invalid input. Please enter valid column indexes.")
+            return df
+
+        live_plot.update(df, new_rows, True)
+        print(f"Following {selected_file}, close the plot window or press Ctrl+C to stop.")
+        try:
+            while plt.fignum_exists(live_plot.figure.number):
+                plt.pause(interval)
+                new_rows, reloaded = followed.refresh()
+                # a rotated file has no columns until its new header is complete
+                if len(followed.columns) and (len(new_rows) or reloaded):
+                    live_plot.update(followed.frame(), new_rows, reloaded)
+                    live_plot.figure.canvas.draw_idle()
+        except KeyboardInterrupt:
+            pass
+        plt.close(live_plot.figure)
+        return followed.frame()
+
     def display_plot_options(self, df):
         """
-        Displays available columns in the provided DataFrame for plotting purposes.
+        Displays available columns in the provided DataFrame for plotting purposes, together with their
+        dtype, count, null count, min, max and mean from the column statistics. For a LazyCSV the memory
+        used by each loaded column is shown too, before and after dtype compaction. A LazyCSV only shows the
+        statistics that are in the sidecar or of the columns it has loaded, and a ChunkedCSV only the ones in
+        the sidecar, with the dtypes of the sampled rows for the others, so listing the columns of a large
+        file does not read it. The statistics of the other columns are computed when they are plotted.
 
         Parameters:
         -----------
-        df : pandas.DataFrame
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
             The DataFrame containing the data to be plotted.
 
         Returns:
@@ -95,25 +447,66 @@ class csvReader():
         >>> df = data_reader.read_csv_file()
         >>> data_reader.display_plot_options(df)
         """
+        from prettytable import PrettyTable
         print("\nColumns available for plotting:")
         
         # Use PrettyTable for a more visually appealing table
         table = PrettyTable()
-        table.field_names = ["Column Index", "Column Name"]
-        
+        # memory of the columns a lazy dataset has loaded, before and after dtype compaction
+        footprint = df.footprint if isinstance(df, LazyCSV) else {}
+        field_names = ["Column Index", "Column Name", "Dtype", "Count", "Nulls", "Min", "Max", "Mean"]
+        table.field_names = field_names + ["Memory"] if footprint else field_names
+
+        def format_number(value):
+            return "" if value is None else f"{value:.6g}"
+
+        def format_bytes(value):
+            return f"{value / 2**20:.2f} MB"
+
+        if isinstance(df, LazyCSV):
+            stats = self.column_stats(df, compute=False)
+            stats.update(self.column_stats(df, [column for column in df.loaded if column not in stats]))
+        elif isinstance(df, ChunkedCSV):
+            stats = self.column_stats(df, compute=False)
+        else:
+            stats = self.column_stats(df)
         for idx, column in enumerate(df.columns):
-            table.add_row([idx, column])
+            column_stats = stats.get(column)
+            if column in footprint:
+                dtype = df.loaded[column].dtype
+            else:
+                dtype = column_stats.dtype if column_stats is not None else df.dtypes[column]
+            if column_stats is None:
+                row = [idx, column, dtype, "", "", "", "", ""]
+            else:
+                row = [idx, column, dtype, column_stats.count, column_stats.nulls,
+                       format_number(column_stats.min), format_number(column_stats.max),
+                       format_number(column_stats.mean)]
+            if footprint:
+                if column not in footprint:
+                    row.append("not loaded")
+                elif footprint[column][0] == footprint[column][1]:
+                    row.append(format_bytes(footprint[column][0]))
+                else:
+                    row.append(f"{format_bytes(footprint[column][0])} -> {format_bytes(footprint[column][1])}")
+            table.add_row(row)
         
         print(table)
+        if footprint:
+            before = sum(sizes[0] for sizes in footprint.values())
+            after = sum(sizes[1] for sizes in footprint.values())
+            print(f"Loaded columns use {format_bytes(after)}", end="")
+            print(f" ({format_bytes(before)} before compaction, {1 - after / before:.0%} saved)" if after < before else "")
 
 
-    def plot_column(self, df, column_indexs, plot_type='hist', plot_title=""):
+    def plot_column(self, df, column_indexs, plot_type='hist', plot_title="", aggregation='count', key_index=None, top=20,
+                    quantile_error=False):
         """
         Plots the specified column from the DataFrame using the specified plot type.
 
         Parameters:
         -----------
-        df : pandas.DataFrame
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
             The DataFrame containing the data to be plotted.
         column_index : int
             The index of the column to be plotted.
@@ -121,6 +514,18 @@ class csvReader():
             The type of plot to be generated ('hist', 'line', 'bar', 'box'). Default is 'hist'.
         plot_title : str, optional
             The title of the plot. If not provided, a default title will be generated based on the column name.
+        aggregation : str, optional
+            How bar plots reduce the rows of each group to a bar ('count', 'sum', 'mean'), see column_bars.
+            Default is 'count'.
+        key_index : int, optional
+            The index of the column whose values group the rows of bar plots. Required for 'sum' and 'mean'.
+            Default is to count the distinct values of the plotted columns.
+        top : int, optional
+            Number of groups of a bar plot drawn on their own, the rest are merged into one 'other' group.
+            Default is 20.
+        quantile_error : bool, optional
+            Show the error bound of the quartiles and median of box plots drawn from a quantile sketch, see
+            column_boxes. Default is False.
 
         Returns:
         --------
@@ -136,10 +541,30 @@ class csvReader():
         >>> df = data_reader.read_csv_file()
         >>> data_reader.plot_column(df, column_index=0, plot_type='hist', plot_title='Custom Histogram')
         """
+        import matplotlib.pyplot as plt
+        if isinstance(df, ChunkedCSV):
+            if self.draw_column_chunks(df, column_indexs, plot_type, plot_title, aggregation, key_index, top,
+                                       quantile_error):
+                plt.grid()
+                default_profiler.render(plt.gcf())
+                plt.show()
+            return
+
         # checks if the plot title is nothing this way it can convert it to ta histogram default plot
         
         colors = cycle(['red', 'blue', 'green', 'orange', 'purple', 'cyan'])
-        bar_width = 0.2  # Adjust as needed
+        histogram = None
+        if plot_type in ('', 'hist'):
+            histogram = self.column_histograms(df, [df.columns[column_index] for column_index in column_indexs])
+        elif plot_type == 'bar':
+            bars = self.column_bars(df, [df.columns[column_index] for column_index in column_indexs],
+                                    aggregation, df.columns[key_index] if key_index is not None else None, top)
+            if bars is None:
+                return
+        elif plot_type == 'box':
+            boxes = self.column_boxes(df, [df.columns[column_index] for column_index in column_indexs])
+            if not boxes:
+                return
         for i, column_index in enumerate(column_indexs):
 
             if plot_title == "":
@@ -150,25 +575,16 @@ class csvReader():
                 current_color = next(colors)
                 print(current_color)
                 if plot_type == 'hist':
-                    df[column_name].plot(kind='hist', color=current_color, edgecolor='black', legend = column_name)
+                    self.draw_histogram(df, column_name, color=current_color, histogram=histogram)
                     plt.title(f'Histogram of {column_name}')
                 elif plot_type == 'line':
-                    df[column_name].plot(kind='line', color=current_color, legend = column_name)
+                    self.draw_line(df[column_name], color=current_color)
                     plt.title(f'Line plot of {column_name}')
                 elif plot_type == "bar":
-                    df[column_name].plot(kind='bar', color=current_color, edgecolor='black', legend = column_name)
+                    self.draw_bars(bars, column_name, color=current_color)
                     plt.title(f'Bar plot of {column_name}')
-                    # Use the bottom parameter to stack bars on top of each other
-                    # if column_index == column_indexs[0]:
-                    #     df[column_name].plot(kind='bar', color=current_color, edgecolor='black', legend=column_name)
-                    # else:
-                    #     df[column_name].plot(kind='bar', color=current_color, edgecolor='black', bottom=df[df.columns[column_indexs[:column_indexs.index(column_index) + 1]]].sum(axis=1), legend=column_name)
-                    # Calculate the position of each bar along the x-axis
-                    # positions = np.arange(len(df)) + i * bar_width
-                    # df[column_name].plot(kind='bar', color=current_color, edgecolor='black', legend=column_name, position=positions, width=bar_width)
-                    # plt.title(f'Bar plot of {column_name}')
                 elif plot_type == "box":
-                    df[column_name].plot(kind='box', color=current_color, legend = column_name)
+                    self.draw_box(boxes, column_name, color=current_color, quantile_error=quantile_error)
                     plt.title(f'Box plot of {column_name}')
                 else:
                     print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
@@ -182,20 +598,16 @@ class csvReader():
                 current_color = next(colors)
                 print(current_color)
                 if plot_type == 'hist':
-                    df[column_name].plot(kind='hist', color=current_color, edgecolor='black', legend = column_name)
+                    self.draw_histogram(df, column_name, color=current_color, histogram=histogram)
                     plt.title(plot_title)
                 elif plot_type == 'line':
-                    df[column_name].plot(kind='line', color=current_color, legend = column_name)
+                    self.draw_line(df[column_name], color=current_color)
                     plt.title(plot_title)
                 elif plot_type == "bar":
-                    df[column_name].plot(kind='bar', color=current_color, edgecolor='black', legend = column_name)
+                    self.draw_bars(bars, column_name, color=current_color)
                     plt.title(plot_title)
-                    # if column_index == column_indexs[0]:
-                        # df[column_name].plot(kind='bar', color=current_color, edgecolor='black', legend=column_name)
-                    # else:
-                        # df[column_name].plot(kind='bar', color=current_color, edgecolor='black', bottom=df[df.columns[column_indexs[:column_indexs.index(column_index) + 1]]].sum(axis=1), legend=column_name)
                 elif plot_type == "box":
-                    df[column_name].plot(kind='box', color=current_color, legend = column_name)
+                    self.draw_box(boxes, column_name, color=current_color, quantile_error=quantile_error)
                     plt.title(plot_title)
                 else:
                     print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
@@ -203,15 +615,17 @@ class csvReader():
 
 
         plt.grid()
+        default_profiler.render(plt.gcf())
         plt.show()
 
-    def save_plot_column(self, df, column_indexs, plot_type='hist',plot_title = "", doc_type='', doc_title=""):
+    def save_plot_column(self, df, column_indexs, plot_type='hist',plot_title = "", doc_type='', doc_title="",
+                         aggregation='count', key_index=None, top=20, quantile_error=False):
         """
         Plots and saves the specified column from the DataFrame using the specified plot type.
 
         Parameters:
         -----------
-        df : pandas.DataFrame
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
             The DataFrame containing the data to be plotted.
         column_index : int
             The index of the column to be plotted.
@@ -223,10 +637,23 @@ class csvReader():
             The format in which the plot will be saved ('png', 'pdf', etc.). Default is an empty string.
         doc_title : str, optional
             The filename (including path) to save the plot. If not provided, a default filename will be used.
-        
+        aggregation : str, optional
+            How bar plots reduce the rows of each group to a bar ('count', 'sum', 'mean'), see column_bars.
+            Default is 'count'.
+        key_index : int, optional
+            The index of the column whose values group the rows of bar plots. Required for 'sum' and 'mean'.
+            Default is to count the distinct values of the plotted columns.
+        top : int, optional
+            Number of groups of a bar plot drawn on their own, the rest are merged into one 'other' group.
+            Default is 20.
+        quantile_error : bool, optional
+            Show the error bound of the quartiles and median of box plots drawn from a quantile sketch, see
+            column_boxes. Default is False.
+
         Returns:
         --------
-        None
+        bool:
+            True if the plot was saved, False if it could not be drawn. The reason is printed.
 
         Example:
         --------
@@ -234,76 +661,103 @@ class csvReader():
         >>> df = data_reader.read_csv_file()
         >>> data_reader.save_plot_column(df, column_index=0, plot_type='hist', plot_title='Histogram Plot', doc_type='png', doc_title='histogram_plot.png')
         """
-        colors = cycle(['red', 'blue', 'green', 'orange', 'purple', 'cyan'])
-        for column_index in column_indexs:
-    
-            column_name = df.columns[column_index]
-            if plot_title == "":
-                if plot_type == "":
-                    plot_type = 'hist'
-                
-                current_color = next(colors)
-                if plot_type == 'hist':
-                    df[column_name].plot(kind='hist', edgecolor='black', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == 'line':
-                    df[column_name].plot(kind='line', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == "bar":
-                    df[column_name].plot(kind='bar', edgecolor='black', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == "box":
-                    df[column_name].plot(kind='box', legend = column_name)
-                    plt.title(plot_title)
-                else:
-                    print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
-                    return
+        import matplotlib.pyplot as plt
+        doc_title = doc_title or "default"
+        doc_type = doc_type or 'pdf'
+        key_name = df.columns[key_index] if key_index is not None else None
+        plot = ('column', plot_type or 'hist', plot_title, doc_type)
+        if plot_type == 'bar':
+            plot += (aggregation, key_name, top)
+        elif plot_type == 'box':
+            plot += (quantile_error,)
+        render_key = self.render_key(df, [df.columns[column_index] for column_index in column_indexs]
+                                     + ([key_name] if key_name is not None else []), plot)
+        if render_key is not None and self.renders.fetch(render_key, doc_title):
+            plt.close()
+            print(f"Copied {doc_title} from the render cache.")
+            return True
+
+        if isinstance(df, ChunkedCSV):
+            if not self.draw_column_chunks(df, column_indexs, plot_type, plot_title, aggregation, key_index, top,
+                                           quantile_error):
+                return False
+        else:
+            colors = cycle(['red', 'blue', 'green', 'orange', 'purple', 'cyan'])
+            histogram = None
+            if plot_type in ('', 'hist'):
+                histogram = self.column_histograms(df, [df.columns[column_index] for column_index in column_indexs])
+            elif plot_type == 'bar':
+                bars = self.column_bars(df, [df.columns[column_index] for column_index in column_indexs],
+                                        aggregation, key_name, top)
+                if bars is None:
+                    return False
+            elif plot_type == 'box':
+                boxes = self.column_boxes(df, [df.columns[column_index] for column_index in column_indexs])
+                if not boxes:
+                    return False
+            for column_index in column_indexs:
+
+                column_name = df.columns[column_index]
+                if plot_title == "":
+                    if plot_type == "":
+                        plot_type = 'hist'
             
-            else:
-                if plot_type == "":
-                    plot_type = 'hist'
-                
-                if plot_type == 'hist':
-                    df[column_name].plot(kind='hist', edgecolor='black', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == 'line':
-                    df[column_name].plot(kind='line', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == "bar":
-                    df[column_name].plot(kind='bar', edgecolor='black', legend = column_name)
-                    plt.title(plot_title)
-                elif plot_type == "box":
-                    df[column_name].plot(kind='box', legend = column_name)
-                    plt.title(plot_title)
+                    current_color = next(colors)
+                    if plot_type == 'hist':
+                        self.draw_histogram(df, column_name, histogram=histogram)
+                        plt.title(plot_title)
+                    elif plot_type == 'line':
+                        self.draw_line(df[column_name])
+                        plt.title(plot_title)
+                    elif plot_type == "bar":
+                        self.draw_bars(bars, column_name)
+                        plt.title(plot_title)
+                    elif plot_type == "box":
+                        self.draw_box(boxes, column_name, quantile_error=quantile_error)
+                        plt.title(plot_title)
+                    else:
+                        print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
+                        return False
+        
                 else:
-                    print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
-                    return
+                    if plot_type == "":
+                        plot_type = 'hist'
+            
+                    if plot_type == 'hist':
+                        self.draw_histogram(df, column_name, histogram=histogram)
+                        plt.title(plot_title)
+                    elif plot_type == 'line':
+                        self.draw_line(df[column_name])
+                        plt.title(plot_title)
+                    elif plot_type == "bar":
+                        self.draw_bars(bars, column_name)
+                        plt.title(plot_title)
+                    elif plot_type == "box":
+                        self.draw_box(boxes, column_name, quantile_error=quantile_error)
+                        plt.title(plot_title)
+                    else:
+                        print(f"Invalid plot type. Supported types: 'hist', 'line', 'bar', 'box'")
+                        return False
 
 
         plt.grid()
-        if doc_title != "" and doc_type != "":
-            plt.savefig(doc_title, format=doc_type)
-        elif doc_title != "":
-            plt.savefig(doc_title, format='pdf')
-        elif doc_type != "":
-            plt.savefig("default", format=doc_type)
-        else:
-            plt.savefig("default", format='pdf')
+        self.save_figure(doc_title, doc_type, render_key)
+        return True
 
     def plot_versus(self, df, x_column_index, y_column_index,  plot_type='scatter', plot_title=""):
         """
-        Generates a scatter or line plot comparing two columns from the DataFrame.
+        Generates a scatter, line or density plot comparing two columns from the DataFrame.
 
         Parameters:
         -----------
-        df : pandas.DataFrame
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
             The DataFrame containing the data to be plotted.
         x_column_index : int
             The index of the column to be plotted on the x-axis.
         y_column_index : int
             The index of the column to be plotted on the y-axis.
         plot_type : str, optional
-            The type of plot to be generated ('scatter', 'line'). Default is 'scatter'.
+            The type of plot to be generated ('scatter', 'line', 'density'). Default is 'scatter'.
         plot_title : str, optional
             The title of the plot. If not provided, a default title will be generated based on the column names.
 
@@ -317,6 +771,8 @@ class csvReader():
         >>> df = data_reader.read_csv_file()
         >>> data_reader.plot_versus(df, x_column_index=0, y_column_index=1, plot_type='scatter', plot_title='Scatter Plot')
         """
+        import numpy as np
+        import matplotlib.pyplot as plt
         # converting indexes into column names
         x_column_name = df.columns[x_column_index]
         y_column_name = df.columns[y_column_index]
@@ -324,47 +780,60 @@ class csvReader():
         if plot_type == "":
             plot_type = 'scatter'
         
-        if plot_type == 'scatter':
-            plt.scatter(df[x_column_name], df[y_column_name], label=f"Scatter Plot of {x_column_name} VS {y_column_name}")
-        
+        if isinstance(df, ChunkedCSV):
+            if not self.draw_versus_chunks(df, x_column_name, y_column_name, plot_type):
+                return
+
+        elif plot_type == 'scatter':
+            self.draw_scatter(df[x_column_name], df[y_column_name], label=f"Scatter Plot of {x_column_name} VS {y_column_name}")
+
         elif plot_type == 'line':
-            plt.scatter(df[x_column_name], df[y_column_name], label='Scatter Plot')
-            
-            # calculate line of best fit
-            slope, intercept, r_value, p_value, std_err = linregress(df[x_column_name], df[y_column_name])
-            x_values = df[x_column_name]
+            self.draw_scatter(df[x_column_name], df[y_column_name], label='Scatter Plot')
+        
+            # calculate line of best fit from the cached regression statistics of this column pair
+            regression = self.regression_stats(df, x_column_name, y_column_name)
+            slope, intercept, r_value = regression.linregress()
+            # a straight line only needs its two end points
+            x_values = np.array([regression.x_range.min, regression.x_range.max])
             y_values = slope * x_values + intercept
 
             # plot line of best fit
             plt.plot(x_values, y_values, color='red', label='Linear Regression Line')
+
            
-               
+        elif plot_type == 'density':
+            from streamStats import StreamingHistogram2D
+            bins = (self.density_bins, self.density_bins)
+            self.draw_density(StreamingHistogram2D.from_arrays(df[x_column_name], df[y_column_name], bins))
+
         else:
-            print(f"Invalid plot type. Supported types: 'scatter', 'line'")
+            print(f"Invalid plot type. Supported types: 'scatter', 'line', 'density'")
             return
 
         plt.title(f'{x_column_name} versus {y_column_name} for {plot_title}')
         plt.xlabel(x_column_name)
         plt.ylabel(y_column_name)
         plt.grid()
-        plt.legend()
+        if plot_type != 'density':
+            plt.legend()
+        default_profiler.render(plt.gcf())
         plt.show()
 
 
     def save_plot_versus(self, df, x_column_index, y_column_index,  plot_type='scatter',plot_title="", doc_type="", doc_title=""):
         """
-        Generates and saves a scatter or line plot comparing two columns from the DataFrame.
+        Generates and saves a scatter, line or density plot comparing two columns from the DataFrame.
 
         Parameters:
         -----------
-        df : pandas.DataFrame
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
             The DataFrame containing the data to be plotted.
         x_column_index : int
             The index of the column to be plotted on the x-axis.
         y_column_index : int
             The index of the column to be plotted on the y-axis.
         plot_type : str, optional
-            The type of plot to be generated ('scatter', 'line'). Default is 'scatter'.
+            The type of plot to be generated ('scatter', 'line', 'density'). Default is 'scatter'.
         plot_title : str, optional
             The title of the plot. If not provided, a default title will be generated based on the column names.
         doc_type : str, optional
@@ -374,7 +843,8 @@ class csvReader():
 
         Returns:
         --------
-        None
+        bool:
+            True if the plot was saved, False if it could not be drawn. The reason is printed.
 
         Example:
         --------
@@ -382,6 +852,8 @@ class csvReader():
         >>> df = data_reader.read_csv_file()
         >>> data_reader.save_plot_versus(df, x_column_index=0, y_column_index=1, plot_type='scatter', plot_title='Scatter Plot', doc_type='png', doc_title='scatter_plot.png')
         """
+        import numpy as np
+        import matplotlib.pyplot as plt
         # converting indexes into column names
         x_column_name = df.columns[x_column_index]
         y_column_name = df.columns[y_column_index]
@@ -389,44 +861,879 @@ class csvReader():
         if plot_type == "":
             plot_type ='scatter'
 
-        if plot_type == 'scatter':
-            plt.scatter(df[x_column_name], df[y_column_name], label=f"Scatter Plot of {x_column_name} VS {y_column_name}")
-        
+        doc_title = doc_title or f'{x_column_name} versus {y_column_name} for {plot_title}'
+        doc_type = doc_type or 'pdf'
+        render_key = self.render_key(df, [x_column_name, y_column_name], ('versus', plot_type, plot_title, doc_type))
+        if render_key is not None and self.renders.fetch(render_key, doc_title):
+            plt.close()
+            print(f"Copied {doc_title} from the render cache.")
+            return True
+
+        if isinstance(df, ChunkedCSV):
+            if not self.draw_versus_chunks(df, x_column_name, y_column_name, plot_type):
+                return False
+
+        elif plot_type == 'scatter':
+            self.draw_scatter(df[x_column_name], df[y_column_name], label=f"Scatter Plot of {x_column_name} VS {y_column_name}")
+
         elif plot_type == 'line':
-            plt.scatter(df[x_column_name], df[y_column_name], label='Scatter Plot')
-            
-            # calculate line of best fit
-            slope, intercept, r_value, p_value, std_err = linregress(df[x_column_name], df[y_column_name])
-            x_values = df[x_column_name]
+            self.draw_scatter(df[x_column_name], df[y_column_name], label='Scatter Plot')
+        
+            # calculate line of best fit from the cached regression statistics of this column pair
+            regression = self.regression_stats(df, x_column_name, y_column_name)
+            slope, intercept, r_value = regression.linregress()
+            # a straight line only needs its two end points
+            x_values = np.array([regression.x_range.min, regression.x_range.max])
             y_values = slope * x_values + intercept
 
             # plot line of best fit
             plt.plot(x_values, y_values, color='red', label='Linear Regression Line')
-            
         
+
+        elif plot_type == 'density':
+            from streamStats import StreamingHistogram2D
+            bins = (self.density_bins, self.density_bins)
+            self.draw_density(StreamingHistogram2D.from_arrays(df[x_column_name], df[y_column_name], bins))
+
         else:
-            print(f"Invalid plot type. Supported types: 'scatter', 'line'")
-            return
+            print(f"Invalid plot type. Supported types: 'scatter', 'line', 'density'")
+            return False
 
         plt.title(f'{x_column_name} versus {y_column_name} for {plot_title}')
         plt.xlabel(x_column_name)
         plt.ylabel(y_column_name)
         plt.grid()
-        plt.legend()
+        if plot_type != 'density':
+            plt.legend()
         plt.grid()
         
-        if doc_title != "" and doc_type != "":
-            plt.savefig(doc_title, format=doc_type)
-        elif doc_title != "":
-            plt.savefig(doc_title, format='pdf')
-        elif doc_type != "":
-            doc_title = f'{x_column_name} versus {y_column_name} for {plot_title}'
-            plt.savefig(doc_title, format=doc_type)
-        else:
-            doc_title = f'{x_column_name} versus {y_column_name} for {plot_title}'
-            plt.savefig(doc_title, format='pdf')
+        self.save_figure(doc_title, doc_type, render_key)
+        return True
 
     
+    @profiled('stream file')
+    def draw_column_chunks(self, chunks, column_indexs, plot_type='hist', plot_title="", aggregation='count', key_index=None,
+                           top=20, quantile_error=False):
+        """
+        Draws the specified columns of a streamed CSV file onto the current figure.
+
+        The file is consumed chunk by chunk through incremental aggregations, so memory use does not
+        grow with the size of the file. Histograms are drawn from the column statistics, which take
+        two passes over the file the first time, plus one pass over all columns to count several
+        columns on shared bins. Line plots are drawn as the min/max envelope of
+        consecutive row buckets. Bar plots are aggregated per group in one pass. Box plots are drawn from
+        quantile sketches, built in one pass the first time and kept with the column statistics.
+
+        Parameters:
+        -----------
+        chunks : ChunkedCSV
+            The streamed CSV file containing the data to be plotted.
+        column_indexs : list of int
+            The indexes of the columns to be plotted.
+        plot_type : str, optional
+            The type of plot to be generated ('hist', 'line', 'bar', 'box'). Default is 'hist'.
+        plot_title : str, optional
+            The title of the plot. If not provided, a default title will be generated based on the column names.
+        aggregation : str, optional
+            How bar plots reduce the rows of each group to a bar ('count', 'sum', 'mean'), see column_bars.
+            Default is 'count'.
+        key_index : int, optional
+            The index of the column whose values group the rows of bar plots. Required for 'sum' and 'mean'.
+            Default is to count the distinct values of the plotted columns.
+        top : int, optional
+            Number of groups of a bar plot drawn on their own, the rest are merged into one 'other' group.
+            Default is 20.
+        quantile_error : bool, optional
+            Show the error bound of the quartiles and median of box plots drawn from a quantile sketch, see
+            column_boxes. Default is False.
+
+        Returns:
+        --------
+        bool:
+            True if the plot was drawn, False if the plot type is not supported for streamed files.
+        """
+        import matplotlib.pyplot as plt
+        from streamStats import MinMaxEnvelope
+        if plot_type == "":
+            plot_type = 'hist'
+        colors = cycle(['red', 'blue', 'green', 'orange', 'purple', 'cyan'])
+        column_names = list(dict.fromkeys(chunks.columns[column_index] for column_index in column_indexs))
+
+        if plot_type == 'hist':
+            histogram = self.column_histograms(chunks, column_names)
+            for column_name in column_names:
+                self.draw_histogram(chunks, column_name, color=next(colors), histogram=histogram)
+            default_title = 'Histogram of'
+        elif plot_type == 'line':
+            envelopes = {column_name: MinMaxEnvelope() for column_name in column_names}
+            for chunk in chunks.iter_chunks(usecols=column_names):
+                for column_name in column_names:
+                    envelopes[column_name].update(chunk[column_name])
+
+            for column_name, envelope in envelopes.items():
+                x_values, y_values = envelope.points()
+                plt.plot(x_values, y_values, color=next(colors), label=column_name)
+            default_title = 'Line plot of'
+        elif plot_type == 'bar':
+            bars = self.column_bars(chunks, column_names, aggregation,
+                                    chunks.columns[key_index] if key_index is not None else None, top)
+            if bars is None:
+                return False
+            for column_name in column_names:
+                self.draw_bars(bars, column_name, color=next(colors))
+            default_title = 'Bar plot of'
+        elif plot_type == 'box':
+            boxes = self.column_boxes(chunks, column_names)
+            if not boxes:
+                return False
+            for column_name in column_names:
+                self.draw_box(boxes, column_name, color=next(colors), quantile_error=quantile_error)
+            default_title = 'Box plot of'
+        else:
+            print(f"Invalid plot type for a streamed file. Supported types: 'hist', 'line', 'bar', 'box'")
+            return False
+
+        if plot_title == "":
+            plot_title = f'{default_title} {", ".join(column_names)}'
+        plt.title(plot_title)
+        if plot_type != 'box' or quantile_error:
+            plt.legend()
+        return True
+
+    @profiled('stream file')
+    def draw_versus_chunks(self, chunks, x_column_name, y_column_name, plot_type='scatter'):
+        """
+        Draws two columns of a streamed CSV file against each other onto the current figure.
+
+        The scatter shows a uniform random sample of the rows. The line of best fit of the 'line'
+        plot type is computed from regression statistics over every row of the file. The 'density' plot type
+        counts every row into a fixed grid, taking one pass for the ranges and one for the counts.
+
+        Parameters:
+        -----------
+        chunks : ChunkedCSV
+            The streamed CSV file containing the data to be plotted.
+        x_column_name : str
+            The name of the column to be plotted on the x-axis.
+        y_column_name : str
+            The name of the column to be plotted on the y-axis.
+        plot_type : str, optional
+            The type of plot to be generated ('scatter', 'line', 'density'). Default is 'scatter'.
+
+        Returns:
+        --------
+        bool:
+            True if the plot was drawn, False if the plot type is not supported.
+        """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from streamStats import RunningRange, StreamingHistogram2D, ReservoirSample
+        if plot_type not in ('scatter', 'line', 'density'):
+            print(f"Invalid plot type. Supported types: 'scatter', 'line', 'density'")
+            return False
+
+        usecols = list(dict.fromkeys([x_column_name, y_column_name]))
+        if plot_type == 'density':
+            x_range, y_range = RunningRange(), RunningRange()
+            for chunk in chunks.iter_chunks(usecols=usecols):
+                x_range.update(chunk[x_column_name])
+                y_range.update(chunk[y_column_name])
+
+            histogram = StreamingHistogram2D((self.density_bins, self.density_bins),
+                                             (x_range.min, x_range.max), (y_range.min, y_range.max))
+            for chunk in chunks.iter_chunks(usecols=usecols):
+                histogram.update(chunk[x_column_name], chunk[y_column_name])
+            self.draw_density(histogram)
+            return True
+
+        sample = ReservoirSample()
+        for chunk in chunks.iter_chunks(usecols=usecols):
+            sample.update(chunk[x_column_name], chunk[y_column_name])
+
+        if plot_type == 'scatter':
+            self.draw_scatter(sample.x, sample.y, label=f"Scatter Plot of {x_column_name} VS {y_column_name}")
+        else:
+            self.draw_scatter(sample.x, sample.y, label='Scatter Plot')
+
+            # line of best fit from the regression statistics over the whole file
+            regression = self.regression_stats(chunks, x_column_name, y_column_name)
+            slope, intercept, r_value = regression.linregress()
+            x_values = np.array([regression.x_range.min, regression.x_range.max])
+            y_values = slope * x_values + intercept
+            plt.plot(x_values, y_values, color='red', label='Linear Regression Line')
+        return True
+
+    def dataset_key(self, df):
+        """
+        Identifies a dataset for the per-dataset caches of this reader.
+
+        DataFrames and lazy datasets are identified by the object itself, and their cache entries are dropped
+        when the object is garbage collected. Streamed files are identified by their path and row filter, with
+        their size and modification time as the identity of the current contents.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset.
+
+        Returns:
+        --------
+        tuple:
+            (key, identity) where identity is None for DataFrames and lazy datasets.
+        """
+        if isinstance(df, ChunkedCSV):
+            stat = os.stat(df.path)
+            row_filter = df.row_filter.expression if df.row_filter is not None else None
+            return ('file', os.path.abspath(df.path), row_filter), (stat.st_size, stat.st_mtime_ns)
+
+        key = ('frame', id(df))
+        if key not in self.tracked_frames:
+            self.tracked_frames.add(key)
+            weakref.finalize(df, self.forget_dataset, key)
+        return key, None
+
+    def reads_in_chunks(self, df):
+        """
+        Returns True if whole columns of df are summarized by reading the file in chunks.
+
+        This holds for streamed files and lazy datasets without a row filter. A filtered lazy dataset only holds
+        the rows that meet its filter, so its columns are summarized in memory instead of reading the whole file.
+        """
+        return isinstance(df, ChunkedCSV) or (isinstance(df, LazyCSV) and df.row_filter is None)
+
+    def forget_dataset(self, key):
+        # copied first, background loads may add entries meanwhile
+        for cache_key in [cache_key for cache_key in list(self.regressions) if cache_key[0] == key]:
+            del self.regressions[cache_key]
+        for cache_key in [cache_key for cache_key in list(self.histograms) if cache_key[0] == key]:
+            del self.histograms[cache_key]
+        self.stats.pop(key, None)
+        self.sources.pop(key, None)
+        self.tracked_frames.discard(key)
+
+    def render_key(self, df, column_names, plot):
+        """
+        Returns the render cache key of a saved plot, or None if the plot cannot be served from the cache.
+
+        The key covers the data of the plotted columns, the plot itself and everything else that changes the
+        rendered file: the decimation, density and rasterization settings of this reader, the matplotlib version
+        and rcParams.
+        Files are identified by their path, size and modification time, DataFrames by a hash of the plotted
+        columns and their index, which costs a pass over the columns but far less than rendering them.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset.
+        column_names : list of str
+            The plotted columns.
+        plot : tuple
+            Plot kind, plot type, title and output format.
+
+        Returns:
+        --------
+        str or None:
+            The key, or None without a render cache or if the current figure already has content, which the
+            saved file would include.
+        """
+        import matplotlib
+        import matplotlib.pyplot as plt
+        if self.renders is None or (plt.get_fignums() and plt.gcf().get_children()[1:]):
+            return None
+
+        if isinstance(df, (ChunkedCSV, LazyCSV)):
+            stat = os.stat(df.path)
+            source = {'path': os.path.abspath(df.path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+            data = {'file': source, 'parse': df.options.signature(),
+                    'filter': df.row_filter.expression if df.row_filter is not None else None}
+        else:
+            import hashlib
+            import pandas as pd
+            columns = df[list(dict.fromkeys(column_names))]
+            digest = hashlib.sha1(pd.util.hash_pandas_object(columns, index=True).to_numpy().tobytes())
+            data = {'frame': digest.hexdigest(), 'dtypes': [str(dtype) for dtype in columns.dtypes]}
+
+        rc_params = {name: value for name, value in matplotlib.rcParams.items() if name != 'backend'}
+        return self.renders.key({'data': data, 'columns': list(column_names), 'plot': list(plot),
+                                 'decimation': self.decimation, 'density_bins': self.density_bins,
+                                 'rasterize_points': self.rasterize_points, 'raster_dpi': self.raster_dpi,
+                                 'matplotlib': matplotlib.__version__, 'rc': rc_params})
+
+    def save_figure(self, doc_title, doc_type, render_key=None):
+        """
+        Saves the current figure, closes it and adds the file to the render cache under render_key.
+
+        The figure is closed so that the next plot starts on an empty figure instead of drawing over this one.
+        """
+        import matplotlib.pyplot as plt
+        from renderCache import release
+        # writing into a file that is hardlinked to a cache entry would change the entry
+        release(doc_title)
+        try:
+            if doc_type.lower() in VECTOR_FORMATS:
+                # the figure is closed afterwards, so the artists need not be switched back
+                self.rasterize_dense_artists(plt.gcf())
+                with span('savefig'):
+                    # the dpi of a vector document only sets the resolution of its rasterized artists
+                    plt.savefig(doc_title, format=doc_type, dpi=self.raster_dpi)
+            else:
+                with span('savefig'):
+                    plt.savefig(doc_title, format=doc_type)
+        finally:
+            plt.close()
+        if render_key is not None:
+            try:
+                self.renders.store(render_key, doc_title)
+            except OSError as error:
+                print(f"Could not write the render cache: {error}")
+
+    def rasterize_dense_artists(self, figure):
+        """
+        Marks the data artists of figure with more than rasterize_points points to be rasterized.
+
+        Vector backends write rasterized artists as one embedded image at the dpi of the saved figure, so
+        the size and write time of the document no longer grow with the number of points. Lines, scatter
+        and other collections are counted one by one. Patches, like the bars of a bar plot, are counted
+        together per axes since each of them is a separate artist. Axes, ticks, labels, titles and legends
+        are never rasterized.
+
+        Parameters:
+        -----------
+        figure : matplotlib.figure.Figure
+            The figure about to be saved.
+
+        Returns:
+        --------
+        list:
+            The artists that were marked.
+        """
+        from matplotlib.collections import Collection
+        from matplotlib.lines import Line2D
+        from matplotlib.patches import Patch
+        if not self.rasterize_points:
+            return []
+
+        rasterized = []
+        for axes in figure.axes:
+            patches = []
+            for artist in axes.get_children():
+                if artist.get_rasterized() or not artist.get_visible():
+                    continue
+                if isinstance(artist, Line2D):
+                    points = len(artist.get_xydata())
+                elif isinstance(artist, Collection):
+                    # markers are drawn once per offset, other collections draw their paths
+                    points = max(len(artist.get_offsets()), sum(len(path.vertices) for path in artist.get_paths()))
+                elif isinstance(artist, Patch) and artist is not axes.patch:
+                    patches.append(artist)
+                    continue
+                else:
+                    continue
+                if points > self.rasterize_points:
+                    rasterized.append(artist)
+            if sum(len(patch.get_path().vertices) for patch in patches) > self.rasterize_points:
+                rasterized += patches
+
+        for artist in rasterized:
+            artist.set_rasterized(True)
+        return rasterized
+
+    def column_stats(self, df, column_names=None, compute=True):
+        """
+        Returns the summary statistics of columns of a dataset, computing each column at most once.
+
+        For datasets read from a CSV file the statistics are also kept in a sidecar file next to the
+        column cache, so they are computed once per file and are available instantly in later sessions.
+        Columns of a lazy dataset that are in memory or in the column cache are summarized from there,
+        other columns from the CSV text, chunk by chunk.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset.
+        column_names : list of str, optional
+            The columns to summarize. Default is all columns.
+        compute : bool, optional
+            Compute the statistics that are not known yet. If False, only the columns whose statistics are
+            already in memory or in the sidecar are returned. Default is True.
+
+        Returns:
+        --------
+        dict:
+            Column name -> ColumnStats.
+        """
+        from columnStats import build_stats
+        if column_names is None:
+            column_names = list(df.columns)
+        key, identity = self.dataset_key(df)
+        cached_identity, stats = self.stats.get(key, (None, None))
+        if stats is None or cached_identity != identity:
+            stats = {}
+
+        source, source_identity = self.stats_source(df, key)
+        if not stats and source is not None and self.cache is not None:
+            stats = self.cache.load_stats(source, source_identity) or {}
+
+        missing = [column_name for column_name in dict.fromkeys(column_names) if column_name not in stats]
+        if missing and compute:
+            # compacted columns have other dtypes than the file, e.g. categories for numbers
+            in_memory = isinstance(df, LazyCSV) and not df.compact and df.is_available(missing)
+            with span('column statistics'):
+                if self.reads_in_chunks(df) and not in_memory:
+                    # a lazy dataset is summarized in chunks rather than loading every column at once
+                    stats.update(build_stats(lambda: df.iter_chunks(usecols=missing), missing))
+                else:
+                    stats.update(build_stats(lambda: [df[missing]], missing))
+            self.write_stats(source, stats, source_identity)
+
+        self.stats[key] = (identity, stats)
+        return {column_name: stats[column_name] for column_name in column_names if column_name in stats}
+
+    def stats_source(self, df, key):
+        """
+        Returns the CSV file whose column statistics sidecar describes df and the identity it must have.
+
+        Returns:
+        --------
+        tuple:
+            (path, identity), (path, None) for the current contents of the file, or (None, None) if the
+            statistics of df are not kept in a sidecar.
+        """
+        if isinstance(df, ChunkedCSV):
+            # the sidecar describes every row of the file
+            return (df.path, None) if df.row_filter is None else (None, None)
+        return self.sources.get(key, (None, None))
+
+    def write_stats(self, source, stats, source_identity=None):
+        if source is None or self.cache is None:
+            return
+        try:
+            self.cache.store_stats(source, stats, source_identity)
+        except OSError as error:
+            print(f"Could not write the column statistics for {source}: {error}")
+
+    def regression_stats(self, df, x_column_name, y_column_name):
+        """
+        Returns the regression statistics of y_column_name against x_column_name.
+
+        The statistics of lazy datasets and streamed files are cached per dataset and column pair, so the line
+        of best fit costs O(1) after the first call, for example when a plot is shown and then saved. A streamed
+        file is read again in full only if it has changed. A DataFrame can be changed in place, so its statistics
+        are computed on every call, in one vectorized pass. Followed files add their new rows to the regression
+        of their live plot instead, see livePlot.LiveVersusPlot.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset containing the data.
+        x_column_name : str
+            The name of the x column.
+        y_column_name : str
+            The name of the y column.
+
+        Returns:
+        --------
+        RegressionStats:
+            The accumulated statistics.
+        """
+        from streamStats import RegressionStats
+        if not isinstance(df, (LazyCSV, ChunkedCSV)):
+            with span('regression'):
+                regression = RegressionStats()
+                regression.update(df[x_column_name].to_numpy(), df[y_column_name].to_numpy())
+            return regression
+
+        key, identity = self.dataset_key(df)
+        cached_identity, regression = self.regressions.get((key, x_column_name, y_column_name), (None, None))
+        if regression is None or cached_identity != identity:
+            with span('regression'):
+                regression = RegressionStats()
+                if isinstance(df, ChunkedCSV):
+                    for chunk in df.iter_chunks(usecols=list(dict.fromkeys([x_column_name, y_column_name]))):
+                        regression.update(chunk[x_column_name], chunk[y_column_name])
+                else:
+                    regression.update(df[x_column_name].to_numpy(), df[y_column_name].to_numpy())
+            self.regressions[(key, x_column_name, y_column_name)] = (identity, regression)
+        return regression
+
+    def column_histograms(self, df, column_names):
+        """
+        Returns the histograms of the numeric columns among column_names over shared bin edges.
+
+        The edges span the range of all of the columns, taken from the column statistics, and the counts of
+        every column are accumulated in one vectorized pass over a block of all columns at once, chunk by chunk
+        for lazy datasets and streamed files. A single column reuses the histogram of its column statistics
+        without touching the data again. The result is cached per dataset and set of columns.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset containing the data.
+        column_names : list of str
+            The columns to count. Columns without numeric values, like text columns, are left out.
+
+        Returns:
+        --------
+        MultiHistogram or None:
+            The histograms, or None if none of the columns is numeric.
+        """
+        import numpy as np
+        from columnStats import HIST_BINS
+        from streamStats import MultiHistogram
+        stats = self.column_stats(df, column_names)
+        numeric = [column_name for column_name in dict.fromkeys(column_names) if stats[column_name].edges is not None]
+        if not numeric:
+            return None
+
+        key, identity = self.dataset_key(df)
+        cached_identity, histogram = self.histograms.get((key, tuple(numeric)), (None, None))
+        if histogram is not None and cached_identity == identity:
+            return histogram
+
+        if len(numeric) == 1:
+            column_stats = stats[numeric[0]]
+            histogram = MultiHistogram(numeric, len(column_stats.counts), (column_stats.min, column_stats.max))
+            histogram.counts[0] = column_stats.counts
+        else:
+            value_range = (min(stats[column_name].min for column_name in numeric),
+                           max(stats[column_name].max for column_name in numeric))
+            histogram = MultiHistogram(numeric, HIST_BINS, value_range)
+            with span('histogram'):
+                if self.reads_in_chunks(df):
+                    chunks = df.iter_chunks(usecols=numeric)
+                else:
+                    chunks = [df]
+                for chunk in chunks:
+                    histogram.update(chunk[numeric].to_numpy(dtype=float, na_value=np.nan))
+
+        self.histograms[(key, tuple(numeric))] = (identity, histogram)
+        return histogram
+
+    @profiled('draw artists')
+    def draw_histogram(self, df, column_name, color=None, histogram=None):
+        """
+        Draws the histogram of a column onto the current figure as a step artist.
+
+        The bins and counts are precomputed, so the raw data is not touched again to draw the histogram, and
+        one step patch is drawn per column instead of one rectangle per bin. A column drawn alone is filled,
+        columns overlaid on shared bins are drawn as outlines so that all of them stay visible. Columns without
+        numeric values, like text columns, fall back to pandas.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset containing the data to be plotted.
+        column_name : str
+            The name of the column to be plotted.
+        color : str, optional
+            The color of the histogram. If not provided, the next color of the matplotlib cycle is used.
+        histogram : MultiHistogram, optional
+            Shared bin histograms from column_histograms. Default is the histogram of column_name alone.
+
+        Returns:
+        --------
+        None
+        """
+        import matplotlib.pyplot as plt
+        if histogram is None:
+            histogram = self.column_histograms(df, [column_name])
+        if histogram is None or column_name not in histogram.column_names:
+            if isinstance(df, ChunkedCSV):
+                print(f"Column {column_name} has no numeric values to plot as a histogram.")
+            else:
+                df[column_name].plot(kind='hist', color=color, edgecolor='black', legend = column_name)
+            return
+        counts = histogram.column_counts(column_name)
+        if len(histogram.column_names) == 1:
+            plt.stairs(counts, histogram.edges, fill=True, facecolor=color, edgecolor='black', label=column_name)
+        else:
+            plt.stairs(counts, histogram.edges, color=color, linewidth=1.5, label=column_name)
+        plt.legend()
+
+    def column_bars(self, df, column_names, aggregation='count', key_column=None, top=20):
+        """
+        Aggregates columns into the bars of a bar plot, so the plot has one bar per group instead of one per row.
+
+        Without a key column the groups are the distinct values of the columns, counted like value_counts.
+        With a key column the rows are grouped by its values and every column is counted, summed or averaged
+        per group. The groups beyond the top ones are merged into one 'other' group. Streamed files are
+        aggregated chunk by chunk in one pass.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset containing the data.
+        column_names : list of str
+            The columns drawn as bars.
+        aggregation : str, optional
+            'count', 'sum' or 'mean'. Default is 'count'.
+        key_column : str, optional
+            The name of the column to group the rows by. Required for 'sum' and 'mean'.
+        top : int, optional
+            Number of groups drawn on their own. Default is 20.
+
+        Returns:
+        --------
+        pandas.DataFrame or None:
+            The bar heights, one row per group and one column per column name, or None if the columns cannot
+            be aggregated that way.
+        """
+        from streamStats import GroupedBars
+        try:
+            bars = GroupedBars(column_names, aggregation, key_column, top)
+            with span('aggregate bars'):
+                if isinstance(df, ChunkedCSV):
+                    chunks = df.iter_chunks(usecols=bars.usecols())
+                else:
+                    chunks = [df[bars.usecols()]]
+                for chunk in chunks:
+                    bars.update(chunk)
+                return bars.bars()
+        except ValueError as error:
+            print(error)
+            return None
+
+    @profiled('draw artists')
+    def draw_bars(self, bars, column_name, color=None):
+        """
+        Draws the bars of a column onto the current figure, next to the bars of the other columns of each group.
+
+        Parameters:
+        -----------
+        bars : pandas.DataFrame
+            Bar heights from column_bars.
+        column_name : str
+            The name of the column to be plotted.
+        color : str, optional
+            The color of the bars. If not provided, the next color of the matplotlib cycle is used.
+
+        Returns:
+        --------
+        None
+        """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        columns = list(bars.columns)
+        width = 0.8 / len(columns)
+        positions = np.arange(len(bars))
+        offset = (columns.index(column_name) - (len(columns) - 1) / 2) * width
+        plt.bar(positions + offset, bars[column_name].to_numpy(), width, color=color, edgecolor='black',
+                label=column_name)
+        # long labels of many groups would overlap unless they are slanted
+        slanted = len(bars) > 8 or max((len(label) for label in bars.index), default=0) > 12
+        plt.xticks(positions, bars.index, rotation=45 if slanted else 0, ha='right' if slanted else 'center')
+        if slanted:
+            # laid out when the figure is drawn, so the labels are not cut off at the bottom
+            plt.gcf().set_layout_engine('tight')
+        plt.legend()
+
+    def column_boxes(self, df, column_names):
+        """
+        Returns the box plot statistics of the numeric columns among column_names.
+
+        Datasets held in memory get exact quartiles, whiskers and outliers, computed like matplotlib's boxplot,
+        and so do columns of a lazy dataset that are loaded or in the column cache. Other columns of lazy
+        datasets and streamed files are summarized by a quantile sketch of every column instead, built in
+        one pass over the file and kept with the column statistics, so a box plot of a file larger than memory
+        takes bounded memory and is drawn without reading the file again. The sketched quartiles and median are
+        within the rank error of the sketch, and only the minimum and maximum are drawn as outliers.
+
+        Parameters:
+        -----------
+        df : pandas.DataFrame, LazyCSV or ChunkedCSV
+            The dataset containing the data.
+        column_names : list of str
+            The columns to summarize. Columns without numeric values, like text columns, are left out.
+
+        Returns:
+        --------
+        dict:
+            Column name -> (stats, error) where stats is in the format of matplotlib.cbook.boxplot_stats, and
+            error is None for exact statistics or (rank error, lower bounds, upper bounds) of the quartiles and
+            median.
+        """
+        import numpy as np
+        from matplotlib import cbook
+        from streamStats import QuantileSketch
+        stats = self.column_stats(df, column_names)
+        numeric = []
+        for column_name in dict.fromkeys(column_names):
+            if stats[column_name].numeric and stats[column_name].count:
+                numeric.append(column_name)
+            else:
+                print(f"Column {column_name} has no numeric values to plot as a box plot.")
+
+        boxes = {}
+        if not self.reads_in_chunks(df) or isinstance(df, LazyCSV) and df.is_available(numeric):
+            for column_name in numeric:
+                values = df[column_name].to_numpy(dtype=float, na_value=np.nan)
+                boxes[column_name] = (cbook.boxplot_stats(values[~np.isnan(values)])[0], None)
+            return boxes
+
+        missing = [column_name for column_name in numeric if stats[column_name].sketch is None]
+        if missing:
+            sketches = {column_name: QuantileSketch() for column_name in missing}
+            with span('quantile sketch'):
+                for chunk in df.iter_chunks(usecols=missing):
+                    for column_name in missing:
+                        sketches[column_name].update(chunk[column_name].to_numpy(dtype=float, na_value=np.nan))
+            for column_name, sketch in sketches.items():
+                stats[column_name].sketch = sketch
+            key, _ = self.dataset_key(df)
+            source, source_identity = self.stats_source(df, key)
+            self.write_stats(source, self.stats[key][1], source_identity)
+
+        quartiles = np.array([0.25, 0.5, 0.75])
+        for column_name in numeric:
+            sketch = stats[column_name].sketch
+            rank_error = sketch.rank_error()
+            error = None
+            if rank_error:
+                error = (rank_error, sketch.quantiles(quartiles - rank_error), sketch.quantiles(quartiles + rank_error))
+            boxes[column_name] = (sketch.box_stats(), error)
+        return boxes
+
+    @profiled('draw artists')
+    def draw_box(self, boxes, column_name, color=None, quantile_error=False):
+        """
+        Draws the box of a column onto the current figure, next to the boxes of the other columns.
+
+        Parameters:
+        -----------
+        boxes : dict
+            Box plot statistics from column_boxes.
+        column_name : str
+            The name of the column to be plotted.
+        color : str, optional
+            The color of the box. Default is the matplotlib style.
+        quantile_error : bool, optional
+            Draw the range the sketched quartiles and median may lie in as error bars next to the box, and
+            state the rank error in the legend. Default is False.
+
+        Returns:
+        --------
+        None
+        """
+        import matplotlib.pyplot as plt
+        if column_name not in boxes:
+            return
+        stats, error = boxes[column_name]
+        position = list(boxes).index(column_name) + 1
+        props = {} if color is None else {'color': color}
+        plt.gca().bxp([stats], positions=[position], widths=0.5, manage_ticks=False, boxprops=props,
+                      whiskerprops=props, capprops=props, medianprops=props,
+                      flierprops={} if color is None else {'markeredgecolor': color})
+        plt.xticks(range(1, len(boxes) + 1), list(boxes))
+        plt.xlim(0.5, len(boxes) + 0.5)
+        if not quantile_error:
+            return
+        if error is None:
+            plt.plot([], [], linestyle='none', label=f'{column_name}: exact quartiles')
+        else:
+            rank_error, lows, highs = error
+            values = [stats['q1'], stats['med'], stats['q3']]
+            plt.errorbar([position + 0.32] * 3, values, yerr=[values - lows, highs - values], fmt='none',
+                         ecolor=color or 'black', capsize=3,
+                         label=f'{column_name}: quartile rank error ±{rank_error:.1%}')
+        plt.legend()
+
+    @profiled('draw artists')
+    def draw_line(self, series, color=None):
+        """
+        Draws a column as a line against its row index onto the current figure.
+
+        Unless decimation is None, numeric series longer than twice the pixel width of the axes are first
+        reduced with the configured decimation method, so drawing time no longer grows with the number of rows.
+        Missing values still break the line.
+
+        Parameters:
+        -----------
+        series : pandas.Series
+            The column to be plotted.
+        color : str, optional
+            The color of the line. If not provided, the next color of the matplotlib cycle is used.
+
+        Returns:
+        --------
+        None
+        """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        import decimate
+        x_values = series.index.to_numpy()
+        if not np.issubdtype(x_values.dtype, np.number):
+            x_values = np.arange(len(series))
+        y_values = series.to_numpy()
+
+        pixels = int(plt.gca().bbox.width)
+        # text and other values without an order of magnitude are drawn as they are
+        numeric = np.issubdtype(y_values.dtype, np.number)
+        if self.decimation == 'minmax' and numeric:
+            x_values, y_values = decimate.minmax(x_values, y_values, pixels)
+        elif self.decimation == 'lttb' and numeric:
+            x_values, y_values = decimate.lttb(x_values, y_values, 2 * pixels)
+
+        plt.plot(x_values, y_values, color=color, label=series.name)
+        plt.legend()
+
+    @profiled('draw artists')
+    def draw_scatter(self, x_values, y_values, label=None):
+        """
+        Draws a scatter plot onto the current figure.
+
+        Unless decimation is None, numeric points are thinned to one point per pixel of the axes first,
+        which looks the same but keeps the number of markers bounded by the size of the axes.
+
+        Parameters:
+        -----------
+        x_values : array-like
+            The x values.
+        y_values : array-like
+            The y values.
+        label : str, optional
+            The legend label of the scatter plot.
+
+        Returns:
+        --------
+        None
+        """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        import decimate
+        x_values = np.asarray(x_values)
+        y_values = np.asarray(y_values)
+        numeric = np.issubdtype(x_values.dtype, np.number) and np.issubdtype(y_values.dtype, np.number)
+        if self.decimation is not None and numeric:
+            bbox = plt.gca().bbox
+            x_values, y_values = decimate.thin_scatter(x_values, y_values, int(bbox.width), int(bbox.height))
+        plt.scatter(x_values, y_values, label=label)
+
+    @profiled('draw artists')
+    def draw_density(self, histogram):
+        """
+        Draws a 2D histogram as a single image with a logarithmic color scale onto the current figure.
+
+        The cost of drawing depends only on the resolution of the grid, not on the number of rows counted.
+        Empty bins are left transparent.
+
+        Parameters:
+        -----------
+        histogram : StreamingHistogram2D
+            The counts to be drawn.
+
+        Returns:
+        --------
+        None
+        """
+        import numpy as np
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LogNorm
+        counts = np.ma.masked_equal(histogram.counts.T, 0)
+        extent = [histogram.x_edges[0], histogram.x_edges[-1], histogram.y_edges[0], histogram.y_edges[-1]]
+        norm = LogNorm() if counts.count() else None
+        image = plt.imshow(counts, origin='lower', extent=extent, aspect='auto', norm=norm, interpolation='nearest')
+        plt.colorbar(image, label='Rows per bin')
+
     def display_help(self):
         print("\nHelp Menu:")
         print("1. Enter '1' to read a CSV file.")
@@ -435,7 +1742,12 @@ class csvReader():
         print("4. Enter '4' to display this help menu.")
         print("5. Enter '5' to exit the program.")
 
-def main():
+ACTIONS = {'1': 'Read CSV file', '2': 'Display available plot options', '3': 'Plot a column',
+           '4': 'Plot two columns against each other', '5': 'Save plot of column',
+           '6': 'Save plot of two columns against each other', '7': 'Follow a CSV file'}
+
+
+def main(argv=None):
     """
     Interactive command-line interface for handling CSV data and plotting.
 
@@ -443,14 +1755,55 @@ def main():
     displaying plot options, plotting columns, plotting two columns against each other,
     and saving plots. The user can enter 'help' for assistance and 'exit' to exit the program.
 
+    Files are loaded and plots are saved in the background, so the current dataset can still be
+    browsed and plotted meanwhile. The menu shows the progress of the running tasks, 'w' waits
+    for them with a live progress line and 'c' cancels one.
+
+    With --profile, every action is followed by a table of the time and peak memory of its
+    stages, --no-memory leaves out the memory. With --trace FILE, all recorded stages are also
+    written to FILE on exit, in the Chrome trace event format.
+
+    Parameters:
+    -----------
+    argv : list of str, optional
+        Command-line arguments. Default is sys.argv[1:].
+
     Returns:
     --------
     None
     """
-    df = None
+    import argparse
+    parser = argparse.ArgumentParser(description="Read CSV files and plot their columns.")
+    parser.add_argument('--profile', action='store_true', help="show the time and memory of every stage of each action")
+    parser.add_argument('--trace', metavar='FILE', help="write the profiled stages to FILE on exit (implies --profile)")
+    parser.add_argument('--no-memory', action='store_true', help="profile times only, tracking memory slows rendering down")
+    args = parser.parse_args(argv)
+
     printer = p()
-    obj = csvReader()
+    obj = csvReader(profile=args.profile or args.trace is not None, profile_memory=not args.no_memory)
+    try:
+        run_menu(obj, printer)
+    finally:
+        if args.trace is not None:
+            default_profiler.export_trace(args.trace)
+            print(f"Trace written to {args.trace}")
+
+
+def run_menu(obj, printer):
+    """
+    Runs the menu loop of main until the user exits.
+
+    Parameters:
+    -----------
+    obj : csvReader
+        The reader that performs the actions.
+    printer : ColoredPrinter
+        Printer for the menu.
+    """
+    df = None
+    tasks = []
     while True:
+        df = collect_tasks(tasks, df, printer)
         # printer.print("\nMenu:", color="green", options=["bold"])
         # printer.print("1. Read CSV file",color="black", options=["bold"])
         # printer.print("2. Display available plot options",color="black", options=["bold"])
@@ -466,12 +1819,21 @@ def main():
         printer.print("4. Plot two columns againts eachother", options=["bold"])
         printer.print("5. Save plot of column", options=["bold"])
         printer.print("6. Save plot of two columns againts eachother",options=["bold"])
+        printer.print("7. Follow a CSV file that is being appended to",options=["bold"])
         printer.print("'help' Help",options=["bold"])
         printer.print("'exit' Exit",options=["bold"])
+        if tasks:
+            printer.print("'w' Wait for the background tasks, 'c' Cancel one", options=["bold"])
+            for task in tasks:
+                printer.print(f"  {task.name}: {task.progress.describe()}", color="cyan")
         choice = input(">>> ")
         print(choice)
+        default_profiler.start_action(ACTIONS.get(choice))
         if choice == '1':
-            df = obj.read_csv_file()
+            # loads run in the background, the current dataset stays usable until the new one is loaded
+            task = obj.read_csv_file(background=True)
+            if task is not None:
+                tasks.append(task)
         elif choice == '2':
             if df is not None:
                 obj.display_plot_options(df)
@@ -482,15 +1844,18 @@ def main():
                 obj.display_plot_options(df)
                 column_indexs = []
                 while True:
-                    printer.print("CURRENTLY ONLY SUPPORTING ONE COLUMN PLOTTING FOR BAR PLOTS", color="red", options=['bold'])
                     column_index = int(input("Enter the index of the column to plot (enter -1 to stop input): "))
                     if column_index == -1:
                         break
                     else:
                         column_indexs = column_indexs + [column_index]
                 options = input("Supported types are 'hist', 'line', 'bar', 'box' (default is hist): ")
+                bars = ask_bars(df) if options == 'bar' else ('count', None, 20)
+                quantile_error = options == 'box' and ask_quantile_error()
                 plot_title = input("Enter in a plot title (or hit enter for default): ")
-                obj.plot_column(df, column_indexs, options, plot_title)
+                plot_df = ask_filter(obj, df)
+                if plot_df is not None and bars is not None:
+                    obj.plot_column(plot_df, column_indexs, options, plot_title, *bars, quantile_error)
             else:
                 print("Please load a CSV file first.")
         elif choice == '4':
@@ -498,12 +1863,13 @@ def main():
                 obj.display_plot_options(df)
                 x_column = int(input("Enter the index of the x-axis column: "))
                 y_column = int(input("Enter the index of the y-axis column: "))
-                options = input("Enter in any options like line, or scatter plot: ")
+                options = input("Enter in any options like line, scatter or density plot: ")
                 plot_title = input("Enter in a plot title (or hit enter for default): ")
-                if 0 <= x_column < len(df.columns) and 0 <= y_column < len(df.columns):
-                    obj.plot_versus(df, x_column, y_column, options, plot_title)
-                else:
+                plot_df = ask_filter(obj, df)
+                if not (0 <= x_column < len(df.columns) and 0 <= y_column < len(df.columns)):
                     print(f"One or both of the columns not found in the dataset.")
+                elif plot_df is not None:
+                    obj.plot_versus(plot_df, x_column, y_column, options, plot_title)
             else:
                 print(f"Please load a CSV file first.")
         elif choice == '5':
@@ -511,38 +1877,209 @@ def main():
                 obj.display_plot_options(df)
                 column_indexs = []
                 while True:
-                    printer.print("CURRENTLY ONLY SUPPORTING ONE COLUMN PLOTTING FOR BAR PLOTS", color="red", options=['bold'])
                     column_index = int(input("Enter the index of the column to plot (enter -1 to stop input): "))
                     if column_index == -1:
                         break
                     else:
                         column_indexs = column_indexs + [column_index]
                 options = input("Supported types are 'hist', 'line', 'bar', 'box': ")
+                bars = ask_bars(df) if options == 'bar' else ('count', None, 20)
+                quantile_error = options == 'box' and ask_quantile_error()
                 plot_title = input("Enter in a plot title (or hit enter for default): ")
                 doc_type = input("Supported formats to save to are 'pdf', 'png', 'svg' (for default hit enter): ")
                 doc_title = input("Enter a title for the document (for default hit enter): ")
-                obj.save_plot_column(df, column_indexs, options, plot_title, doc_type, doc_title)
+                plot_df = ask_filter(obj, df)
+                if plot_df is not None and bars is not None:
+                    start_render(tasks, f"Saving {doc_title or 'default'}", obj.save_plot_column,
+                                 plot_df, column_indexs, options, plot_title, doc_type, doc_title, *bars,
+                                 quantile_error, columns=column_indexs + [bars[1]])
         elif choice == '6':
             if df is not None:
                 obj.display_plot_options(df)
                 x_column = int(input("Enter the index of the x-axis column: "))
                 y_column = int(input("Enter the index of the y-axis column: "))
-                options = input("Enter in any options like line, or scatter plot: ")
+                options = input("Enter in any options like line, scatter or density plot: ")
                 plot_title = input("Enter in a plot title (or hit enter for default): ")
                 doc_type = input("Supported formats to save to are 'pdf', 'png', 'svg' (for default hit enter): ")
                 doc_title = input("Enter a title for the document (for default hit enter): ")
-                if 0 <= x_column < len(df.columns) and 0 <= y_column < len(df.columns):
-                    obj.save_plot_versus(df, x_column, y_column, options, plot_title, doc_type, doc_title)
-                else:
+                plot_df = ask_filter(obj, df)
+                if not (0 <= x_column < len(df.columns) and 0 <= y_column < len(df.columns)):
                     print(f"One or both of the columns not found in the dataset.")
+                elif plot_df is not None:
+                    start_render(tasks, f"Saving {doc_title or 'default'}", obj.save_plot_versus,
+                                 plot_df, x_column, y_column, options, plot_title, doc_type, doc_title,
+                                 columns=[x_column, y_column])
             else:
                 print(f"Please load a CSV file first.")
+        elif choice == '7':
+            followed_df = obj.follow_csv_file()
+            if followed_df is not None:
+                df = followed_df
 
+        elif choice == 'w':
+            wait_for_tasks(tasks)
+        elif choice == 'c':
+            cancel_task(tasks)
         elif choice == 'help':
             printer.print("\nUse the commands below", color = "red", options=["bold"])    
         elif choice == "exit":
+            for task in tasks:
+                task.cancel()
+            wait_for_tasks(tasks)
             printer.print("Exiting the program.", color="red", options=["bold"])
             break
-        
+        default_profiler.end_action()
+
+
+def ask_filter(obj, df):
+    """
+    Asks for a row filter for a plot and returns the rows of df that meet it.
+
+    Returns:
+    --------
+    The filtered dataset, df if no filter was entered, or None if the filter is invalid.
+    """
+    expression = input("Filter the rows, e.g. Delay > 3.5 (or hit enter for all rows): ").strip()
+    if not expression:
+        return df
+    return obj.filter_dataset(df, expression)
+
+
+def ask_bars(df):
+    """
+    Asks how the rows of a bar plot are aggregated into bars.
+
+    Returns:
+    --------
+    The aggregation, key column index and number of groups for plot_column, or None if the answers are invalid.
+    """
+    from streamStats import BAR_AGGREGATIONS
+    aggregation = input("Aggregate the bars by 'count', 'sum' or 'mean' (default is count): ").strip() or 'count'
+    key = input("Enter the index of the column to group the rows by "
+                "(or hit enter to count the values of the plotted columns): ").strip()
+    top = input("Enter the number of groups to show, the rest are merged into 'other' (default is 20): ").strip()
+    if aggregation not in BAR_AGGREGATIONS:
+        print(f"Unsupported aggregation {aggregation}, supported aggregations: {', '.join(BAR_AGGREGATIONS)}.")
+        return None
+    if not (key == '' or key.isdigit() and int(key) < len(df.columns)) or not (top == '' or top.isdigit()):
+        print(f"The key column must be a column index and the number of groups a whole number.")
+        return None
+    return aggregation, int(key) if key else None, int(top) if top else 20
+
+
+def ask_quantile_error():
+    """
+    Asks whether a box plot shows the error bound of quartiles drawn from a quantile sketch.
+    """
+    return input("Show the error bound of sketched quartiles? (y/n, default n): ").lower() == 'y'
+
+
+def start_render(tasks, name, function, *args, columns=()):
+    """
+    Runs a save function of the menu in a background process and adds it to tasks.
+
+    The process is forked from the menu thread. Where processes cannot be forked, or while a load is
+    running on another thread, the plot is saved in the foreground instead. If the dataset, the first
+    of args, is a LazyCSV that has not loaded the plotted columns yet, they are loaded on a background
+    thread first, and collect_tasks starts the render once they have been loaded.
+
+    Parameters:
+    -----------
+    columns : list of int, optional
+        Indexes of the columns the plot reads. None and invalid indexes are ignored.
+    """
+    from backgroundTask import BackgroundTask, can_fork, fork_process, wait_for_process
+    df = args[0]
+    if isinstance(df, LazyCSV):
+        names = [df.columns[index] for index in columns if index is not None and 0 <= index < len(df.columns)]
+        missing = [name for name in dict.fromkeys(names) if name not in df.loaded]
+        if missing:
+            task = BackgroundTask(f"Loading {', '.join(missing)}", df.load_columns, missing)
+            task.then = (name, function, args)
+            tasks.append(task)
+            return
+    loading = any(not task.done() and task.process is None for task in tasks)
+    if not can_fork() or loading:
+        if loading:
+            print("Saving in the foreground while a load is running.")
+        function(*args)
+        return
+    process = fork_process(function, *args)
+    task = BackgroundTask(name, wait_for_process, process)
+    task.process = process
+    tasks.append(task)
+
+
+def collect_tasks(tasks, df, printer):
+    """
+    Removes the finished background tasks from tasks and reports how they ended.
+
+    Returns:
+    --------
+    The dataset of the last load that finished, or df if no load has finished.
+    """
+    from backgroundTask import Cancelled
+    for task in [task for task in tasks if task.done()]:
+        tasks.remove(task)
+        try:
+            result = task.result()
+        except Cancelled:
+            printer.print(f"{task.name}: cancelled.", color="red")
+        except Exception as error:
+            printer.print(f"{task.name}: failed, {error}", color="red")
+        else:
+            printer.print(f"{task.name}: finished.", color="green")
+            if task.then is not None:
+                # the columns of a plot have been loaded, now it is rendered
+                name, function, args = task.then
+                start_render(tasks, name, function, *args)
+            # renders return None, loads the dataset
+            elif result is not None:
+                df = result
+    return df
+
+
+def wait_for_tasks(tasks):
+    """
+    Shows the progress of the background tasks on one line until all of them have finished.
+
+    Ctrl+C cancels them.
+    """
+    import shutil
+    import time
+    try:
+        while not all(task.done() for task in tasks):
+            status = '; '.join(f"{task.name}: {task.progress.describe()}" for task in tasks if not task.done())
+            width = shutil.get_terminal_size().columns - 1
+            print(f"\r{status[:width]:<{width}}", end='', flush=True)
+            time.sleep(0.2)
+    except KeyboardInterrupt:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            task.thread.join()
+    print()
+
+
+def cancel_task(tasks):
+    """
+    Cancels a running background task, asking which one if several are running, and waits for it to stop.
+    """
+    running = [task for task in tasks if not task.done()]
+    if not running:
+        print("No background task is running.")
+        return
+    if len(running) > 1:
+        for index, task in enumerate(running):
+            print(f"{index}. {task.name}: {task.progress.describe()}")
+        try:
+            running = [running[int(input("Enter the index of the task to cancel: "))]]
+        except (ValueError, IndexError):
+            print("Invalid input. Please enter a valid index.")
+            return
+    running[0].cancel()
+    wait_for_tasks(running)
+
+
 if __name__ == "__main__":
     main()
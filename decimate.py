@@ -0,0 +1,166 @@
+"""
+Render-time decimation of long series before they are handed to matplotlib.
+
+A series with millions of points cannot show more detail than the axes have pixels, so each
+function here reduces the points to roughly the pixel size of the axes while keeping what
+the eye would see: peaks for line plots and every occupied pixel for scatter plots.
+"""
+
+import numpy as np
+
+
+def _missing(x, y):
+    missing = np.isnan(np.asarray(y, dtype=float))
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.floating):
+        missing |= np.isnan(x)
+    return missing
+
+
+def _with_breaks(x, y, kept, missing):
+    """
+    Returns the points of x and y at the sorted positions kept.
+
+    Where missing values lie between two kept points, the first of them is kept as well, so the
+    line is broken there as it would be without decimation instead of bridging the gap.
+    """
+    gaps = np.flatnonzero(missing)
+    if gaps.size and kept.size > 1:
+        # the first missing position after each kept point, if it comes before the next kept point
+        after = np.searchsorted(gaps, kept[:-1])
+        found = after < gaps.size
+        breaks = gaps[np.minimum(after, gaps.size - 1)]
+        kept = np.sort(np.concatenate([kept, breaks[found & (breaks < kept[1:])]]))
+    return np.asarray(x)[kept], np.asarray(y, dtype=float)[kept]
+
+
+def minmax(x, y, n_buckets):
+    """
+    Keeps the minimum and maximum point of each of n_buckets equally sized row buckets.
+
+    Parameters:
+    -----------
+    x : numpy.ndarray
+        The x values, in drawing order.
+    y : numpy.ndarray
+        The numeric y values. Missing values break the line.
+    n_buckets : int
+        Number of buckets, usually the pixel width of the axes.
+
+    Returns:
+    --------
+    tuple of numpy.ndarray:
+        The decimated x and y values, at most 2 * n_buckets points in their original order plus a missing
+        value wherever the line breaks between them. A series that needs no reduction is returned as it is.
+    """
+    if len(y) <= 2 * n_buckets:
+        return x, y
+    missing = _missing(x, y)
+    valid = np.flatnonzero(~missing)
+    values = np.asarray(y, dtype=float)[valid]
+    n = values.size
+    if n <= 2 * n_buckets:
+        return _with_breaks(x, y, valid, missing)
+
+    bucket_size = -(-n // n_buckets)
+    n_buckets = -(-n // bucket_size)
+    padding = n_buckets * bucket_size - n
+    grid_low = np.append(values, np.full(padding, np.inf)).reshape(n_buckets, bucket_size)
+    grid_high = np.append(values, np.full(padding, -np.inf)).reshape(n_buckets, bucket_size)
+
+    offsets = np.arange(n_buckets) * bucket_size
+    picks = np.column_stack([offsets + grid_low.argmin(axis=1), offsets + grid_high.argmax(axis=1)])
+    # keep the two extremes of a bucket in row order so the line does not double back
+    picks = np.unique(np.sort(picks, axis=1).ravel())
+    return _with_breaks(x, y, valid[picks], missing)
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling to n_out points.
+
+    The bucket means are computed in one vectorized pass. Choosing a point depends on the point
+    chosen in the bucket before it, so the selection walks the buckets with vectorized work
+    inside each bucket.
+
+    Parameters:
+    -----------
+    x : numpy.ndarray
+        The numeric x values, in drawing order.
+    y : numpy.ndarray
+        The numeric y values. Missing values break the line.
+    n_out : int
+        Number of points to keep, usually twice the pixel width of the axes.
+
+    Returns:
+    --------
+    tuple of numpy.ndarray:
+        The decimated x and y values, plus a missing value wherever the line breaks between them. A series
+        that needs no reduction is returned as it is.
+    """
+    if n_out >= len(y) or n_out < 3:
+        return x, y
+    missing = _missing(x, y)
+    valid = np.flatnonzero(~missing)
+    values = np.asarray(y, dtype=float)[valid]
+    n = values.size
+    if n_out >= n:
+        return _with_breaks(x, y, valid, missing)
+
+    xf = np.asarray(x)[valid].astype(float)
+    # the first and last points are always kept, the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    counts = np.diff(edges)
+    x_means = np.add.reduceat(xf[:-1], edges[:-1]) / counts
+    y_means = np.add.reduceat(values[:-1], edges[:-1]) / counts
+    x_means = np.append(x_means, xf[-1])
+    y_means = np.append(y_means, values[-1])
+
+    picks = np.empty(n_out, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        xa, ya = xf[previous], values[previous]
+        areas = np.abs((xa - x_means[bucket + 1]) * (values[start:end] - ya)
+                       - (xa - xf[start:end]) * (y_means[bucket + 1] - ya))
+        previous = start + int(areas.argmax())
+        picks[bucket + 1] = previous
+    return _with_breaks(x, y, valid[picks], missing)
+
+
+def thin_scatter(x, y, width, height):
+    """
+    Keeps one point per occupied pixel of a width x height grid over the data range.
+
+    Parameters:
+    -----------
+    x : numpy.ndarray
+        The numeric x values.
+    y : numpy.ndarray
+        The numeric y values.
+    width : int
+        Pixel width of the axes.
+    height : int
+        Pixel height of the axes.
+
+    Returns:
+    --------
+    tuple of numpy.ndarray:
+        The x and y values of the kept points.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if x.size <= width * height // 4:
+        return x, y
+
+    def to_pixels(values, size):
+        low, high = values.min(), values.max()
+        scale = (size - 1) / (high - low) if high > low else 0.0
+        return ((values - low) * scale).astype(np.int64)
+
+    cells = to_pixels(x, width) * height + to_pixels(y, height)
+    _, keep = np.unique(cells, return_index=True)
+    return x[keep], y[keep]
@@ -0,0 +1,116 @@
+import io
+import os
+
+
+class FollowedCSV():
+    """
+    Keeps a CSV file that is being appended to in memory, parsing only the bytes added since the last refresh.
+
+    The rows are stored in growable per-column buffers whose capacity doubles when full, so appending
+    costs time proportional to the new rows and frame() hands out a DataFrame over the buffers without
+    copying them. A file that shrinks, e.g. because a logger rotated it, is read again from the start.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the CSV file.
+
+    Example:
+    --------
+    >>> followed = FollowedCSV('log.csv')
+    >>> new_rows, reloaded = followed.refresh()
+    >>> df = followed.frame()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reload()
+
+    def reload(self):
+        """
+        Forgets all rows and reads the file again from the header.
+
+        While the file is empty or its header line is not complete yet, the dataset has no columns and
+        the header is read again on the next refresh.
+        """
+        import pandas as pd
+        with open(self.path, 'rb') as csv_file:
+            header = csv_file.readline()
+        self.rows = 0
+        self.buffers = {}
+        if not header.endswith(b'\n') or not header.strip():
+            self.columns = pd.Index([])
+            self.offset = 0
+            return
+        self.columns = pd.read_csv(io.BytesIO(header), nrows=0).columns
+        self.offset = len(header)
+
+    def refresh(self):
+        """
+        Parses the complete rows appended to the file since the last refresh.
+
+        A trailing line without a newline is left for the next refresh, since the writer may not have
+        finished it yet. The same goes for the header, no rows are read before it is complete.
+
+        Returns:
+        --------
+        tuple:
+            (new_rows, reloaded) where new_rows is a DataFrame of the rows added to the dataset and
+            reloaded is True if the file shrank, or its header was not complete before, and the dataset
+            was rebuilt from the start.
+        """
+        import pandas as pd
+        reloaded = os.path.getsize(self.path) < self.offset
+        if reloaded or self.offset == 0:
+            self.reload()
+            reloaded = True
+            if self.offset == 0:
+                return pd.DataFrame(), reloaded
+
+        with open(self.path, 'rb') as csv_file:
+            csv_file.seek(self.offset)
+            data = csv_file.read()
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            return pd.DataFrame(columns=self.columns), reloaded
+
+        new_rows = pd.read_csv(io.BytesIO(data[:end]), header=None, names=self.columns)
+        self.offset += end
+        self.append(new_rows)
+        return new_rows, reloaded
+
+    def append(self, new_rows):
+        import numpy as np
+        needed = self.rows + len(new_rows)
+        for column_name in self.columns:
+            values = new_rows[column_name].to_numpy()
+            buffer = self.buffers.get(column_name)
+            if buffer is None:
+                buffer = np.empty(max(needed, 1024), dtype=values.dtype)
+            else:
+                if buffer.dtype == values.dtype:
+                    dtype = buffer.dtype
+                elif buffer.dtype.kind in 'iuf' and values.dtype.kind in 'iuf':
+                    dtype = np.result_type(buffer.dtype, values.dtype)
+                else:
+                    dtype = np.dtype(object)
+                if dtype != buffer.dtype or buffer.size < needed:
+                    grown = np.empty(max(needed, 2 * buffer.size), dtype=dtype)
+                    grown[:self.rows] = buffer[:self.rows]
+                    buffer = grown
+            buffer[self.rows:needed] = values
+            self.buffers[column_name] = buffer
+        self.rows = needed
+
+    def frame(self):
+        """
+        Returns:
+        --------
+        pandas.DataFrame:
+            All rows read so far, as a view on the column buffers.
+        """
+        import pandas as pd
+        if not self.buffers:
+            return pd.DataFrame(columns=self.columns)
+        return pd.DataFrame({column_name: self.buffers[column_name][:self.rows] for column_name in self.columns},
+                            columns=self.columns, copy=False)
@@ -0,0 +1,272 @@
+from collections import OrderedDict
+
+from csvFormat import ParseOptions
+from profiler import span
+
+# rows per chunk when parsing only the rows that meet a row filter
+FILTER_CHUNK_ROWS = 100000
+
+
+class LazyCSV():
+    """
+    Opens a CSV file by reading only its header and a sample of rows, and loads columns on demand.
+
+    A column is parsed the first time it is asked for, with usecols projection so the parser only
+    converts that column, and then kept in a bounded least recently used cache. With a ColumnCache,
+    parsed columns are also written to disk and later opens memory-map them instead of parsing.
+    Load time and memory therefore scale with the columns that are used, not with the width of the file.
+
+    With a row filter, only the rows that meet it are kept. The filter is evaluated once on its own
+    columns, using the range indexes of the column cache to read only the blocks of rows it can accept,
+    and every column is then loaded with just those rows, keeping their row numbers as the index.
+
+    Indexing works like a DataFrame for the operations csvReader needs: lazy['a'] returns a Series and
+    lazy[['a', 'b']] a DataFrame.
+
+    Parameters:
+    -----------
+    path : str
+        Path to the plain or compressed CSV file.
+    cache : ColumnCache, optional
+        Binary column cache to read columns from and to add parsed columns to.
+    max_columns : int, optional
+        Maximum number of columns kept in memory. Default is 16.
+    compact : bool, optional
+        Downcast every loaded column to the smallest dtype that holds its values exactly. Default is False.
+    options : ParseOptions, optional
+        Parser engine and date parsing. Default is the options of cache, or the C engine without date parsing.
+    row_filter : str or RowFilter, optional
+        Keep only the rows that meet this pandas query expression, e.g. "Delay > 3.5". Default is all rows.
+
+    Example:
+    --------
+    >>> lazy = LazyCSV('bestSynths.csv')
+    >>> lazy.dtypes['Delay']
+    dtype('float64')
+    >>> delay = lazy['Delay']
+    """
+
+    SAMPLE_ROWS = 1000
+
+    def __init__(self, path, cache=None, max_columns=16, compact=False, options=None, row_filter=None):
+        self.path = path
+        self.cache = cache
+        self.max_columns = max_columns
+        self.compact = compact
+        self.options = options or (cache.options if cache is not None else ParseOptions())
+        if isinstance(row_filter, str):
+            from rowFilter import RowFilter
+            row_filter = RowFilter(row_filter)
+        self.row_filter = row_filter
+        # positions of the rows that meet row_filter, found on the first load
+        self.rows = None
+        sample = self.options.read_csv(path, nrows=self.SAMPLE_ROWS)
+        self.columns = sample.columns
+        if row_filter is not None and not row_filter.columns_in(self.columns):
+            raise ValueError(f"The filter {row_filter.expression!r} uses none of the columns of {path}.")
+        # inferred from the sample, the full column can still turn out wider, e.g. int -> float
+        self.dtypes = sample.dtypes
+        self.loaded = OrderedDict()
+        # column name -> (bytes as loaded, bytes after compaction) of the columns in memory
+        self.footprint = {}
+
+    def load_columns(self, column_names, progress=None):
+        """
+        Materializes the given columns, reading only the ones that are not in memory yet.
+
+        With a row filter, columns in the column cache are memory-mapped and only the rows that meet the
+        filter are copied out of them. Other columns are parsed chunk by chunk, keeping only the rows that
+        meet the filter, so the rejected rows are never held in memory. Such partial columns are not added
+        to the column cache.
+
+        Parameters:
+        -----------
+        column_names : list of str
+            The columns to load.
+        progress : backgroundTask.Progress, optional
+            Report the progress of parsing the columns, and stop when the load is cancelled.
+
+        Returns:
+        --------
+        dict:
+            Column name -> pandas.Series.
+        """
+        column_names = list(dict.fromkeys(column_names))
+        missing = [column_name for column_name in column_names if column_name not in self.loaded]
+        if missing:
+            if self.row_filter is None:
+                columns = self._read_columns(missing, progress)
+            else:
+                columns = self._read_filtered_columns(missing, progress)
+
+            with span('compact'):
+                for column_name in missing:
+                    self.loaded[column_name] = self._compact(columns[column_name])
+
+        columns = {}
+        for column_name in column_names:
+            self.loaded.move_to_end(column_name)
+            columns[column_name] = self.loaded[column_name]
+        # evict the least recently used columns, but never the ones just asked for
+        while len(self.loaded) > max(self.max_columns, len(column_names)):
+            evicted, _ = self.loaded.popitem(last=False)
+            self.footprint.pop(evicted, None)
+        return columns
+
+    def _read_columns(self, column_names, progress=None):
+        # every row of the columns, memory-mapped from the cache or parsed and added to it
+        import pandas as pd
+        columns = {}
+        if self.cache is not None:
+            with span('cache load'):
+                for column_name, values in self.cache.load_columns(self.path, column_names).items():
+                    columns[column_name] = pd.Series(values, name=column_name, copy=False)
+        unparsed = [column_name for column_name in column_names if column_name not in columns]
+        if unparsed:
+            with span('parse columns'):
+                parsed = self.options.read_csv(self.path, usecols=unparsed, progress=progress)
+            for column_name in unparsed:
+                columns[column_name] = parsed[column_name]
+            if self.cache is not None:
+                try:
+                    with span('cache store'):
+                        self.cache.store_columns(self.path, parsed, list(self.columns))
+                except OSError as error:
+                    print(f"Could not write the cache for {self.path}: {error}")
+        return columns
+
+    def _read_filtered_columns(self, column_names, progress=None):
+        # the rows that meet the filter, taken from the memory-mapped cache or parsed chunk by chunk
+        import numpy as np
+        import pandas as pd
+        from contextlib import closing
+        cached = self.cache.load_columns(self.path, column_names) if self.cache is not None else {}
+        unparsed = [column_name for column_name in column_names if column_name not in cached]
+        columns = {}
+        if unparsed:
+            read_columns = self.row_filter.read_columns(self.columns, unparsed)
+            with span('parse columns'):
+                chunks = self.options.read_csv(self.path, usecols=read_columns, chunksize=FILTER_CHUNK_ROWS,
+                                               progress=progress)
+                with closing(chunks):
+                    kept = list(self.row_filter.filter_chunks(chunks, unparsed))
+                frame = pd.concat(kept) if kept else self.options.read_csv(self.path, usecols=unparsed, nrows=0)
+            if self.rows is None:
+                # the chunks keep the positions of their rows in the file
+                self.rows = frame.index.to_numpy(dtype=np.int64)
+            for column_name in unparsed:
+                columns[column_name] = frame[column_name]
+        if cached:
+            rows = self.filtered_rows(progress)
+            with span('filter rows'):
+                for column_name, values in cached.items():
+                    columns[column_name] = pd.Series(values, name=column_name, copy=False).take(rows)
+        return columns
+
+    def filtered_rows(self, progress=None):
+        """
+        Returns the positions of the rows that meet the row filter, evaluating it on the first call.
+
+        With a column cache, every column the filter bounds to a range gets a ZoneMap index in the cache
+        the first time, and the filter is only evaluated on the rows of the blocks the most selective index
+        leaves, read from the memory-mapped columns. Without one, the filter columns are parsed chunk by chunk.
+
+        Returns:
+        --------
+        numpy.ndarray:
+            Row positions, in ascending order.
+        """
+        import numpy as np
+        import pandas as pd
+        from rowFilter import ZoneMap, rows_of
+        if self.rows is not None:
+            return self.rows
+        if self.cache is None:
+            from contextlib import closing
+            filter_columns = self.row_filter.columns_in(self.columns)
+            with span('filter rows'):
+                chunks = self.options.read_csv(self.path, usecols=filter_columns, chunksize=FILTER_CHUNK_ROWS,
+                                               progress=progress)
+                with closing(chunks):
+                    positions = [chunk.index.to_numpy(dtype=np.int64) for chunk in self.row_filter.filter_chunks(chunks)]
+            self.rows = np.concatenate(positions) if positions else np.empty(0, dtype=np.int64)
+            return self.rows
+        columns = self._read_columns(self.row_filter.columns_in(self.columns), progress)
+        with span('filter rows'):
+            candidates = None
+            if self.cache is not None:
+                zone_maps = {}
+                for column_name in self.row_filter.columns_in(self.row_filter.ranges):
+                    if column_name not in columns:
+                        continue
+                    zone_map = self.cache.load_index(self.path, column_name)
+                    if zone_map is None:
+                        zone_map = ZoneMap.build(columns[column_name].to_numpy())
+                        if zone_map is not None:
+                            try:
+                                self.cache.store_index(self.path, column_name, zone_map)
+                            except OSError as error:
+                                print(f"Could not write the index of {column_name} for {self.path}: {error}")
+                    if zone_map is not None:
+                        zone_maps[column_name] = zone_map
+                ranges = self.row_filter.candidate_rows({column_name: columns[column_name].to_numpy()
+                                                         for column_name in zone_maps}, zone_maps)
+                if ranges is not None:
+                    candidates = rows_of(ranges)
+            if candidates is None:
+                frame = pd.DataFrame(columns, copy=False)
+                candidates = np.arange(len(frame), dtype=np.int64)
+            else:
+                frame = pd.DataFrame({column_name: series.take(candidates) for column_name, series in columns.items()},
+                                     copy=False)
+            self.rows = candidates[self.row_filter.mask(frame)]
+        return self.rows
+
+    def is_available(self, column_names):
+        """
+        Returns True if every column is in memory or in the column cache, so reading it parses no CSV text.
+        """
+        missing = [column_name for column_name in column_names if column_name not in self.loaded]
+        if not missing:
+            return True
+        manifest = self.cache.read_manifest(self.path) if self.cache is not None else None
+        if manifest is None:
+            return False
+        cached = {column['name'] for column in manifest['columns']}
+        return all(column_name in cached for column_name in missing)
+
+    def _compact(self, series):
+        from compact import compact_series, memory_bytes
+        before = memory_bytes(series)
+        if self.compact:
+            series = compact_series(series)
+        self.footprint[series.name] = (before, memory_bytes(series))
+        return series
+
+    def iter_chunks(self, usecols=None, chunk_size=100000):
+        """
+        Yields the file as DataFrames of at most chunk_size rows, without keeping them in memory.
+
+        With a row filter, each chunk only holds the rows that meet it.
+
+        Parameters:
+        -----------
+        usecols : list, optional
+            Column names to parse. Other columns are skipped by the parser.
+        chunk_size : int, optional
+            Number of rows per chunk. Default is 100000.
+        """
+        if self.row_filter is not None:
+            read_columns = self.row_filter.read_columns(self.columns, usecols)
+            with self.options.read_csv(self.path, usecols=read_columns, chunksize=chunk_size) as reader:
+                yield from self.row_filter.filter_chunks(reader, usecols)
+            return
+        with self.options.read_csv(self.path, usecols=usecols, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk
+
+    def __getitem__(self, key):
+        import pandas as pd
+        if isinstance(key, list):
+            return pd.DataFrame(self.load_columns(key), columns=key)
+        return self.load_columns([key])[key]
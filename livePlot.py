@@ -0,0 +1,219 @@
+"""
+Figures that are updated in place as rows are appended to a FollowedCSV.
+
+Every plot keeps the incremental aggregations it is drawn from, so an update only costs time
+proportional to the new rows. Scatter plots keep one marker collection, whose points are thinned to
+one per pixel together with the new rows, so their redraw cost is bounded by the size of the axes. A histogram or density grid is rebuilt from all rows only when new
+values fall outside the bins it was built with.
+"""
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+import decimate
+from streamStats import RunningRange, MultiHistogram, StreamingHistogram2D, MinMaxEnvelope, RegressionStats
+
+
+class LiveColumnPlot():
+    """
+    Live 'line' or 'hist' plot of one or more columns.
+
+    Parameters:
+    -----------
+    column_names : list of str
+        The columns to be plotted.
+    plot_type : str
+        The type of plot ('line', 'hist').
+    plot_title : str
+        The title of the plot.
+    """
+
+    PLOT_TYPES = ('line', 'hist')
+
+    def __init__(self, column_names, plot_type, plot_title):
+        self.column_names = column_names
+        self.plot_type = plot_type
+        self.figure, self.axes = plt.subplots()
+        self.axes.set_title(plot_title)
+        self.axes.grid()
+        self.envelopes = {}
+        self.lines = {}
+        self.histogram = None
+        self.steps = {}
+
+    def update(self, frame, new_rows, reloaded):
+        """
+        Adds new_rows to the plot. frame holds every row, including new_rows.
+        """
+        if self.plot_type == 'line':
+            if reloaded or not self.envelopes:
+                self.axes.cla()
+                self.axes.grid()
+                self.envelopes = {column_name: MinMaxEnvelope() for column_name in self.column_names}
+                self.lines = {column_name: self.axes.plot([], [], label=column_name)[0]
+                              for column_name in self.column_names}
+                self.axes.legend()
+                new_rows = frame
+            for column_name in self.column_names:
+                self.envelopes[column_name].update(new_rows[column_name])
+                self.lines[column_name].set_data(*self.envelopes[column_name].points())
+        else:
+            if reloaded or self.histogram is None or not self._in_range(new_rows):
+                # every column is counted on the same bins, spanning the range of all of them
+                value_range = RunningRange()
+                column_names = []
+                for column_name in self.column_names:
+                    column_range = RunningRange()
+                    column_range.update(frame[column_name])
+                    if not column_range.is_empty():
+                        value_range.merge(column_range)
+                        column_names.append(column_name)
+                self.histogram = MultiHistogram(column_names, 10, (value_range.min, value_range.max)) if column_names else None
+                self.axes.cla()
+                self.axes.grid()
+                self.steps = {column_name: self.axes.stairs(np.zeros(len(self.histogram.counts[0])), self.histogram.edges,
+                                                            linewidth=1.5, label=column_name)
+                              for column_name in column_names}
+                if self.steps:
+                    self.axes.legend()
+                new_rows = frame
+            if self.histogram is not None:
+                self.histogram.update(new_rows[self.histogram.column_names].to_numpy(dtype=float, na_value=np.nan))
+                # one step artist per column, updated in place from the counts
+                for column_name, step in self.steps.items():
+                    step.set_data(self.histogram.column_counts(column_name))
+        self.axes.relim()
+        self.axes.autoscale_view()
+
+    def _in_range(self, new_rows):
+        value_range = RunningRange()
+        for column_name in self.column_names:
+            column_range = RunningRange()
+            column_range.update(new_rows[column_name])
+            if not column_range.is_empty() and column_name not in self.histogram.column_names:
+                # the first values of a column that was empty so far
+                return False
+            value_range.merge(column_range)
+        return (value_range.is_empty()
+                or (value_range.min >= self.histogram.edges[0] and value_range.max <= self.histogram.edges[-1]))
+
+
+class LiveVersusPlot():
+    """
+    Live 'scatter', 'line' or 'density' plot of two columns against each other.
+
+    Parameters:
+    -----------
+    x_column_name : str
+        The column on the x-axis.
+    y_column_name : str
+        The column on the y-axis.
+    plot_type : str
+        The type of plot ('scatter', 'line', 'density').
+    plot_title : str
+        The title of the plot.
+    density_bins : int, optional
+        Number of bins along each axis of the 'density' plot type. Default is 256.
+    """
+
+    PLOT_TYPES = ('scatter', 'line', 'density')
+
+    def __init__(self, x_column_name, y_column_name, plot_type, plot_title, density_bins=256):
+        self.x_column_name = x_column_name
+        self.y_column_name = y_column_name
+        self.plot_type = plot_type
+        self.density_bins = density_bins
+        self.figure, self.axes = plt.subplots()
+        self.plot_title = plot_title
+        self.regression = None
+        self.regression_line = None
+        self.points = None
+        self.histogram = None
+        self.image = None
+        self.colorbar = None
+
+    def _reset(self):
+        if self.colorbar is not None:
+            self.colorbar.remove()
+            self.colorbar = None
+        self.image = None
+        self.axes.cla()
+        self.axes.set_title(f'{self.x_column_name} versus {self.y_column_name} for {self.plot_title}')
+        self.axes.set_xlabel(self.x_column_name)
+        self.axes.set_ylabel(self.y_column_name)
+        self.axes.grid()
+        self.regression = RegressionStats()
+        self.regression_line = None
+        self.points = None
+
+    def update(self, frame, new_rows, reloaded):
+        """
+        Adds new_rows to the plot. frame holds every row, including new_rows.
+        """
+        if reloaded or self.regression is None:
+            self._reset()
+            self.histogram = None
+            new_rows = frame
+        x_values = np.asarray(new_rows[self.x_column_name], dtype=float)
+        y_values = np.asarray(new_rows[self.y_column_name], dtype=float)
+
+        if self.plot_type == 'density':
+            if self.histogram is None or not self._in_grid(x_values, y_values):
+                bins = (self.density_bins, self.density_bins)
+                self.histogram = StreamingHistogram2D.from_arrays(frame[self.x_column_name],
+                                                                  frame[self.y_column_name], bins)
+            else:
+                self.histogram.update(x_values, y_values)
+            self._draw_density()
+            return
+
+        # the markers drawn so far and the new points, thinned together to one per pixel
+        bbox = self.axes.bbox
+        drawn_x, drawn_y = x_values, y_values
+        if self.points is not None:
+            offsets = self.points.get_offsets()
+            drawn_x = np.concatenate([offsets[:, 0], x_values])
+            drawn_y = np.concatenate([offsets[:, 1], y_values])
+        thinned_x, thinned_y = decimate.thin_scatter(drawn_x, drawn_y, int(bbox.width), int(bbox.height))
+        if self.points is None:
+            self.points = self.axes.scatter(thinned_x, thinned_y, color='C0')
+        else:
+            self.points.set_offsets(np.column_stack([thinned_x, thinned_y]))
+        if self.plot_type == 'line':
+            self.regression.update(x_values, y_values)
+            slope, intercept, r_value = self.regression.linregress()
+            line_x = np.array([self.regression.x_range.min, self.regression.x_range.max])
+            if self.regression_line is None:
+                self.regression_line = self.axes.plot(line_x, slope * line_x + intercept, color='red',
+                                                      label='Linear Regression Line')[0]
+                self.axes.legend()
+            else:
+                self.regression_line.set_data(line_x, slope * line_x + intercept)
+        self.axes.relim()
+        # relim skips collections
+        if len(thinned_x):
+            self.axes.update_datalim(np.column_stack([thinned_x, thinned_y]))
+        self.axes.autoscale_view()
+
+    def _in_grid(self, x_values, y_values):
+        valid = ~(np.isnan(x_values) | np.isnan(y_values))
+        if not valid.any():
+            return True
+        x_values, y_values = x_values[valid], y_values[valid]
+        return (x_values.min() >= self.histogram.x_edges[0] and x_values.max() <= self.histogram.x_edges[-1]
+                and y_values.min() >= self.histogram.y_edges[0] and y_values.max() <= self.histogram.y_edges[-1])
+
+    def _draw_density(self):
+        counts = np.ma.masked_equal(self.histogram.counts.T, 0)
+        extent = [self.histogram.x_edges[0], self.histogram.x_edges[-1],
+                  self.histogram.y_edges[0], self.histogram.y_edges[-1]]
+        if self.image is None:
+            from matplotlib.colors import LogNorm
+            norm = LogNorm() if counts.count() else None
+            self.image = self.axes.imshow(counts, origin='lower', extent=extent, aspect='auto', norm=norm,
+                                          interpolation='nearest')
+            self.colorbar = self.figure.colorbar(self.image, ax=self.axes, label='Rows per bin')
+        else:
+            self.image.set_data(counts)
+            self.image.set_extent(extent)
+            self.image.autoscale()
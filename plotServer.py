@@ -0,0 +1,341 @@
+"""
+Local HTTP server that renders plots of CSV files shared by everyone on the host.
+
+Every file is parsed once into the binary column cache, and a reference counted index keeps the
+rows and column names of the datasets, read from the cache manifests. Plots are rendered
+concurrently on a pool of worker processes that memory-map the cached numeric columns, so the
+operating system keeps one copy of them in RAM for all workers, and several people plotting the
+same big file no longer parse and hold it once each. Datasets that are opened stay loaded in the
+workers until they are closed, text columns included, other datasets are dropped after each
+render. Saved plots go through the render cache, so repeated requests for the same plot are not
+rendered again.
+
+Requests take the arguments of csvReader.plot_column or csvReader.plot_versus. Columns can be
+given by name or index, files relative to the directory the server was started in:
+
+    GET  /plot_column?file=bestSynths.csv&columns=Delay,Area&plot_type=hist&format=png
+    GET  /plot_column?file=bestSynths.csv&columns=Area&plot_type=bar&aggregation=mean&key_column=Width&top=10
+    GET  /plot_versus?file=bestSynths.csv&x_column=Width&y_column=Area&plot_type=scatter&format=svg
+    GET  /datasets                               indexed datasets and their reference counts
+    POST /datasets/open?file=bestSynths.csv      keep a dataset loaded in the workers until it is closed
+    POST /datasets/close?file=bestSynths.csv
+
+Usage:
+
+    python3 plotServer.py --port 8050 --workers 4
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from batchRender import COLUMN_PLOT_TYPES, VERSUS_PLOT_TYPES, render_job, retain_datasets
+from coloredPrinter import ColoredPrinter as p
+from columnCache import ColumnCache
+from csvFormat import is_csv_file
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+class DatasetIndex():
+    """
+    Reference counted index of the datasets served, each parsed once into the column cache.
+
+    The index holds the rows and column names of every dataset, read from the manifest of its cache
+    entry without loading any data. A dataset is acquired for every render and released when the
+    render is done, and can be held longer through open and close. Referenced datasets are pinned:
+    the render workers keep them loaded between requests, with their numeric columns memory-mapped
+    from the cache so all workers share one copy, and drop every other dataset after a render. The
+    entries of unreferenced datasets stay in the index, up to MAX_UNREFERENCED of them, so a file is
+    parsed again only when it has changed. Concurrent first requests for a file wait for one parse.
+
+    Parameters:
+    -----------
+    cache_dir : str, optional
+        Directory of the binary column cache. Default is '.csvReader_cache'.
+    """
+
+    MAX_UNREFERENCED = 32
+
+    def __init__(self, cache_dir='.csvReader_cache'):
+        self.cache = ColumnCache(cache_dir)
+        # absolute path -> {'refs', 'identity', 'rows', 'columns'}, least recently used first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # signalled whenever a parse ends
+        self.parsed = threading.Condition(self.lock)
+        # absolute paths being parsed
+        self.parsing = set()
+
+    def acquire(self, path):
+        """
+        Adds a reference to the dataset at path, parsing the file into the column cache if needed.
+
+        Returns:
+        --------
+        dict:
+            The index entry, with the rows and column names of the dataset.
+        """
+        identity = self.cache.file_identity(path)
+        with self.lock:
+            while path in self.parsing:
+                self.parsed.wait()
+            entry = self.entries.get(path)
+            if entry is not None and entry['identity'] == identity:
+                return self._reference(path)
+            self.parsing.add(path)
+        try:
+            described = self.cache.describe(path)
+            if described is None:
+                # parsed here once, the workers memory-map the cache entry
+                df = self.cache.read_csv(path)
+                described = (len(df), list(df.columns))
+                del df
+        finally:
+            with self.lock:
+                self.parsing.discard(path)
+                self.parsed.notify_all()
+        rows, columns = described
+        with self.lock:
+            previous = self.entries.get(path)
+            # references to the previous contents of the file carry over
+            self.entries[path] = {'refs': previous['refs'] if previous is not None else 0, 'identity': identity,
+                                  'rows': rows, 'columns': list(columns)}
+            return self._reference(path)
+
+    def _reference(self, path):
+        entry = self.entries[path]
+        entry['refs'] += 1
+        self.entries.move_to_end(path)
+        return entry
+
+    def release(self, path):
+        """
+        Removes a reference to the dataset at path. At zero the dataset is no longer pinned in the workers.
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or entry['refs'] <= 0:
+                return
+            entry['refs'] -= 1
+            unreferenced = [other for other, other_entry in self.entries.items() if other_entry['refs'] <= 0]
+            for evicted in unreferenced[:max(0, len(unreferenced) - self.MAX_UNREFERENCED)]:
+                del self.entries[evicted]
+
+    def pinned(self):
+        """
+        Returns the paths of the referenced datasets, which the render workers keep loaded.
+        """
+        with self.lock:
+            return [path for path, entry in self.entries.items() if entry['refs'] > 0]
+
+    def describe(self, root):
+        with self.lock:
+            return [{'file': os.path.relpath(path, root), 'refs': entry['refs'], 'rows': entry['rows'],
+                     'columns': entry['columns']} for path, entry in self.entries.items()]
+
+
+def render_plot(job, cache_dir, pinned=()):
+    """
+    Renders a plot request in a worker process and returns the file contents.
+
+    Parameters:
+    -----------
+    job : dict
+        A batchRender job without doc_title.
+    cache_dir : str
+        Directory of the binary column cache.
+    pinned : list of str, optional
+        The datasets the worker keeps loaded after the render, see DatasetIndex. Others are dropped.
+
+    Returns:
+    --------
+    tuple:
+        (contents, error) where contents is None if the plot could not be rendered.
+    """
+    handle, doc_title = tempfile.mkstemp(suffix=f".{job['doc_type']}")
+    os.close(handle)
+    try:
+        _, error = render_job(dict(job, doc_title=doc_title), cache_dir)
+        if error is not None:
+            return None, error
+        with open(doc_title, 'rb') as rendered:
+            contents = rendered.read()
+        if not contents:
+            return None, "ValueError: the plot was not written"
+        return contents, None
+    finally:
+        os.remove(doc_title)
+        retain_datasets(pinned)
+
+
+class PlotRequestHandler(BaseHTTPRequestHandler):
+    """
+    Handles the requests of the plot server, see the module docstring.
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/datasets':
+                self.send_json(self.server.datasets.describe(self.server.root))
+            elif url.path in ('/plot_column', '/plot_versus'):
+                self.send_plot(url.path == '/plot_versus', query)
+            else:
+                self.send_error(404, f"Unknown path {url.path}")
+        except ValueError as error:
+            # the message goes into the status line, which must stay on one line
+            self.send_error(400, ' '.join(str(error).split()))
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/datasets/open':
+                entry = self.server.datasets.acquire(self.resolve(query.get('file')))
+                self.send_json({'rows': entry['rows'], 'columns': entry['columns']})
+            elif url.path == '/datasets/close':
+                self.server.datasets.release(self.resolve(query.get('file')))
+                self.send_json({})
+            else:
+                self.send_error(404, f"Unknown path {url.path}")
+        except ValueError as error:
+            # the message goes into the status line, which must stay on one line
+            self.send_error(400, ' '.join(str(error).split()))
+
+    def resolve(self, file):
+        """
+        Returns the absolute path of a CSV file under the root directory of the server.
+
+        Raises:
+        -------
+        ValueError:
+            If file is missing, is not a CSV file or lies outside the root directory.
+        """
+        if not file:
+            raise ValueError("The file parameter is required.")
+        path = os.path.realpath(os.path.join(self.server.root, file))
+        if os.path.commonpath([path, self.server.root]) != self.server.root or not is_csv_file(path):
+            raise ValueError(f"{file} is not a CSV file in the served directory.")
+        if not os.path.isfile(path):
+            raise ValueError(f"{file} does not exist.")
+        return path
+
+    def send_plot(self, versus, query):
+        doc_type = query.get('format', 'png')
+        if doc_type not in FORMATS:
+            raise ValueError(f"Unsupported format {doc_type}, supported formats: {', '.join(FORMATS)}.")
+        plot_types = VERSUS_PLOT_TYPES if versus else COLUMN_PLOT_TYPES
+        if query.get('plot_type', '') not in plot_types:
+            raise ValueError(f"Unsupported plot type {query['plot_type']}, supported types: {', '.join(plot_types[1:])}.")
+
+        path = self.resolve(query.get('file'))
+        # taken before this render references the dataset, which only pins it while it renders
+        pinned = self.server.datasets.pinned()
+        entry = self.server.datasets.acquire(path)
+        try:
+            def column(value):
+                # names take precedence over indexes, a column may be named '3'
+                if value in entry['columns'] or not value.isdigit():
+                    return value
+                return int(value)
+
+            job = {'file': path, 'plot_type': query.get('plot_type', ''), 'plot_title': query.get('plot_title', ''),
+                   'doc_type': doc_type}
+            if versus:
+                if 'x_column' not in query or 'y_column' not in query:
+                    raise ValueError("The x_column and y_column parameters are required.")
+                job.update(x_column=column(query['x_column']), y_column=column(query['y_column']))
+            else:
+                if not query.get('columns'):
+                    raise ValueError("The columns parameter is required.")
+                job['columns'] = [column(value) for value in query['columns'].split(',')]
+                if not query.get('top', '20').isdigit():
+                    raise ValueError("The top parameter must be a whole number.")
+                job.update(aggregation=query.get('aggregation', 'count'), top=int(query.get('top', '20')))
+                if query.get('key_column'):
+                    job['key_column'] = column(query['key_column'])
+                job['quantile_error'] = query.get('quantile_error', '').lower() in ('1', 'true', 'yes')
+            contents, error = self.server.workers.submit(render_plot, job, self.server.datasets.cache.cache_dir,
+                                                         pinned).result()
+        finally:
+            self.server.datasets.release(path)
+
+        if error is not None:
+            raise ValueError(error)
+        self.send_response(200)
+        self.send_header('Content-Type', FORMATS[doc_type])
+        self.send_header('Content-Length', str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
+
+    def send_json(self, value):
+        body = json.dumps(value).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def make_server(host='127.0.0.1', port=8050, workers=None, cache_dir='.csvReader_cache', root='.'):
+    """
+    Creates a plot server, see the module docstring. Call serve_forever() on it to start serving.
+
+    Parameters:
+    -----------
+    host : str, optional
+        Address to listen on. Default is '127.0.0.1', reachable from this host only.
+    port : int, optional
+        Port to listen on, 0 picks a free port. Default is 8050.
+    workers : int, optional
+        Number of render processes. Default is the number of CPU cores.
+    cache_dir : str, optional
+        Directory of the binary column cache and the render cache. Default is '.csvReader_cache'.
+    root : str, optional
+        Directory the served files are looked up in. Default is the current directory.
+
+    Returns:
+    --------
+    ThreadingHTTPServer:
+        The server, with its datasets index, workers and root as attributes.
+    """
+    server = ThreadingHTTPServer((host, port), PlotRequestHandler)
+    server.root = os.path.realpath(root)
+    server.datasets = DatasetIndex(cache_dir)
+    # request threads are running when the workers start, which forking is not safe with
+    server.workers = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                         mp_context=multiprocessing.get_context('spawn'))
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve plots of the CSV files in the current directory over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8050, help="port to listen on (default: 8050)")
+    parser.add_argument('--workers', type=int, default=None, help="number of render processes (default: all cores)")
+    args = parser.parse_args()
+
+    printer = p()
+    server = make_server(args.host, args.port, args.workers)
+    host, port = server.server_address[:2]
+    printer.print(f"Serving plots of {server.root} on http://{host}:{port}/ (Ctrl+C to stop)", options=["bold"])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.workers.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Timing and peak memory spans around the stages of loading, plotting and saving.
+
+Spans are recorded by one process wide Profiler, so any module can open a span without being
+handed a profiler object, the same way the logging module works:
+
+    from profiler import span
+    with span('parse columns'):
+        ...
+
+or, for a stage that is a whole function:
+
+    from profiler import profiled
+    @profiled('draw artists')
+    def draw_histogram(...):
+        ...
+
+Profiling is off by default and a span then costs one attribute lookup. When it is enabled,
+every span records its wall time and, unless memory tracking is turned off, the peak memory
+allocated above what was in use when the span started, as seen by tracemalloc. tracemalloc
+slows allocation heavy code such as matplotlib rendering down several times, so profile
+without memory tracking when the absolute times matter. tracemalloc has one peak for the whole
+process, which every span resets, so a span that overlaps a span of another thread, e.g. of a
+background load, gets no peak memory.
+"""
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+_NO_SPAN = contextlib.nullcontext()
+
+
+class Profiler():
+    """
+    Records nested timing and peak memory spans, prints per action summaries and exports traces.
+
+    Example:
+    --------
+    >>> profiler = Profiler()
+    >>> profiler.enable()
+    >>> with profiler.action('Plot a column'):
+    ...     with profiler.span('draw artists'):
+    ...         ...
+    >>> profiler.export_trace('trace.json')
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        # completed spans, in the order they ended
+        self.events = []
+        self.origin = time.perf_counter()
+        # every thread nests its own spans
+        self.local = threading.local()
+        # thread id -> open spans of the thread, to find spans whose peak another thread reset
+        self.stacks = {}
+        self.lock = threading.Lock()
+
+    def enable(self, memory=True):
+        """
+        Starts recording spans.
+
+        Parameters:
+        -----------
+        memory : bool, optional
+            Also record the peak memory of every span with tracemalloc. Default is True.
+        """
+        self.disable()
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+        self.memory = memory
+
+    def disable(self):
+        if self.memory:
+            tracemalloc.stop()
+        self.enabled = False
+        self.memory = False
+
+    def _traced_memory(self):
+        return tracemalloc.get_traced_memory() if self.memory else (0, 0)
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+            with self.lock:
+                self.stacks[threading.get_ident()] = self.local.stack
+        return self.local.stack
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        stack = self._stack()
+        current, peak = self._traced_memory()
+        if stack:
+            # the peak is reset below, so the parent keeps the peak it has reached so far
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        frame = {'name': name, 'start': time.perf_counter(), 'base': current, 'peak': 0, 'shared': False}
+        if self.memory:
+            with self.lock:
+                # resetting the peak spoils the peaks of the open spans of other threads, and theirs this one
+                for ident, other in self.stacks.items():
+                    if ident != threading.get_ident() and other:
+                        frame['shared'] = True
+                        for other_frame in other:
+                            other_frame['shared'] = True
+                tracemalloc.reset_peak()
+        stack.append(frame)
+        try:
+            yield
+        finally:
+            stack.pop()
+            end = time.perf_counter()
+            _, peak = self._traced_memory()
+            peak = max(peak, frame['peak'])
+            self.events.append({'name': name, 'start': frame['start'] - self.origin, 'seconds': end - frame['start'],
+                                'peak_bytes': max(0, peak - frame['base']) if self.memory and not frame['shared'] else None,
+                                'depth': len(stack),
+                                'thread': threading.get_ident()})
+
+    def span(self, name):
+        """
+        Returns a context manager that records the time and peak memory of the code it wraps.
+
+        Parameters:
+        -----------
+        name : str
+            Name of the stage, spans with the same name are added up in the summary.
+        """
+        return self._span(name) if self.enabled else _NO_SPAN
+
+    def render(self, figure):
+        """
+        Draws figure inside a 'render' span when profiling.
+
+        plt.show() blocks until the window is closed, so the render time of interactive plots is
+        measured by drawing the canvas once before showing it.
+        """
+        if self.enabled:
+            with self._span('render'):
+                figure.canvas.draw()
+
+    @contextlib.contextmanager
+    def action(self, name):
+        """
+        Records name as a span and prints a summary of the stages inside it when it ends.
+
+        Parameters:
+        -----------
+        name : str or None
+            Name of the action, e.g. the menu choice. None records nothing.
+        """
+        self.start_action(name)
+        try:
+            yield
+        finally:
+            self.end_action()
+
+    def start_action(self, name):
+        """
+        Starts recording an action of this thread, like action but for code that cannot be wrapped in a with block.
+
+        Every start_action must be followed by end_action on the same thread.
+        """
+        if not self.enabled or name is None:
+            self.local.action = None
+            return
+        span = self._span(name)
+        span.__enter__()
+        self.local.action = (span, len(self.events))
+
+    def end_action(self):
+        """
+        Ends the action started last on this thread and prints its summary.
+        """
+        action = getattr(self.local, 'action', None)
+        if action is None:
+            return
+        self.local.action = None
+        span, first = action
+        span.__exit__(None, None, None)
+        self.print_summary(self.events[first:])
+
+    def print_summary(self, events):
+        """
+        Prints the stages of an action as a table of calls, total time, share of the action and peak memory.
+
+        Parameters:
+        -----------
+        events : list of dict
+            The spans of the action, ending with the action itself.
+        """
+        from prettytable import PrettyTable
+        from coloredPrinter import ColoredPrinter as p
+        action = events[-1]
+        thread = action['thread']
+        stages = {}
+        direct_seconds = 0.0
+        for event in sorted(events[:-1], key=lambda event: event['start']):
+            if event['thread'] != thread:
+                continue
+            depth = event['depth'] - action['depth'] - 1
+            if depth == 0:
+                direct_seconds += event['seconds']
+            stage = stages.setdefault((depth, event['name']), {'calls': 0, 'seconds': 0.0, 'peak_bytes': None})
+            stage['calls'] += 1
+            stage['seconds'] += event['seconds']
+            if event['peak_bytes'] is not None:
+                stage['peak_bytes'] = max(stage['peak_bytes'] or 0, event['peak_bytes'])
+
+        def format_peak(peak_bytes):
+            return '' if peak_bytes is None else f"{peak_bytes / 1024 ** 2:.1f}"
+
+        table = PrettyTable()
+        table.field_names = ["Stage", "Calls", "Time (ms)", "Share", "Peak MB"]
+        total = action['seconds'] or float('inf')
+        for (depth, name), stage in stages.items():
+            table.add_row(['  ' * depth + name, stage['calls'], f"{stage['seconds'] * 1000:.1f}",
+                           f"{stage['seconds'] / total:.0%}", format_peak(stage['peak_bytes'])])
+        # time spent outside of any stage, mostly waiting for input and first imports
+        untracked = action['seconds'] - direct_seconds
+        table.add_row(['(prompts, imports, untracked)', '', f"{untracked * 1000:.1f}", f"{untracked / total:.0%}", ''])
+        table.align['Stage'] = 'l'
+
+        printer = p()
+        peak = '' if action['peak_bytes'] is None else f", peak {format_peak(action['peak_bytes'])} MB"
+        printer.print(f"\nProfile of '{action['name']}': {action['seconds'] * 1000:.1f} ms{peak}",
+                      color='cyan', options=['bold'])
+        printer.print(table.get_string(), color='cyan')
+
+    def export_trace(self, path):
+        """
+        Writes every recorded span to path in the Chrome trace event format.
+
+        The file opens in chrome://tracing, Perfetto or speedscope for offline analysis.
+
+        Parameters:
+        -----------
+        path : str
+            Path of the JSON trace file.
+        """
+        events = []
+        for event in self.events:
+            args = {} if event['peak_bytes'] is None else {'peak_mb': round(event['peak_bytes'] / 1024 ** 2, 3)}
+            events.append({'name': event['name'], 'ph': 'X', 'ts': event['start'] * 1e6, 'dur': event['seconds'] * 1e6,
+                           'pid': os.getpid(), 'tid': event['thread'], 'args': args})
+        with open(path, 'w') as trace_file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+default_profiler = Profiler()
+
+
+def span(name):
+    """
+    Returns a span of the process wide profiler, see Profiler.span.
+    """
+    return default_profiler.span(name)
+
+
+def profiled(name):
+    """
+    Decorator that records every call of a function as a span of the process wide profiler.
+
+    Parameters:
+    -----------
+    name : str
+        Name of the stage, see Profiler.span.
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with default_profiler.span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
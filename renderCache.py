@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import shutil
+
+
+class RenderCache():
+    """
+    On-disk cache of saved plot files, keyed on everything that determines their contents.
+
+    Saving the same figure again, e.g. from a reporting job that regenerates its plots, then copies
+    the stored file to the output path instead of drawing and rendering the figure. Each entry is a
+    single file named after its key. Entries are evicted least recently used first once the cache
+    grows beyond max_bytes, with the modification time of an entry as its last use.
+
+    Parameters:
+    -----------
+    cache_dir : str, optional
+        Directory the rendered files are kept in. Default is '.csvReader_cache/renders'.
+    max_bytes : int, optional
+        Size the cache is trimmed to after every store. Default is 256 MB.
+    link : bool, optional
+        Hardlink cached files to the output path instead of copying them. The output then shares its
+        contents with the cache entry, so csvReader replaces hardlinked outputs instead of writing into
+        them. Default is False.
+
+    Example:
+    --------
+    >>> renders = RenderCache()
+    >>> key = renders.key({'file': 'bestSynths.csv', 'plot_type': 'hist', 'format': 'png'})
+    >>> if not renders.fetch(key, 'hist.png'):
+    ...     plt.savefig('hist.png', format='png')
+    ...     renders.store(key, 'hist.png')
+    """
+
+    def __init__(self, cache_dir=os.path.join('.csvReader_cache', 'renders'), max_bytes=256 * 2**20, link=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.link = link
+
+    def key(self, parts):
+        """
+        Returns:
+        --------
+        str:
+            A hash of parts, a JSON serializable dict of everything the rendered file depends on.
+        """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, key, destination):
+        """
+        Copies or hardlinks the cached file for key to destination.
+
+        Returns:
+        --------
+        bool:
+            True on a cache hit, False if there is no entry for key.
+        """
+        entry = self.entry_path(key)
+        try:
+            # marks the entry as recently used
+            os.utime(entry)
+        except OSError:
+            return False
+        if self.link:
+            staging = f'{destination}.tmp-{os.getpid()}'
+            try:
+                os.link(entry, staging)
+                os.replace(staging, destination)
+                return True
+            except OSError:
+                # e.g. the output is on another file system
+                pass
+        release(destination)
+        try:
+            shutil.copyfile(entry, destination)
+        except FileNotFoundError:
+            # evicted by another process in the meantime
+            return False
+        return True
+
+    def store(self, key, path):
+        """
+        Adds the rendered file at path to the cache under key, then evicts entries beyond max_bytes.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging = f'{self.entry_path(key)}.tmp-{os.getpid()}'
+        shutil.copyfile(path, staging)
+        os.replace(staging, self.entry_path(key))
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently used entries until the cache holds at most max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and '.tmp-' not in entry.name:
+                stat = entry.stat()
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def release(path):
+    """
+    Removes path if it is a hardlink, so that writing a new file there leaves the other links unchanged.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
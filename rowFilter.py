@@ -0,0 +1,298 @@
+"""
+Row filters, applied while a file is read, and range indexes that skip the rows a filter rejects.
+
+A filter is a pandas query expression such as "Delay > 3.5" or
+"Time >= '2024-03-01' and Time < '2024-03-02'". Streamed files evaluate it chunk by chunk, so
+rejected rows are dropped before the next chunk is read. For files in the column cache, the
+comparisons of a column against constants give the range of values the filter can accept, and a
+ZoneMap of that column gives the blocks of rows that can hold such values. Only those rows are
+then read from the memory-mapped columns, so a filter on a narrow window of a sorted column costs
+time in proportion to the window rather than to the file.
+"""
+
+import ast
+import re
+
+import numpy as np
+
+# rows per block of a zone map
+BLOCK_ROWS = 65536
+
+# comparison operators of a column on the left -> (sets the lower bound, sets the upper bound)
+_BOUNDS = {ast.Lt: (False, True), ast.LtE: (False, True), ast.Gt: (True, False), ast.GtE: (True, False),
+           ast.Eq: (True, True)}
+_FLIPPED = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq}
+
+
+class RowFilter():
+    """
+    A filter on the rows of a dataset, given as a pandas query expression.
+
+    Column names that are not valid Python names are quoted with backticks, as in DataFrame.query.
+
+    Parameters:
+    -----------
+    expression : str
+        The condition rows must meet, e.g. "Delay > 3.5 and `Supply Voltage` <= 1.2".
+
+    Raises:
+    -------
+    ValueError:
+        If the expression is not valid.
+
+    Example:
+    --------
+    >>> row_filter = RowFilter("Time >= '2024-03-01' and Time < '2024-03-02'")
+    >>> row_filter.ranges
+    {'Time': (['2024-03-01'], ['2024-03-02'])}
+    >>> day = df[row_filter.mask(df)]
+    """
+
+    def __init__(self, expression):
+        self.expression = expression.strip()
+        quoted = {}
+
+        def placeholder(match):
+            name = f'__quoted_{len(quoted)}__'
+            quoted[name] = match.group(1)
+            return name
+        try:
+            tree = ast.parse(re.sub(r'`([^`]*)`', placeholder, self.expression), mode='eval')
+        except SyntaxError as error:
+            raise ValueError(f"Invalid filter {expression!r}: {error.msg}")
+
+        # names used in the expression, some of which may be functions rather than columns
+        self.names = list(dict.fromkeys(quoted.get(node.id, node.id) for node in ast.walk(tree)
+                                        if isinstance(node, ast.Name)))
+        # column name -> (lower bounds, upper bounds) the filter implies, all of which hold
+        self.ranges = {}
+        for condition in _conjuncts(tree.body):
+            if not isinstance(condition, ast.Compare):
+                continue
+            operands = [condition.left] + condition.comparators
+            for left, operator, right in zip(operands, condition.ops, operands[1:]):
+                operator = type(operator)
+                if isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+                    left, right, operator = right, left, _FLIPPED.get(operator)
+                if not isinstance(left, ast.Name) or operator not in _BOUNDS:
+                    continue
+                try:
+                    value = ast.literal_eval(right)
+                except (ValueError, TypeError, SyntaxError):
+                    # compared with another column or an expression
+                    continue
+                lows, highs = self.ranges.setdefault(quoted.get(left.id, left.id), ([], []))
+                sets_low, sets_high = _BOUNDS[operator]
+                if sets_low:
+                    lows.append(value)
+                if sets_high:
+                    highs.append(value)
+
+    def columns_in(self, columns):
+        """
+        Returns the columns among columns that the expression uses.
+        """
+        return [column_name for column_name in columns if column_name in self.names]
+
+    def mask(self, df):
+        """
+        Returns:
+        --------
+        numpy.ndarray:
+            True for the rows of df that meet the condition.
+        """
+        mask = df.eval(self.expression)
+        if np.ndim(mask) == 0:
+            return np.full(len(df), bool(mask))
+        return np.asarray(mask, dtype=bool)
+
+    def filter_chunks(self, chunks, usecols=None):
+        """
+        Yields the rows of every chunk that meet the condition, with only the columns in usecols.
+
+        The chunks must have been read with the columns of read_columns(usecols).
+        """
+        for chunk in chunks:
+            chunk = chunk[self.mask(chunk)]
+            if usecols is not None:
+                chunk = chunk[[column_name for column_name in chunk.columns if column_name in usecols]]
+            yield chunk
+
+    def read_columns(self, columns, usecols=None):
+        """
+        Returns the columns to read to evaluate the filter and return usecols, None for all of them.
+        """
+        if usecols is None:
+            return None
+        return list(dict.fromkeys(list(usecols) + self.columns_in(columns)))
+
+    def candidate_rows(self, columns, zone_maps):
+        """
+        Returns the row ranges that can meet the condition, from the zone maps of its range columns.
+
+        Parameters:
+        -----------
+        columns : dict
+            Column name -> values, of at least the columns in zone_maps.
+        zone_maps : dict
+            Column name -> ZoneMap, for some of the columns in ranges.
+
+        Returns:
+        --------
+        list of tuple or None:
+            (start, stop) row ranges, from the index that selects the fewest rows, or None if no index applies.
+        """
+        best = None
+        for column_name, zone_map in zone_maps.items():
+            lows, highs = self.ranges[column_name]
+            ranges = zone_map.candidate_rows(lows, highs, columns[column_name])
+            if ranges is not None and (best is None or _count(ranges) < _count(best)):
+                best = ranges
+        return best
+
+
+def _conjuncts(node):
+    # conditions joined by 'and' or '&' at the top level, all of which must hold
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return [condition for value in node.values for condition in _conjuncts(value)]
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.BitAnd):
+        return _conjuncts(node.left) + _conjuncts(node.right)
+    return [node]
+
+
+def _count(ranges):
+    return sum(stop - start for start, stop in ranges)
+
+
+def _comparable(values):
+    """
+    Returns values as an array that orders like the column, datetimes as int64 nanoseconds, or None.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return values.astype('datetime64[ns]', copy=False).view(np.int64)
+    if values.dtype.kind in 'iuf':
+        return values
+    return None
+
+
+class ZoneMap():
+    """
+    Range index of a column: the minimum and maximum of every block of rows, and whether the column is sorted.
+
+    A range query returns the blocks whose values can fall into the range. For a sorted column it
+    returns the exact rows instead, found by binary search in the column.
+
+    Parameters:
+    -----------
+    mins, maxs : numpy.ndarray
+        Minimum and maximum of every block. NaN, or the extremes of int64 for datetimes, for blocks without values.
+    rows : int
+        Number of rows of the column.
+    is_sorted : bool
+        The column is in ascending order without missing values.
+    kind : str
+        numpy dtype kind of the column, 'M' for datetimes.
+    block_rows : int, optional
+        Rows per block. Default is 65536.
+    """
+
+    def __init__(self, mins, maxs, rows, is_sorted, kind, block_rows=BLOCK_ROWS):
+        self.mins = mins
+        self.maxs = maxs
+        self.rows = rows
+        self.is_sorted = is_sorted
+        self.kind = kind
+        self.block_rows = block_rows
+
+    @classmethod
+    def build(cls, values, block_rows=BLOCK_ROWS):
+        """
+        Builds the zone map of a column in one pass.
+
+        Returns:
+        --------
+        ZoneMap or None:
+            The zone map, or None if the column is not numeric or datetime.
+        """
+        kind = np.asarray(values).dtype.kind
+        values = _comparable(values)
+        if values is None:
+            return None
+        starts = np.arange(0, len(values), block_rows)
+        if kind == 'M':
+            missing = values == np.iinfo(np.int64).min
+            mins = np.minimum.reduceat(np.where(missing, np.iinfo(np.int64).max, values), starts) if len(values) else values[:0]
+            maxs = np.maximum.reduceat(values, starts) if len(values) else values[:0]
+            complete = not missing.any()
+        else:
+            # fmin and fmax skip NaN, a block of only NaN stays NaN and never matches a range
+            mins = np.fmin.reduceat(values, starts) if len(values) else values[:0]
+            maxs = np.fmax.reduceat(values, starts) if len(values) else values[:0]
+            complete = kind != 'f' or not np.isnan(values).any()
+        is_sorted = complete and bool(np.all(values[1:] >= values[:-1]))
+        return cls(mins, maxs, len(values), is_sorted, kind, block_rows)
+
+    def _bound(self, value):
+        if self.kind == 'M':
+            import pandas as pd
+            return pd.Timestamp(value).as_unit('ns').value
+        return float(value)
+
+    def candidate_rows(self, lows, highs, values):
+        """
+        Returns the row ranges that can hold values between all of lows and all of highs, bounds included.
+
+        Parameters:
+        -----------
+        lows, highs : list
+            Lower and upper bounds, numbers or, for datetime columns, anything pandas.Timestamp accepts.
+        values : array-like
+            The column, only searched if it is sorted.
+
+        Returns:
+        --------
+        list of tuple or None:
+            (start, stop) row ranges, or None if the bounds do not compare with the column.
+        """
+        try:
+            low = max(self._bound(value) for value in lows) if lows else None
+            high = min(self._bound(value) for value in highs) if highs else None
+        except (TypeError, ValueError):
+            return None
+        if self.is_sorted:
+            values = _comparable(values)
+            start = 0 if low is None else int(np.searchsorted(values, low, side='left'))
+            stop = self.rows if high is None else int(np.searchsorted(values, high, side='right'))
+            return [(start, stop)] if start < stop else []
+
+        selected = np.ones(len(self.mins), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            if low is not None:
+                selected &= self.maxs >= low
+            if high is not None:
+                selected &= self.mins <= high
+        ranges = []
+        for block in np.flatnonzero(selected):
+            start, stop = int(block) * self.block_rows, min((int(block) + 1) * self.block_rows, self.rows)
+            if ranges and ranges[-1][1] == start:
+                ranges[-1] = (ranges[-1][0], stop)
+            else:
+                ranges.append((start, stop))
+        return ranges
+
+    def to_dict(self):
+        return {'rows': self.rows, 'sorted': self.is_sorted, 'kind': self.kind, 'block_rows': self.block_rows}
+
+    @classmethod
+    def from_dict(cls, values, mins, maxs):
+        return cls(mins, maxs, values['rows'], values['sorted'], values['kind'], values['block_rows'])
+
+
+def rows_of(ranges):
+    """
+    Returns the row positions in a list of (start, stop) ranges.
+    """
+    if not ranges:
+        return np.zeros(0, dtype=np.int64)
+    return np.concatenate([np.arange(start, stop, dtype=np.int64) for start, stop in ranges])
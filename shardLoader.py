@@ -0,0 +1,116 @@
+"""
+Parallel loading of a dataset that is sharded across many CSV files.
+
+The shards are parsed on a process pool. With a ColumnCache every worker writes its shard to the
+cache and only sends back the schema, and the parent memory-maps the parsed columns, so no parsed
+data is pickled between processes. The column schemas of the shards are then reconciled and the
+shards are concatenated into one DataFrame.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from backgroundTask import Cancelled
+from columnCache import ColumnCache
+from csvFormat import ParseOptions
+
+
+def _parse_shard(path, cache_dir, options):
+    if cache_dir is None:
+        return options.read_csv(path)
+    ColumnCache(cache_dir, options).read_csv(path)
+    return None
+
+
+def reconcile_dtypes(shards):
+    """
+    Chooses one dtype per column that holds the values of every shard.
+
+    Numeric columns are widened to the common numeric type, and to float if some shard lacks the
+    column, since the missing rows become NaN. Columns whose shards disagree in any other way
+    become object columns.
+
+    Parameters:
+    -----------
+    shards : list of pandas.DataFrame
+        The parsed shards.
+
+    Returns:
+    --------
+    dict:
+        Column name -> dtype, in order of first appearance across the shards.
+    """
+    dtypes = {}
+    for column_name in dict.fromkeys(column_name for shard in shards for column_name in shard.columns):
+        column_dtypes = [shard[column_name].dtype for shard in shards if column_name in shard.columns]
+        if len(column_dtypes) < len(shards):
+            # NaN fills the rows of the shards without this column
+            column_dtypes.append(np.dtype(float))
+        if all(dtype.kind in 'iuf' for dtype in column_dtypes):
+            dtypes[column_name] = np.result_type(*column_dtypes)
+        elif all(dtype == column_dtypes[0] for dtype in column_dtypes):
+            dtypes[column_name] = column_dtypes[0]
+        else:
+            dtypes[column_name] = np.dtype(object)
+    return dtypes
+
+
+def load_shards(paths, workers=None, cache_dir='.csvReader_cache', options=None, progress=None):
+    """
+    Loads several CSV files in parallel and concatenates them into one DataFrame.
+
+    The workers are spawned, so a script that calls this guards its entry point with
+    if __name__ == '__main__'.
+
+    Parameters:
+    -----------
+    paths : list of str
+        The CSV files, in the order their rows should appear.
+    workers : int, optional
+        Number of worker processes. Default is the number of CPU cores.
+    cache_dir : str or None, optional
+        Directory of the binary column cache. Set to None to send the parsed shards back from the workers.
+    options : ParseOptions, optional
+        Parser engine and date parsing. Default is the C engine without date parsing.
+    progress : backgroundTask.Progress, optional
+        Report the bytes of the files parsed so far, in order. Shards not started yet are dropped when the
+        load is cancelled.
+
+    Returns:
+    --------
+    pandas.DataFrame:
+        The rows of all shards, with the union of their columns and reconciled dtypes.
+    """
+    options = options or ParseOptions()
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    # spawned rather than forked, since this runs on the thread of a background load, see backgroundTask
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        results = pool.map(_parse_shard, paths, [cache_dir] * len(paths), [options] * len(paths))
+        if progress is None:
+            shards = list(results)
+        else:
+            progress.total_bytes = sum(os.path.getsize(path) for path in paths)
+            shards = []
+            try:
+                for path, shard in zip(paths, results):
+                    shards.append(shard)
+                    progress.update(progress.bytes + os.path.getsize(path))
+            except Cancelled:
+                pool.shutdown(cancel_futures=True)
+                raise
+    if cache_dir is not None:
+        cache = ColumnCache(cache_dir, options)
+        shards = [cache.load(path) for path in paths]
+
+    dtypes = reconcile_dtypes(shards)
+    # concatenating column by column avoids the slow path pandas takes for frames with different block layouts
+    columns = {}
+    for column_name, dtype in dtypes.items():
+        parts = [shard[column_name].astype(dtype, copy=False) if column_name in shard.columns
+                 else pd.Series(np.nan, index=range(len(shard)), dtype=dtype) for shard in shards]
+        columns[column_name] = pd.concat(parts, ignore_index=True)
+    return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,657 @@
+"""
+Incremental aggregations used to plot data that is read chunk by chunk.
+
+Every accumulator has an update() method that is fed one chunk of values at a time and
+keeps a bounded amount of state, no matter how many rows pass through it.
+"""
+
+import numpy as np
+
+
+def bin_edges(bins, value_range):
+    """
+    Returns bins + 1 evenly spaced edges over value_range, widening an empty range around its value.
+    """
+    low, high = value_range
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+class RunningRange():
+    """
+    Tracks the minimum and maximum of a stream of values, ignoring NaNs.
+    """
+
+    def __init__(self):
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if values.size:
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+
+    def merge(self, other):
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def is_empty(self):
+        return self.min > self.max
+
+
+class StreamingHistogram():
+    """
+    Accumulates histogram counts over fixed bin edges.
+
+    Parameters:
+    -----------
+    bins : int
+        Number of bins.
+    value_range : tuple
+        The (min, max) range covered by the bins, usually taken from a RunningRange pass.
+    """
+
+    def __init__(self, bins, value_range):
+        self.edges = bin_edges(bins, value_range)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        counts, _ = np.histogram(values[~np.isnan(values)], bins=self.edges)
+        self.counts += counts
+
+
+class MultiHistogram():
+    """
+    Accumulates the histograms of several columns over one set of shared bin edges.
+
+    A block of rows by columns is binned in a single vectorized pass: the bin index of every
+    value is computed arithmetically, offset by the column it belongs to, and all columns are
+    counted with one numpy.bincount. Because the edges are shared, the counts of the columns
+    can be compared bin by bin.
+
+    Parameters:
+    -----------
+    column_names : list of str
+        The columns, in the order of the columns of the blocks passed to update().
+    bins : int
+        Number of bins.
+    value_range : tuple
+        The (min, max) range covered by the bins, usually the range over all of the columns.
+    """
+
+    def __init__(self, column_names, bins, value_range):
+        self.column_names = list(column_names)
+        self.edges = bin_edges(bins, value_range)
+        self.counts = np.zeros((len(self.column_names), bins), dtype=np.int64)
+
+    def update(self, block):
+        """
+        Adds a block of values, a 2D array with one column per entry of column_names.
+        """
+        values = np.asarray(block, dtype=float).reshape(-1, len(self.column_names))
+        columns, bins = self.counts.shape
+        low, high = self.edges[0], self.edges[-1]
+        with np.errstate(invalid='ignore'):
+            indexes = (values - low) * (bins / (high - low))
+            # NaN compares False, so missing values are dropped together with values outside the range
+            outside = ~((values >= low) & (values <= high))
+        np.floor(indexes, out=indexes)
+        # the upper edge belongs to the last bin, like numpy.histogram
+        np.minimum(indexes, bins - 1, out=indexes)
+        indexes += np.arange(columns) * bins
+        # dropped values are counted in one extra bin past the last column
+        indexes[outside] = columns * bins
+        counts = np.bincount(indexes.astype(np.int64).ravel(), minlength=columns * bins + 1)
+        self.counts += counts[:-1].reshape(columns, bins)
+
+    def column_counts(self, column_name):
+        return self.counts[self.column_names.index(column_name)]
+
+
+class StreamingHistogram2D():
+    """
+    Accumulates counts of (x, y) pairs on a fixed grid of equally sized bins.
+
+    Bin indexes are computed arithmetically and counted with numpy.bincount, so an update costs
+    one pass over the chunk and the state only depends on the grid resolution.
+
+    Parameters:
+    -----------
+    bins : tuple of int
+        Number of bins along x and along y.
+    x_range : tuple
+        The (min, max) range of x covered by the grid.
+    y_range : tuple
+        The (min, max) range of y covered by the grid.
+    """
+
+    def __init__(self, bins, x_range, y_range):
+        self.x_edges = bin_edges(bins[0], x_range)
+        self.y_edges = bin_edges(bins[1], y_range)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @classmethod
+    def from_arrays(cls, x, y, bins):
+        """
+        Builds the grid over the range of x and y and counts them in a single update.
+        """
+        x_range, y_range = RunningRange(), RunningRange()
+        x_range.update(x)
+        y_range.update(y)
+        histogram = cls(bins, (x_range.min, x_range.max), (y_range.min, y_range.max))
+        histogram.update(x, y)
+        return histogram
+
+    def _bin_indexes(self, values, edges):
+        bins = edges.size - 1
+        indexes = np.floor((values - edges[0]) * (bins / (edges[-1] - edges[0]))).astype(np.int64)
+        # the upper edge belongs to the last bin, like numpy.histogram
+        indexes[values == edges[-1]] = bins - 1
+        return indexes
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        x_bins, y_bins = self.counts.shape
+        x_indexes = self._bin_indexes(x, self.x_edges)
+        y_indexes = self._bin_indexes(y, self.y_edges)
+        # values outside the grid are dropped
+        inside = (x_indexes >= 0) & (x_indexes < x_bins) & (y_indexes >= 0) & (y_indexes < y_bins)
+        flat = x_indexes[inside] * y_bins + y_indexes[inside]
+        self.counts += np.bincount(flat, minlength=x_bins * y_bins).reshape(x_bins, y_bins)
+
+
+class MinMaxEnvelope():
+    """
+    Reduces a stream of values to the minimum and maximum of consecutive row buckets.
+
+    The bucket width starts at one row and doubles whenever the number of buckets would
+    exceed max_buckets, so peaks survive while the state stays bounded.
+
+    Parameters:
+    -----------
+    max_buckets : int, optional
+        Upper bound on the number of buckets kept. Default is 2000.
+    """
+
+    def __init__(self, max_buckets=2000):
+        self.max_buckets = max_buckets
+        self.width = 1
+        self.rows = 0
+        self.mins = np.empty(0)
+        self.maxs = np.empty(0)
+
+    def _halve(self):
+        # merge neighbouring buckets, padding with NaN so fmin/fmax keep the odd one out
+        if self.mins.size % 2:
+            self.mins = np.append(self.mins, np.nan)
+            self.maxs = np.append(self.maxs, np.nan)
+        self.mins = np.fmin(self.mins[0::2], self.mins[1::2])
+        self.maxs = np.fmax(self.maxs[0::2], self.maxs[1::2])
+        self.width *= 2
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        while -(-(self.rows + values.size) // self.width) > self.max_buckets:
+            self._halve()
+
+        buckets = (self.rows + np.arange(values.size)) // self.width
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        mins = np.fmin.reduceat(values, starts)
+        maxs = np.fmax.reduceat(values, starts)
+
+        # the first bucket of this chunk may continue the last bucket of the previous one
+        if buckets[0] < self.mins.size:
+            self.mins[-1] = np.fmin(self.mins[-1], mins[0])
+            self.maxs[-1] = np.fmax(self.maxs[-1], maxs[0])
+            mins, maxs = mins[1:], maxs[1:]
+
+        self.mins = np.concatenate([self.mins, mins])
+        self.maxs = np.concatenate([self.maxs, maxs])
+        self.rows += values.size
+
+    def points(self):
+        """
+        Returns:
+        --------
+        tuple of numpy.ndarray:
+            Row positions and values that trace the envelope, two points per bucket.
+        """
+        starts = np.arange(self.mins.size) * self.width
+        x = np.repeat(starts, 2)
+        y = np.column_stack([self.mins, self.maxs]).ravel()
+        return x, y
+
+
+class ReservoirSample():
+    """
+    Keeps a uniform random sample of at most size (x, y) pairs from a stream.
+
+    Each row gets a random key and the rows with the smallest keys are kept, which makes
+    the sample uniform over everything seen so far.
+
+    Parameters:
+    -----------
+    size : int, optional
+        Maximum number of rows kept. Default is 100000.
+    seed : int, optional
+        Seed for the random number generator.
+    """
+
+    def __init__(self, size=100000, seed=None):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.keys = np.empty(0)
+        self.x = np.empty(0)
+        self.y = np.empty(0)
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        keys = np.concatenate([self.keys, self.rng.random(x.size)])
+        x = np.concatenate([self.x, x])
+        y = np.concatenate([self.y, y])
+        if keys.size > self.size:
+            keep = np.argpartition(keys, self.size)[:self.size]
+            keys, x, y = keys[keep], x[keep], y[keep]
+        self.keys, self.x, self.y = keys, x, y
+
+
+class RegressionStats():
+    """
+    Accumulates the sufficient statistics of a least squares line fit of y against x.
+
+    The statistics are the row count, the means of x and y and the centered sums of squares and
+    cross products. They carry the same information as n, sum(x), sum(y), sum(xy), sum(x^2) and
+    sum(y^2), but do not lose precision when the values are large compared to their spread.
+    Each update is one vectorized pass over the chunk, and accumulators built on different
+    chunks or in different processes are combined with merge().
+
+    Rows where either value is NaN are skipped, matching how pandas drops missing values.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.sxx = 0.0
+        self.syy = 0.0
+        self.sxy = 0.0
+        self.x_range = RunningRange()
+
+    def update(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        x, y = x[valid], y[valid]
+        if x.size == 0:
+            return
+
+        chunk = RegressionStats()
+        chunk.n = x.size
+        chunk.mean_x = x.mean()
+        chunk.mean_y = y.mean()
+        dx = x - chunk.mean_x
+        dy = y - chunk.mean_y
+        chunk.sxx = np.dot(dx, dx)
+        chunk.syy = np.dot(dy, dy)
+        chunk.sxy = np.dot(dx, dy)
+        chunk.x_range.update(x)
+        self.merge(chunk)
+
+    def merge(self, other):
+        """
+        Adds the rows accumulated by other to this accumulator.
+
+        Parameters:
+        -----------
+        other : RegressionStats
+            Statistics of a disjoint set of rows.
+
+        Returns:
+        --------
+        RegressionStats:
+            This accumulator.
+        """
+        if other.n == 0:
+            return self
+        n = self.n + other.n
+        dx = other.mean_x - self.mean_x
+        dy = other.mean_y - self.mean_y
+        weight = self.n * other.n / n
+        self.sxx += other.sxx + dx * dx * weight
+        self.syy += other.syy + dy * dy * weight
+        self.sxy += other.sxy + dx * dy * weight
+        self.mean_x += dx * other.n / n
+        self.mean_y += dy * other.n / n
+        self.n = n
+        self.x_range.merge(other.x_range)
+        return self
+
+    def linregress(self):
+        """
+        Returns:
+        --------
+        tuple:
+            (slope, intercept, r_value) of the least squares line. The slope is NaN if all x values are equal.
+        """
+        slope = self.sxy / self.sxx if self.sxx > 0 else np.nan
+        intercept = self.mean_y - slope * self.mean_x
+        r_value = self.sxy / np.sqrt(self.sxx * self.syy) if self.sxx * self.syy > 0 else 0.0
+        return slope, intercept, r_value
+
+
+# how the rows of a group are reduced to the height of its bar
+BAR_AGGREGATIONS = ('count', 'sum', 'mean')
+
+
+class GroupedBars():
+    """
+    Aggregates columns into groups of bars, one group per key and one bar per column.
+
+    Without a key column, the keys are the distinct values of the columns and every bar counts how
+    often its column holds that value. With a key column, rows are grouped by its values and every
+    column is counted, summed or averaged per group. Each chunk is reduced to per key counts and sums
+    with a hash group by, so the state grows with the number of distinct keys, not with the rows.
+    Only the top groups get bars of their own, the others are merged into one 'other' group, so the
+    number of bars is bounded by top no matter how many rows or keys there are.
+
+    Parameters:
+    -----------
+    column_names : list of str
+        The columns drawn as bars.
+    aggregation : str, optional
+        'count', 'sum' or 'mean'. Default is 'count'.
+    by : str, optional
+        The key column to group rows by. Required for 'sum' and 'mean'.
+    top : int, optional
+        Number of groups drawn on their own: those with the most values, or the largest absolute
+        sums for 'sum'. Default is 20.
+
+    Raises:
+    -------
+    ValueError:
+        If the aggregation is not supported, or it needs a key column and none is given.
+
+    Example:
+    --------
+    >>> bars = GroupedBars(['Area', 'Power'], 'mean', by='Design', top=10)
+    >>> for chunk in chunks:
+    ...     bars.update(chunk)
+    >>> bars.bars()   # one row per design, 'other (n)' last
+    """
+
+    def __init__(self, column_names, aggregation='count', by=None, top=20):
+        if aggregation not in BAR_AGGREGATIONS:
+            raise ValueError(f"Unsupported aggregation {aggregation!r}, supported aggregations: "
+                             f"{', '.join(BAR_AGGREGATIONS)}.")
+        if by is None and aggregation != 'count':
+            raise ValueError(f"Bars of the {aggregation} need a key column to group the rows by.")
+        self.column_names = list(dict.fromkeys(column_names))
+        self.aggregation = aggregation
+        self.by = by
+        self.top = max(1, int(top))
+        # key -> number of values of every column, and their sum for 'sum' and 'mean'
+        self.counts = None
+        self.sums = None
+
+    def usecols(self):
+        """
+        Returns the columns the chunks passed to update() must have.
+        """
+        return list(dict.fromkeys(self.column_names + ([self.by] if self.by is not None else [])))
+
+    def update(self, chunk):
+        """
+        Adds the rows of a chunk, a DataFrame with the columns of usecols().
+
+        Raises:
+        -------
+        ValueError:
+            If a column to sum or average is not numeric.
+        """
+        import pandas as pd
+        sums = None
+        if self.by is None:
+            counts = pd.concat({column_name: chunk[column_name].value_counts(sort=False)
+                                for column_name in self.column_names}, axis=1)
+        else:
+            values = chunk[self.column_names]
+            if self.aggregation != 'count':
+                for column_name in self.column_names:
+                    if not pd.api.types.is_numeric_dtype(values[column_name]):
+                        raise ValueError(f"Column {column_name} has no numeric values to {self.aggregation}.")
+            # rows without a key are left out, like missing values of the columns
+            groups = values.groupby(chunk[self.by].rename(None), sort=False, observed=True)
+            counts = groups.count()
+            if self.aggregation != 'count':
+                sums = groups.sum()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+        if sums is not None:
+            self.sums = sums if self.sums is None else self.sums.add(sums, fill_value=0)
+
+    def _heights(self, counts, sums):
+        if self.aggregation == 'count':
+            return counts
+        if self.aggregation == 'sum':
+            return sums
+        # a column without values in a group gets no bar
+        return sums / counts.where(counts > 0)
+
+    def bars(self):
+        """
+        Returns:
+        --------
+        pandas.DataFrame:
+            The height of every bar, one row per group labelled with its key and one column per column name.
+            Groups are in key order if the keys are numbers or dates and largest first otherwise. The merged
+            groups come last, labelled 'other (n groups)'.
+        """
+        import pandas as pd
+        if self.counts is None:
+            return pd.DataFrame(columns=self.column_names, dtype=float)
+        counts = self.counts.fillna(0)
+        rows = counts.sum(axis=1)
+        # categorical columns count their unused categories too
+        counts = counts[rows > 0]
+        rows = rows[rows > 0]
+        sums = self.sums.fillna(0).loc[counts.index] if self.sums is not None else None
+        weights = sums.abs().sum(axis=1) if self.aggregation == 'sum' else rows
+
+        shown = weights.sort_values(ascending=False, kind='stable').index[:self.top]
+        if pd.api.types.is_numeric_dtype(shown) or pd.api.types.is_datetime64_any_dtype(shown):
+            shown = shown.sort_values()
+        heights = self._heights(counts.loc[shown], sums.loc[shown] if sums is not None else None)
+        heights.index = [f'{key:.6g}' if isinstance(key, float) else str(key) for key in shown]
+
+        merged = ~counts.index.isin(shown)
+        if merged.any():
+            other = self._heights(counts[merged].sum().to_frame().T,
+                                  sums[merged].sum().to_frame().T if sums is not None else None)
+            merged_groups = int(merged.sum())
+            other.index = [f"other ({merged_groups} {'group' if merged_groups == 1 else 'groups'})"]
+            heights = pd.concat([heights, other])
+        return heights[self.column_names].astype(float)
+
+
+class QuantileSketch():
+    """
+    Mergeable streaming quantile sketch (KLL) of a column of numbers.
+
+    Values are kept in levels, where a value at level h stands for 2**h values of the input. When a
+    level outgrows its capacity it is sorted and every other value, from a random offset, moves up
+    a level, which halves the level and moves the rank of any value by at most the weight of the
+    level. Capacities shrink by 2/3 per level below the top one, so the sketch holds about 3 * k
+    values however many rows pass through it. Two sketches merge by joining their levels, so sketches
+    built by separate workers, or of separate files, combine into the sketch of all of their rows.
+
+    Parameters:
+    -----------
+    k : int, optional
+        Capacity of the top level, which sets the accuracy. Default is 200, for a rank error of about 1.3%.
+    seed : int, optional
+        Seed of the compaction offsets, fixed so that the same values in the same order give the same
+        sketch. Default is 0.
+
+    Example:
+    --------
+    >>> sketch = QuantileSketch()
+    >>> for chunk in chunks:
+    ...     sketch.update(chunk['Delay'])
+    >>> sketch.quantiles([0.25, 0.5, 0.75]), sketch.rank_error()
+    """
+
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.rng = np.random.default_rng(seed)
+        self.levels = [np.zeros(0)]
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        # no value has been dropped yet, quantiles are exact
+        self.exact = True
+
+    def _capacity(self, level):
+        return max(8, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - level - 1))))
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                items = np.sort(self.levels[level])
+                kept = items[:0]
+                if len(items) % 2:
+                    # a level halves exactly, one value waits at this level for the next compaction
+                    keep = int(self.rng.integers(len(items)))
+                    kept = items[keep:keep + 1]
+                    items = np.delete(items, keep)
+                self.levels[level] = kept
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[int(self.rng.integers(2))::2]])
+                self.exact = False
+            level += 1
+
+    def update(self, values):
+        """
+        Adds a chunk of values, ignoring NaNs.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if not values.size:
+            return
+        self.count += values.size
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        """
+        Adds the values summarized by other, a sketch of a disjoint set of rows, to this sketch.
+
+        Returns:
+        --------
+        QuantileSketch:
+            This sketch.
+        """
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.zeros(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.exact = self.exact and other.exact
+        self._compress()
+        return self
+
+    def rank_error(self):
+        """
+        Returns:
+        --------
+        float:
+            Bound on the error of the rank of a quantile, as a fraction of the count, that holds with 99%
+            confidence. The empirical bound of the KLL sketch, 0 while the sketch is exact.
+        """
+        return 0.0 if self.exact else 2.296 / self.k ** 0.9723
+
+    def rank(self, value):
+        """
+        Returns the estimated number of values less than or equal to value.
+        """
+        return int(sum(np.count_nonzero(items <= value) << level for level, items in enumerate(self.levels)))
+
+    def quantiles(self, fractions):
+        """
+        Returns the values at the given fractions of the count, 0 being the minimum and 1 the maximum.
+
+        Parameters:
+        -----------
+        fractions : array-like
+            Fractions between 0 and 1.
+
+        Returns:
+        --------
+        numpy.ndarray:
+            The estimated quantiles, NaN for an empty sketch.
+        """
+        fractions = np.clip(np.asarray(fractions, dtype=float), 0, 1)
+        if not self.count:
+            return np.full(fractions.shape, np.nan)
+        values = self._values_at_ranks(fractions * self.count)
+        # the extremes are tracked exactly
+        return np.where(fractions <= 0, self.min, np.where(fractions >= 1, self.max, values))
+
+    def _values_at_ranks(self, ranks):
+        # the first value whose estimated rank reaches each of ranks
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype=np.int64) for level, items in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        positions = np.searchsorted(cumulative, ranks, side='left')
+        return items[order][np.minimum(positions, len(items) - 1)]
+
+    def box_stats(self, whis=1.5):
+        """
+        Returns the statistics of a box plot, in the format of matplotlib.cbook.boxplot_stats.
+
+        The quartiles and median are sketched. Each whisker reaches the sketched quantile at the rank of
+        whis times the interquartile range beyond the box, or the exact extreme if that is inside it.
+        Only the minimum and maximum are returned as outliers, since the others are not kept.
+        """
+        q1, median, q3 = self.quantiles([0.25, 0.5, 0.75])
+        low, high = q1 - whis * (q3 - q1), q3 + whis * (q3 - q1)
+        whislo, whishi = self.min, self.max
+        if self.min < low:
+            # the first value past the ones at or below the lower limit
+            whislo = min(float(self._values_at_ranks(self.rank(low) + 1)), q1)
+        if self.max > high:
+            # the last value at or below the upper limit
+            whishi = max(float(self._values_at_ranks(self.rank(high))), q3)
+        fliers = [value for value in (self.min, self.max) if value < whislo or value > whishi]
+        return {'med': float(median), 'q1': float(q1), 'q3': float(q3), 'whislo': float(whislo),
+                'whishi': float(whishi), 'fliers': np.array(fliers)}
+
+    def to_dict(self):
+        return {'k': self.k, 'count': self.count, 'min': self.min, 'max': self.max, 'exact': self.exact,
+                'levels': [items.tolist() for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, values):
+        sketch = cls(values['k'])
+        sketch.count = values['count']
+        sketch.min = values['min']
+        sketch.max = values['max']
+        sketch.exact = values['exact']
+        sketch.levels = [np.array(items, dtype=float) for items in values['levels']]
+        return sketch
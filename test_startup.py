@@ -0,0 +1,27 @@
+"""
+Startup time of 'import csvReader', which must stay within the budget of the benchmark harness.
+
+Run with python3 -m pytest test_startup.py or python3 -m unittest test_startup.
+"""
+
+import unittest
+
+from benchmark import STARTUP_BUDGET_S, benchmark_startup
+
+
+class StartupTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # measured in fresh interpreters, the fastest of several runs
+        cls.startup = benchmark_startup(repeat=5)
+
+    def test_import_within_budget(self):
+        self.assertLessEqual(self.startup['seconds'], STARTUP_BUDGET_S)
+
+    def test_no_heavy_modules_imported(self):
+        self.assertEqual(self.startup['heavy_modules'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()